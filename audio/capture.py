@@ -1,22 +1,25 @@
-import pyaudiowpatch as pyaudio
 import time
-import wave
-import os
-import datetime
 import threading
-import collections
-import queue
 
-class AudioCapture:
+from audio.recorder import SegmentedWavRecorder
+from audio.sources import AudioSource
+from pipeline.resources import pin_current_thread
+
+try:
+    import pyaudiowpatch as pyaudio
+except ImportError: # Only available on Windows; other sources still work without it
+    pyaudio = None
+
+class AudioCapture(AudioSource):
+    """WASAPI loopback capture of the default output device (Windows only)."""
     def __init__(self, buffer_size=50):
+        if pyaudio is None:
+            raise RuntimeError("pyaudiowpatch is not installed: loopback capture requires Windows. "
+                               "Use a file or synthetic source instead (audio.sources).")
+        super().__init__(buffer_size=buffer_size)
         self.p = pyaudio.PyAudio()
         self.loopback_device = None
-        self.recording = False
-        self.thread = None
-        # Circular buffer using deque with maxlen
-        # Stores tuples: (audio_data, timestamp, sample_rate, channels)
-        self.audio_queue = collections.deque(maxlen=buffer_size) 
-        self.chunk_duration = 0.3 # Default chunk duration
+        self._chunk_recorder = None # Created by save_chunk_to_wav
 
     def list_devices(self):
         """Lists all available audio devices and returns a list of dictionaries."""
@@ -114,15 +117,10 @@ class AudioCapture:
         self.thread.start()
         print(f"Started background capture from {self.loopback_device['name']}")
 
-    def stop_capture(self):
-        """Stops the background capture thread."""
-        self.recording = False
-        if self.thread and self.thread.is_alive():
-            self.thread.join()
-        print("Capture stopped.")
-
     def _capture_loop(self):
         """Internal method to capture audio continuously."""
+        if self.cpu_affinity:
+            pin_current_thread(self.cpu_affinity)
         # Calculate frame count for the desired chunk duration
         FRAME_COUNT = int(self.loopback_device["defaultSampleRate"] * self.chunk_duration)
         
@@ -148,12 +146,12 @@ class AudioCapture:
                 
                 # Add to circular buffer
                 # (data, timestamp, sample_rate, channels)
-                self.audio_queue.append((
+                self._push_chunk(
                     data, 
                     timestamp, 
                     int(self.loopback_device["defaultSampleRate"]), 
                     self.loopback_device["maxInputChannels"]
-                ))
+                )
                 
             except Exception as e:
                 print(f"Error during capture: {e}")
@@ -162,50 +160,23 @@ class AudioCapture:
         stream.stop_stream()
         stream.close()
 
-    def get_latest_chunk(self):
-        """
-        Retrieves the oldest chunk from the buffer (FIFO).
-        Returns None if buffer is empty.
-        """
-        try:
-            return self.audio_queue.popleft()
-        except IndexError:
-            return None
-
-    def get_last_chunk_and_clear(self):
+    def save_chunk_to_wav(self, data, sample_rate, channels, output_dir="recordings"):
         """
-        Retrieves the *newest* chunk from the buffer and clears the rest.
-        Returns (chunk, dropped_count).
-        If buffer is empty, returns (None, 0).
+        Appends a chunk to the session recording in `output_dir`.
+        Chunks are queued to a background SegmentedWavRecorder, which streams them into
+        segmented files instead of creating one WAV per chunk. Returns the file being written
+        (None until the writer has opened it). For continuous recording, attach a recorder to
+        the source instead (`capture.recorder = SegmentedWavRecorder(...).start()`).
         """
-        if not self.audio_queue:
-            return None, 0
-            
-        dropped = len(self.audio_queue) - 1
-        # Get the last item (newest)
-        item = self.audio_queue[-1] 
-        # Clear the queue
-        self.audio_queue.clear()
-        
-        return item, dropped
-
-    def save_chunk_to_wav(self, data, sample_rate, channels, output_dir="recordings"):
-        """Saves a chunk of audio data to a WAV file."""
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-            
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        filename = os.path.join(output_dir, f"chunk_{timestamp}.wav")
-        
-        wf = wave.open(filename, 'wb')
-        wf.setnchannels(channels)
-        wf.setsampwidth(self.p.get_sample_size(pyaudio.paInt16))
-        wf.setframerate(sample_rate)
-        wf.writeframes(data)
-        wf.close()
-        # print(f"Saved: {filename}")
-        return filename
+        if self._chunk_recorder is None or self._chunk_recorder.output_dir != output_dir:
+            if self._chunk_recorder is not None:
+                self._chunk_recorder.close()
+            self._chunk_recorder = SegmentedWavRecorder(output_dir=output_dir).start()
+        self._chunk_recorder.write(data, sample_rate, channels)
+        return self._chunk_recorder.current_file
 
     def close(self):
         self.stop_capture()
+        if self._chunk_recorder is not None:
+            self._chunk_recorder.close()
         self.p.terminate()
\ No newline at end of file
@@ -1,3 +1,5 @@
+import functools
+import math
 import numpy as np
 import scipy.signal
 
@@ -23,14 +25,14 @@ def to_mono(audio_float, channels):
 
 def resample_audio(audio_float, original_rate, target_rate=16000):
     """
-    Resamples audio to target sample rate using scipy.signal.resample.
-    Note: scipy.signal.resample assumes the input is the entire signal (Fourier method).
-    For streaming, polyphase resampling (resample_poly) is often better, 
-    but for fixed chunks 'resample' is usually fine and fast.
+    Resamples a complete (isolated) signal to the target sample rate using the
+    polyphase method (scipy.signal.resample_poly).
+    For continuous streams use StreamingResampler, which keeps the filter state
+    across chunks and avoids artifacts at the chunk seams.
     """
     if original_rate != target_rate:
-        num_samples = int(len(audio_float) * target_rate / original_rate)
-        audio_float = scipy.signal.resample(audio_float, num_samples)
+        up, down, _, _ = polyphase_filter_bank(original_rate, target_rate)
+        audio_float = scipy.signal.resample_poly(audio_float, up, down).astype(np.float32, copy=False)
     return audio_float
 
 def is_speech(audio_float, threshold=0.001):
@@ -40,3 +42,237 @@ def is_speech(audio_float, threshold=0.001):
     """
     rms = np.sqrt(np.mean(audio_float**2))
     return rms > threshold, rms
+
+# Most common loopback device rates -> Whisper rate
+COMMON_RATE_PAIRS = ((44100, 16000), (48000, 16000), (96000, 16000))
+
+@functools.lru_cache(maxsize=None)
+def polyphase_filter_bank(original_rate, target_rate):
+    """
+    Designs (once per rate pair) the same low-pass FIR filter used by
+    scipy.signal.resample_poly and splits it into polyphase components.
+    Returns (up, down, half_len, bank), where bank[r] holds the reversed taps of
+    phase r, ready for a dot product with an ascending input window.
+    """
+    g = math.gcd(int(original_rate), int(target_rate))
+    up = int(target_rate) // g
+    down = int(original_rate) // g
+    if up == down:
+        return up, down, 0, None
+
+    # Same filter design as resample_poly (kaiser window, beta=5.0)
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    h = scipy.signal.firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0)) * up
+
+    taps_per_phase = -(-len(h) // up)
+    padded = np.zeros(taps_per_phase * up)
+    padded[:len(h)] = h
+    # bank[r, q] = h[r + q*up], reversed so it multiplies windows in ascending order
+    bank = padded.reshape(taps_per_phase, up).T[:, ::-1]
+    bank = np.ascontiguousarray(bank, dtype=np.float32)
+    bank.flags.writeable = False
+    return up, down, half_len, bank
+
+def precompute_common_filters():
+    """Precomputes the filter banks for the most common rate pairs."""
+    for original_rate, target_rate in COMMON_RATE_PAIRS:
+        polyphase_filter_bank(original_rate, target_rate)
+
+class StreamingResampler:
+    """
+    Stateful polyphase resampler for audio that arrives in chunks.
+
+    The filter history is kept between calls, so there are no artifacts at chunk
+    seams and the concatenated output equals scipy.signal.resample_poly applied to
+    the whole signal. The output sample count is exact (no per-chunk rounding), so
+    it does not drift over long runs.
+
+    The cost is a fixed delay of half_len / up input samples (~0.6ms at 48kHz);
+    those outputs are emitted when later audio arrives or on flush().
+    """
+    def __init__(self, original_rate, target_rate=16000):
+        self.original_rate = int(original_rate)
+        self.target_rate = int(target_rate)
+        self.up, self.down, self.half_len, self._bank = polyphase_filter_bank(self.original_rate, self.target_rate)
+        self.taps = self._bank.shape[1] if self._bank is not None else 1
+        self._work = np.zeros(0, dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        """Drops the filter history (e.g. after a long gap of unprocessed audio)."""
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self.samples_in = 0
+        self.samples_out = 0
+
+    def expected_output_length(self, num_input_samples):
+        """Exact output length for a given input length (same as resample_poly)."""
+        return -(-num_input_samples * self.up // self.down)
+
+    def process(self, audio_float, out=None):
+        """
+        Resamples the next chunk of the stream.
+        Returns every output sample that can already be computed (float32). If `out`
+        is given and large enough, the result is written into it and a view is returned.
+        """
+        if self.up == self.down:
+            return audio_float
+        return self._process(np.asarray(audio_float, dtype=np.float32), self.samples_in + len(audio_float), out)
+
+    def flush(self, out=None):
+        """
+        Ends the stream: pads with zeros and emits the pending tail samples.
+        After flush the total output is exactly expected_output_length(samples_in).
+        Call reset() before reusing the resampler for a new stream.
+        """
+        if self.up == self.down:
+            return np.zeros(0, dtype=np.float32)
+        real_inputs = self.samples_in
+        limit = self.expected_output_length(real_inputs)
+        padding = np.zeros(self.half_len // self.up + 1, dtype=np.float32)
+        result = self._process(padding, real_inputs + len(padding), out, max_outputs=limit)
+        self.samples_in = real_inputs
+        return result
+
+    def _process(self, chunk, total_inputs, out, max_outputs=None):
+        hist_len = self.taps - 1
+        n = len(chunk)
+
+        # Reused scratch area: [history | new chunk]
+        needed = hist_len + n
+        if len(self._work) < needed:
+            self._work = np.empty(needed, dtype=np.float32)
+        work = self._work[:needed]
+        work[:hist_len] = self._history
+        work[hist_len:] = chunk
+        base = self.samples_in - hist_len # absolute input index of work[0]
+
+        # Outputs m whose last required input sample has already arrived:
+        # (m*down + half_len) // up <= total_inputs - 1
+        end = -(-(total_inputs * self.up - self.half_len) // self.down)
+        if max_outputs is not None:
+            end = min(end, max_outputs)
+        m = np.arange(self.samples_out, max(end, self.samples_out), dtype=np.int64)
+
+        if out is None or len(out) < len(m):
+            out = np.empty(len(m), dtype=np.float32)
+        result = out[:len(m)]
+
+        if len(m):
+            all_windows = np.lib.stride_tricks.sliding_window_view(work, self.taps)
+            t = m * self.down + self.half_len
+            if self.up == 1:
+                # Single phase (e.g. 48k -> 16k): the windows are a strided slice, no copy
+                first = t[0] - hist_len - base
+                np.dot(all_windows[first:first + len(m) * self.down:self.down], self._bank[0], out=result)
+            else:
+                last_input = t // self.up
+                windows = all_windows[last_input - hist_len - base]
+                np.einsum("mk,mk->m", windows, self._bank[t - last_input * self.up], out=result)
+
+        self._history[:] = work[n:]
+        self.samples_in += n
+        self.samples_out += len(m)
+        return result
+
+class AudioPreprocessor:
+    """
+    Fused preprocessing stage for the capture loop.
+
+    Goes from int16 interleaved bytes to mono float32 and RMS/VAD stats in a single
+    pass (int16 view -> channel sum with float32 accumulation -> in-place scale ->
+    dot product for the energy), then to 16kHz through a StreamingResampler.
+    Every intermediate lives in buffers owned by the preprocessor and reused
+    across calls, so the steady state allocates nothing.
+
+    The speech decision is the RMS threshold by default; when a frame-level VAD
+    (audio.vad.FrameVAD) is given, it runs on the mono chunk instead and its smoothed
+    decision is used. Its per-frame output for the last chunk is kept in `last_vad`.
+
+    The arrays returned are views into those buffers and are only valid until the
+    next call; consumers such as RollingAudioBuffer copy them on append.
+    """
+    def __init__(self, target_rate=16000, vad_threshold=0.001, vad=None):
+        self.target_rate = target_rate
+        self.vad_threshold = vad_threshold
+        self.vad = vad
+        self.last_vad = None
+        self.resampler = None
+        self._mono = np.empty(0, dtype=np.float32)
+        self._resampled = np.empty(0, dtype=np.float32)
+        self._frames = 0
+        self._rate = None
+        self._last_speech = False
+
+    def analyze(self, audio_data, sample_rate, channels):
+        """
+        Converts int16 interleaved audio (bytes or array) to normalized mono float32
+        and computes the VAD decision (RMS threshold, or the frame-level VAD if configured).
+        Returns (mono_view, speech_detected, rms).
+        """
+        samples = np.frombuffer(audio_data, dtype=np.int16) if isinstance(audio_data, bytes) else audio_data
+        frames = len(samples) // channels
+
+        if len(self._mono) < frames:
+            self._mono = np.empty(frames, dtype=np.float32)
+        mono = self._mono[:frames]
+
+        if channels > 1:
+            # Sum the channels straight from the int16 view, accumulating in float32
+            np.add.reduce(samples[:frames * channels].reshape(frames, channels), axis=1, dtype=np.float32, out=mono)
+        else:
+            mono[:] = samples
+        mono *= 1.0 / (32768.0 * channels)
+
+        rms = float(np.sqrt(np.dot(mono, mono) / frames)) if frames else 0.0
+        self._frames = frames
+        self._rate = sample_rate
+        if self.vad is None:
+            self._last_speech = rms > self.vad_threshold
+            return mono, self._last_speech, rms
+
+        self.last_vad = self.vad.process(mono, sample_rate)
+        # Chunks shorter than a frame keep the current state
+        speech_detected = bool(self.last_vad.speech.any()) if len(self.last_vad.speech) else self.vad.in_speech
+        return mono, speech_detected, rms
+
+    def resample(self):
+        """
+        Resamples the last analyzed chunk to the target rate, keeping the filter state
+        across calls. Returns a float32 view into the pooled output buffer.
+        """
+        if self.resampler is None or self.resampler.original_rate != self._rate:
+            self.resampler = StreamingResampler(self._rate, self.target_rate)
+
+        mono = self._mono[:self._frames]
+        needed = self.resampler.expected_output_length(self._frames) + 1
+        if len(self._resampled) < needed:
+            self._resampled = np.empty(needed, dtype=np.float32)
+        return self.resampler.process(mono, out=self._resampled)
+
+    def speech_mask(self, num_samples):
+        """
+        Speech decision for each of `num_samples` (e.g. the resampled chunk). With the frame
+        VAD the per-frame decisions of the last chunk are spread evenly over the samples
+        (accurate to about one frame); otherwise the chunk-level decision is returned as a bool.
+        """
+        if self.vad is None:
+            return self._frames > 0 and self._last_speech
+        speech = self.last_vad.speech if self.last_vad is not None else ()
+        if not len(speech):
+            return self.vad.in_speech
+        index = np.arange(num_samples) * len(speech) // max(num_samples, 1)
+        return speech[index]
+
+    def process(self, audio_data, sample_rate, channels):
+        """
+        Full pass: int16 interleaved -> 16kHz mono float32 plus VAD stats.
+        Returns (audio_resampled, speech_detected, rms).
+        """
+        _, speech_detected, rms = self.analyze(audio_data, sample_rate, channels)
+        return self.resample(), speech_detected, rms
+
+    def reset(self):
+        """Resets the resampler history (e.g. after skipping a long silence)."""
+        if self.resampler is not None:
+            self.resampler.reset()
@@ -0,0 +1,227 @@
+import os
+import queue
+import struct
+import threading
+import time
+import wave
+
+import numpy as np
+
+from pipeline.metrics import METRICS
+
+_recorded_seconds = METRICS.counter("recorder_seconds")
+_recorder_drops = METRICS.counter("recorder_chunks_dropped",
+                                  description="Chunks not recorded because the writer queue was full")
+_recorder_segments = METRICS.counter("recorder_segments")
+
+_SPLIT = object() # Queue marker: start a new file at the next chunk
+
+class SegmentedWavRecorder:
+    """
+    Background recording sink for captured int16 PCM.
+
+    `write` only puts the chunk on a bounded queue, so the capture thread never touches the
+    filesystem. A writer thread drains the queue in batches and streams the frames into one
+    open WAV file per segment: a new file is started every `segment_seconds`, when the
+    format changes, or on `split()` (e.g. at the end of every utterance). The WAV header is
+    patched once per segment, when the file is closed, instead of on every write.
+    """
+    def __init__(self, output_dir="recordings", prefix=None, segment_seconds=300.0, max_pending=500,
+                 split_on_utterance=False):
+        """
+        :param prefix: File name prefix (default: session start date/time).
+        :param segment_seconds: Maximum length of each file; None for a single file.
+        :param max_pending: Queue size in chunks (500 x 0.2 s = 100 s of audio); when full, chunks are dropped.
+        :param split_on_utterance: `utterance_ended()` starts a new file (one file per utterance).
+        """
+        self.output_dir = output_dir
+        self.prefix = prefix or time.strftime("session_%Y%m%d_%H%M%S")
+        self.segment_seconds = segment_seconds
+        self.split_on_utterance = split_on_utterance
+        self.files = []
+        self.chunks_dropped = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._wave = None
+        self._format = None
+        self._segment_frames = 0
+        self.thread = None
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name="wav-recorder", daemon=True)
+        self.thread.start()
+        return self
+
+    def write(self, data, sample_rate, channels):
+        """Queues a chunk of int16 interleaved PCM. Never blocks; returns False if it was dropped."""
+        try:
+            self._queue.put_nowait((data, int(sample_rate), int(channels)))
+        except queue.Full:
+            self.chunks_dropped += 1
+            _recorder_drops.inc()
+            return False
+        return True
+
+    def split(self):
+        """Closes the current file; the next chunk starts a new one."""
+        try:
+            self._queue.put_nowait(_SPLIT)
+        except queue.Full:
+            pass # The writer is behind: the segment just gets longer
+
+    def utterance_ended(self):
+        """Called by the pipeline when the segmenter closes an utterance."""
+        if self.split_on_utterance:
+            self.split()
+
+    @property
+    def current_file(self):
+        return self.files[-1] if self.files else None
+
+    def _next_batch(self):
+        items = [self._queue.get()]
+        try:
+            while items[-1] is not None:
+                items.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return items
+
+    def _run(self):
+        while True:
+            items = self._next_batch()
+            pending = []
+            for item in items:
+                if item is None or item is _SPLIT:
+                    self._write_frames(pending)
+                    pending = []
+                    self._close_segment()
+                    if item is None:
+                        return
+                    continue
+                data, sample_rate, channels = item
+                if pending and (sample_rate, channels) != pending[0][1:]:
+                    self._write_frames(pending)
+                    pending = []
+                pending.append(item)
+            self._write_frames(pending)
+
+    def _write_frames(self, chunks):
+        """Writes consecutive chunks of the same format, rolling over to new segments as needed."""
+        if not chunks:
+            return
+        _, sample_rate, channels = chunks[0]
+        frame_bytes = 2 * channels
+        data = b"".join(chunk[0] for chunk in chunks)
+        data = data[:len(data) - len(data) % frame_bytes]
+        _recorded_seconds.inc(len(data) / frame_bytes / sample_rate)
+        while data:
+            if self._wave is None or self._format != (sample_rate, channels):
+                self._open_segment(sample_rate, channels)
+            if self.segment_seconds:
+                room = int(self.segment_seconds * sample_rate) - self._segment_frames
+                if room <= 0:
+                    self._close_segment()
+                    continue
+            else:
+                room = len(data) // frame_bytes
+            part, data = data[:room * frame_bytes], data[room * frame_bytes:]
+            self._wave.writeframesraw(part) # The header is patched on close
+            self._segment_frames += len(part) // frame_bytes
+
+    def _open_segment(self, sample_rate, channels):
+        self._close_segment()
+        path = os.path.join(self.output_dir, f"{self.prefix}_{len(self.files) + 1:04d}.wav")
+        self._wave = wave.open(path, "wb")
+        self._wave.setnchannels(channels)
+        self._wave.setsampwidth(2)
+        self._wave.setframerate(sample_rate)
+        self._format = (sample_rate, channels)
+        self._segment_frames = 0
+        self.files.append(path)
+        _recorder_segments.inc()
+
+    def _close_segment(self):
+        if self._wave is not None:
+            self._wave.close()
+            self._wave = None
+
+    def close(self):
+        """Writes everything still queued and closes the current file."""
+        if self.thread is None:
+            return
+        self._queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+class MappedWavReader:
+    """
+    Memory-mapped view of a 16-bit PCM WAV file.
+
+    Only the header is parsed; `frames` is a read-only np.memmap of shape (frames, channels),
+    so opening is instant regardless of the file size, seeking is an index operation and
+    the OS pages the audio in on demand. Files left without a final header (e.g. a recorder
+    killed mid-segment) are read up to the end of the file.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+            if riff != b"RIFF" or wave_id != b"WAVE":
+                raise ValueError(f"{path} is not a WAV file.")
+            fmt = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    raise ValueError(f"{path} has no data chunk.")
+                chunk_id, chunk_size = struct.unpack("<4sI", header)
+                if chunk_id == b"fmt ":
+                    fmt = struct.unpack("<HHIIHH", f.read(16))
+                    f.seek(chunk_size - 16 + (chunk_size & 1), os.SEEK_CUR)
+                elif chunk_id == b"data":
+                    data_offset = f.tell()
+                    break
+                else:
+                    f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+        if fmt is None:
+            raise ValueError(f"{path} has no fmt chunk.")
+        audio_format, channels, sample_rate, _, _, bits = fmt
+        if audio_format not in (1, 0xFFFE) or bits != 16:
+            raise ValueError("MappedWavReader supports 16-bit PCM only; use FileReplaySource for other formats.")
+
+        available = os.path.getsize(path) - data_offset
+        if chunk_size == 0 or chunk_size > available:
+            chunk_size = available # Header never patched
+        self.sample_rate = sample_rate
+        self.channels = channels
+        num_frames = chunk_size // (2 * channels)
+        if num_frames:
+            self.frames = np.memmap(path, dtype="<i2", mode="r", offset=data_offset, shape=(num_frames, channels))
+        else:
+            self.frames = np.zeros((0, channels), dtype=np.int16)
+
+    @property
+    def num_frames(self):
+        return len(self.frames)
+
+    @property
+    def duration(self):
+        return self.num_frames / self.sample_rate
+
+    def frame_at(self, seconds):
+        return min(max(int(round(seconds * self.sample_rate)), 0), self.num_frames)
+
+    def read(self, start_seconds=0.0, duration=None):
+        """Returns the (frames, channels) view between `start_seconds` and `start_seconds + duration`."""
+        start = self.frame_at(start_seconds)
+        end = self.num_frames if duration is None else self.frame_at(start_seconds + duration)
+        return self.frames[start:end]
+
+    def iter_chunks(self, frames_per_chunk, start_seconds=0.0):
+        """Yields consecutive (frames, channels) views starting at `start_seconds`."""
+        for start in range(self.frame_at(start_seconds), self.num_frames, frames_per_chunk):
+            yield self.frames[start:start + frames_per_chunk]
+
+    def close(self):
+        """Drops the mapping (it is unmapped once no view returned by read() is alive)."""
+        self.frames = np.zeros((0, self.channels), dtype=np.int16)
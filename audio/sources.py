@@ -0,0 +1,357 @@
+import collections
+import os
+import threading
+import time
+import wave
+
+import numpy as np
+import scipy.signal
+
+from audio.recorder import MappedWavReader
+from pipeline.metrics import METRICS
+from pipeline.resources import pin_current_thread
+
+_capture_overruns = METRICS.counter("capture_overruns", description="Chunks dropped because the consumer fell behind")
+_capture_chunks = METRICS.counter("capture_chunks")
+
+class AudioSource:
+    """
+    Base interface for everything that feeds audio into the pipeline.
+
+    Sources run a background thread that appends chunks to `audio_queue` as tuples
+    (audio_data, timestamp, sample_rate, channels), where audio_data is int16
+    interleaved PCM bytes - the same format produced by the WASAPI loopback capture.
+    Subclasses implement `_capture_loop` (and may override `start_capture` to open devices).
+
+    Consumers can poll with `get_latest_chunk`, or block on `drain_chunks(timeout)`, which
+    waits on a condition variable signalled by the producer (no sleep/poll loop).
+
+    An optional `recorder` (audio.recorder.SegmentedWavRecorder) receives every chunk;
+    it only queues it, the files are written by the recorder's own thread.
+
+    `cpu_affinity` (a list of core ids, see pipeline.resources) pins the capture thread.
+    """
+    def __init__(self, buffer_size=50):
+        self.recording = False
+        self.thread = None
+        # Circular buffer using deque with maxlen
+        # Stores tuples: (audio_data, timestamp, sample_rate, channels)
+        self.audio_queue = collections.deque(maxlen=buffer_size)
+        self.chunk_duration = 0.3 # Default chunk duration
+        # Finite sources (files, synthetic scripts) set this once everything was delivered
+        self.finished = False
+        # Signalled whenever a chunk is added or removed, or the source finishes
+        self._chunk_ready = threading.Condition()
+        self.recorder = None
+        self.cpu_affinity = None
+
+    def list_devices(self):
+        """Lists the devices this source can read from. Non-device sources return an empty list."""
+        return []
+
+    def start_capture(self, chunk_duration=1.0):
+        """Starts producing chunks in a background thread."""
+        if self.recording:
+            print("Already recording.")
+            return
+
+        self.chunk_duration = chunk_duration
+        self.finished = False
+        self.recording = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop_capture(self):
+        """Stops the background capture thread."""
+        with self._chunk_ready:
+            self.recording = False
+            self._chunk_ready.notify_all() # Releases a producer blocked on a full buffer
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join()
+        print("Capture stopped.")
+
+    def _run(self):
+        if self.cpu_affinity:
+            pin_current_thread(self.cpu_affinity)
+        try:
+            self._capture_loop()
+        finally:
+            with self._chunk_ready:
+                self.recording = False
+                self._chunk_ready.notify_all()
+
+    def _mark_finished(self):
+        """Called by finite sources once every chunk was delivered; wakes up waiting consumers."""
+        with self._chunk_ready:
+            self.finished = True
+            self._chunk_ready.notify_all()
+
+    def _capture_loop(self):
+        """Internal method that produces chunks until `self.recording` is False."""
+        raise NotImplementedError
+
+    def _push_chunk(self, data, timestamp, sample_rate, channels, block=False):
+        """
+        Adds a chunk to the circular buffer.
+        With block=True the producer waits for free space instead of dropping the oldest
+        chunk (used when replaying files as fast as possible).
+        """
+        with self._chunk_ready:
+            if block:
+                while self.recording and len(self.audio_queue) >= self.audio_queue.maxlen:
+                    # Woken up by the consumer as soon as it takes chunks
+                    self._chunk_ready.wait(0.1)
+            elif len(self.audio_queue) == self.audio_queue.maxlen:
+                # The deque is about to drop the oldest chunk: the consumer fell behind
+                _capture_overruns.inc()
+            _capture_chunks.inc()
+            self.audio_queue.append((data, timestamp, sample_rate, channels))
+            if self.recorder is not None:
+                self.recorder.write(data, sample_rate, channels)
+            self._chunk_ready.notify_all()
+
+    def get_latest_chunk(self):
+        """
+        Retrieves the oldest chunk from the buffer (FIFO).
+        Returns None if buffer is empty.
+        """
+        with self._chunk_ready:
+            try:
+                chunk = self.audio_queue.popleft()
+            except IndexError:
+                return None
+            self._chunk_ready.notify_all()
+            return chunk
+
+    def drain_chunks(self, timeout=None):
+        """
+        Blocks until at least one chunk is available (or the source finished, or `timeout`
+        seconds passed) and returns ALL pending chunks in FIFO order.
+        Returns an empty list on timeout or when a finished source has nothing left.
+        """
+        with self._chunk_ready:
+            if not self.audio_queue:
+                self._chunk_ready.wait_for(lambda: self.audio_queue or self.finished, timeout)
+            chunks = list(self.audio_queue)
+            self.audio_queue.clear()
+            if chunks:
+                self._chunk_ready.notify_all()
+            return chunks
+
+    def get_last_chunk_and_clear(self):
+        """
+        Retrieves the *newest* chunk from the buffer and clears the rest.
+        Returns (chunk, dropped_count).
+        If buffer is empty, returns (None, 0).
+        """
+        with self._chunk_ready:
+            if not self.audio_queue:
+                return None, 0
+
+            dropped = len(self.audio_queue) - 1
+            # Get the last item (newest)
+            item = self.audio_queue[-1]
+            # Clear the queue
+            self.audio_queue.clear()
+            self._chunk_ready.notify_all()
+
+        return item, dropped
+
+    def close(self):
+        self.stop_capture()
+
+class _PacedSource(AudioSource):
+    """
+    Shared pacing logic for sources that generate audio themselves.
+    pacing="realtime" delivers each chunk at the moment it would have been captured;
+    pacing="fast" delivers chunks as fast as the consumer drains them.
+    """
+    PACING_MODES = ("realtime", "fast")
+
+    def __init__(self, sample_rate, channels, pacing="realtime", buffer_size=50):
+        if pacing not in self.PACING_MODES:
+            raise ValueError(f"Unknown pacing '{pacing}'. Use one of {self.PACING_MODES}.")
+        super().__init__(buffer_size=buffer_size)
+        self.sample_rate = int(sample_rate)
+        self.channels = int(channels)
+        self.pacing = pacing
+
+    def _iter_frames(self, frames_per_chunk):
+        """Yields int16 arrays of shape (frames, channels) until the source is exhausted."""
+        raise NotImplementedError
+
+    def _capture_loop(self):
+        frames_per_chunk = max(1, int(self.sample_rate * self.chunk_duration))
+        start_time = time.time()
+        frames_sent = 0
+
+        for frames in self._iter_frames(frames_per_chunk):
+            if not self.recording:
+                return
+            frames_sent += len(frames)
+
+            if self.pacing == "realtime":
+                # Schedule against the absolute start time so the pacing does not drift
+                delay = start_time + frames_sent / self.sample_rate - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+
+            self._push_chunk(
+                np.ascontiguousarray(frames, dtype=np.int16).tobytes(),
+                time.time(),
+                self.sample_rate,
+                self.channels,
+                block=self.pacing == "fast"
+            )
+
+        self._mark_finished()
+
+class FileReplaySource(_PacedSource):
+    """
+    Replays a WAV file, or a headerless raw PCM file (int16 interleaved), as if it
+    were being captured live.
+    For raw files, `sample_rate` and `channels` must be given.
+    16-bit WAV and raw files are memory-mapped (audio.recorder.MappedWavReader / np.memmap),
+    so long recordings open instantly and `start_seconds` seeks without reading the skipped audio.
+    """
+    def __init__(self, path, pacing="realtime", sample_rate=None, channels=None, loop=False, buffer_size=50,
+                 start_seconds=0.0):
+        self.path = path
+        self.loop = loop
+
+        mapped = None
+        if path.lower().endswith(".wav"):
+            try:
+                mapped = MappedWavReader(path)
+            except ValueError:
+                pass # Not 16-bit PCM: decoded in memory below
+        if mapped is not None:
+            sample_rate, channels = mapped.sample_rate, mapped.channels
+            self._pcm = mapped.frames
+        elif path.lower().endswith(".wav"):
+            with wave.open(path, "rb") as wf:
+                sample_rate = wf.getframerate()
+                channels = wf.getnchannels()
+                sample_width = wf.getsampwidth()
+                raw = wf.readframes(wf.getnframes())
+            self._pcm = self._to_int16(raw, sample_width).reshape(-1, channels)
+        else:
+            if sample_rate is None or channels is None:
+                raise ValueError("Raw PCM replay requires sample_rate and channels.")
+            num_frames = os.path.getsize(path) // (2 * channels)
+            self._pcm = np.memmap(path, dtype="<i2", mode="r", shape=(num_frames, channels)) if num_frames \
+                else np.zeros((0, channels), dtype=np.int16)
+
+        super().__init__(sample_rate, channels, pacing=pacing, buffer_size=buffer_size)
+        self.start_frame = min(max(int(start_seconds * self.sample_rate), 0), len(self._pcm))
+
+    @property
+    def pcm(self):
+        """The whole file as an int16 array of shape (frames, channels), memory-mapped when possible."""
+        return self._pcm
+
+    @property
+    def duration(self):
+        """Duration of the file in seconds."""
+        return len(self._pcm) / self.sample_rate
+
+    @staticmethod
+    def _to_int16(raw, sample_width):
+        """Converts 8/16/24/32-bit WAV PCM to int16."""
+        if sample_width == 2:
+            return np.frombuffer(raw, dtype=np.int16)
+        if sample_width == 1:
+            return ((np.frombuffer(raw, dtype=np.uint8).astype(np.int16) - 128) << 8)
+        if sample_width == 3:
+            b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+            # Keep the two most significant bytes of each little-endian 24-bit sample
+            return (b[:, 1].astype(np.uint16) | (b[:, 2].astype(np.uint16) << 8)).view(np.int16)
+        if sample_width == 4:
+            return (np.frombuffer(raw, dtype=np.int32) >> 16).astype(np.int16)
+        raise ValueError(f"Unsupported WAV sample width: {sample_width} bytes")
+
+    def _iter_frames(self, frames_per_chunk):
+        first = self.start_frame
+        while True:
+            for start in range(first, len(self._pcm), frames_per_chunk):
+                yield self._pcm[start:start + frames_per_chunk]
+            if not self.loop:
+                return
+            first = 0
+
+class SyntheticSource(_PacedSource):
+    """
+    Generates test audio from a script of segments, for benchmarks without a sound card.
+
+    `segments` is a list of (kind, duration_seconds) or (kind, duration_seconds, options):
+      - ("tone", 1.0, {"frequency": 440.0, "amplitude": 0.3})
+      - ("speech", 2.0, {"amplitude": 0.3})  -> noise with speech-like spectrum and syllable rhythm
+      - ("silence", 0.5)
+    """
+    def __init__(self, segments=None, sample_rate=48000, channels=2, pacing="realtime",
+                 repeat=1, seed=0, buffer_size=50):
+        super().__init__(sample_rate, channels, pacing=pacing, buffer_size=buffer_size)
+        if segments is None:
+            segments = [("speech", 2.0), ("silence", 1.0), ("tone", 0.5), ("silence", 2.0)]
+        self.segments = segments
+        self.repeat = repeat
+        self.seed = seed
+
+    @property
+    def duration(self):
+        return sum(segment[1] for segment in self.segments) * self.repeat
+
+    def _render_segment(self, kind, num_frames, options, rng):
+        amplitude = options.get("amplitude", 0.3)
+        t = np.arange(num_frames) / self.sample_rate
+
+        if kind == "silence":
+            mono = np.zeros(num_frames)
+        elif kind == "tone":
+            mono = amplitude * np.sin(2 * np.pi * options.get("frequency", 440.0) * t)
+        elif kind == "speech":
+            # Noise shaped by a band-pass in the voice range and modulated at ~4 syllables/s
+            noise = rng.standard_normal(num_frames)
+            nyquist = self.sample_rate / 2
+            b, a = scipy.signal.butter(2, [300 / nyquist, min(3400 / nyquist, 0.99)], btype="band")
+            voiced = scipy.signal.lfilter(b, a, noise)
+            syllables = options.get("syllable_rate", 4.0)
+            envelope = np.clip(np.sin(np.pi * syllables * t), 0, None) ** 2
+            mono = voiced * envelope
+            peak = np.max(np.abs(mono)) or 1.0
+            mono = amplitude * mono / peak
+        else:
+            raise ValueError(f"Unknown synthetic segment kind: '{kind}'")
+
+        return np.repeat((mono * 32767).astype(np.int16)[:, None], self.channels, axis=1)
+
+    def render(self):
+        """Renders the whole script to an int16 array of shape (frames, channels)."""
+        rng = np.random.default_rng(self.seed)
+        parts = []
+        for _ in range(self.repeat):
+            for segment in self.segments:
+                kind, duration = segment[0], segment[1]
+                options = segment[2] if len(segment) > 2 else {}
+                parts.append(self._render_segment(kind, int(duration * self.sample_rate), options, rng))
+        return np.concatenate(parts) if parts else np.zeros((0, self.channels), dtype=np.int16)
+
+    def _iter_frames(self, frames_per_chunk):
+        pcm = self.render()
+        for start in range(0, len(pcm), frames_per_chunk):
+            yield pcm[start:start + frames_per_chunk]
+
+def create_source(kind="loopback", path=None, pacing="realtime", **kwargs):
+    """
+    Builds an audio source by name: "loopback" (WASAPI, Windows only), "file" or "synthetic".
+    """
+    if kind == "loopback":
+        from audio.capture import AudioCapture
+        return AudioCapture(**kwargs)
+    if kind == "file":
+        if not path:
+            raise ValueError("The file source requires a path.")
+        return FileReplaySource(path, pacing=pacing, **kwargs)
+    if kind == "synthetic":
+        return SyntheticSource(pacing=pacing, **kwargs)
+    raise ValueError(f"Unknown audio source '{kind}'. Use 'loopback', 'file' or 'synthetic'.")
@@ -0,0 +1,182 @@
+import collections
+
+import numpy as np
+
+from pipeline.metrics import METRICS
+
+_speech_segments = METRICS.counter("vad_speech_segments")
+
+VADResult = collections.namedtuple("VADResult", ["probabilities", "speech", "events"])
+VADResult.__doc__ = """
+Output of FrameVAD.process for one chunk:
+  - probabilities: float32 array, raw speech probability of each complete frame
+  - speech: bool array, smoothed decision (onset + hangover) of each frame
+  - events: list of ("start" | "end", stream_time_seconds) segment boundaries
+"""
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+class FrameVAD:
+    """
+    Streaming frame-level voice activity detector.
+
+    Audio is cut into fixed frames (10-30 ms; samples left over are carried to the next
+    call) and the features are computed for all frames of a chunk at once:
+      - log energy, compared against an adaptive noise floor (SNR)
+      - zero-crossing rate (broadband hiss crosses zero far more often than voice)
+      - spectral flatness in the voice band (noise is flat, voiced speech is peaky)
+      - energy modulation: spread of the log energy over the last ~0.5 s (speech rises and
+        falls with the syllables, steady music and noise do not)
+    They are combined into a per-frame speech probability. The noise floor follows the
+    frame energy quickly downwards and slowly upwards, so steady background noise stops
+    counting as speech after a couple of seconds while pauses between words pull it back.
+
+    The decision is smoothed by a small state machine: speech starts only after
+    `onset_frames` consecutive speech frames and ends only after `hangover_frames`
+    consecutive non-speech frames, so short pauses do not split an utterance.
+    """
+    def __init__(self, sample_rate=16000, frame_ms=20, threshold=0.5, onset_frames=3, hangover_frames=20,
+                 min_energy_db=-65.0, snr_db=8.0, noise_floor_db=-60.0, floor_rise=0.01, floor_fall=0.5,
+                 max_zcr_per_second=4000.0, flatness_reference=0.4, modulation_db=6.0, modulation_seconds=0.5,
+                 steady_rise_factor=5.0):
+        """
+        :param frame_ms: Frame length; 10-30 ms.
+        :param threshold: Probability above which a frame counts as speech.
+        :param onset_frames: Consecutive speech frames needed to open a segment.
+        :param hangover_frames: Consecutive non-speech frames needed to close a segment.
+        :param min_energy_db: Frames quieter than this are never speech (digital silence).
+        :param snr_db: Energy above the noise floor at which the energy evidence is neutral.
+        :param floor_rise: Per-frame smoothing when the energy is above the floor (slow).
+        :param floor_fall: Per-frame smoothing when the energy is below the floor (fast).
+        :param modulation_db: Energy spread (std, dB) at which the modulation evidence is neutral.
+        :param modulation_seconds: History used to measure the energy spread.
+        :param steady_rise_factor: Multiplies floor_rise while the energy is steady (music, hum, noise).
+        """
+        if not 10 <= frame_ms <= 30:
+            raise ValueError("frame_ms must be between 10 and 30.")
+        self.frame_ms = frame_ms
+        self.threshold = threshold
+        self.onset_frames = onset_frames
+        self.hangover_frames = hangover_frames
+        self.min_energy_db = min_energy_db
+        self.snr_db = snr_db
+        self.initial_noise_floor_db = noise_floor_db
+        self.floor_rise = floor_rise
+        self.floor_fall = floor_fall
+        self.max_zcr_per_second = max_zcr_per_second
+        self.flatness_reference = flatness_reference
+        self.modulation_db = modulation_db
+        self.modulation_seconds = modulation_seconds
+        self.steady_rise_factor = steady_rise_factor
+        self._configure(sample_rate)
+        self.reset()
+
+    def _configure(self, sample_rate):
+        self.sample_rate = int(sample_rate)
+        self.frame_length = int(self.sample_rate * self.frame_ms / 1000)
+        self.frame_seconds = self.frame_length / self.sample_rate
+        self._window = np.hanning(self.frame_length).astype(np.float32)
+        freqs = np.fft.rfftfreq(self.frame_length, 1.0 / self.sample_rate)
+        self._band = (freqs >= 100) & (freqs <= min(4000, self.sample_rate / 2))
+        self._history_frames = max(2, int(round(self.modulation_seconds * 1000 / self.frame_ms)))
+
+    def reset(self):
+        """Forgets the carried samples, the noise floor and the segment state."""
+        self._pending = np.empty(0, dtype=np.float32)
+        self._energy_history = np.empty(0, dtype=np.float64) # Last frames' energy, for the modulation
+        self.noise_floor_db = self.initial_noise_floor_db
+        self.in_speech = False
+        self._run = 0            # Consecutive frames disagreeing with the current state
+        self._frame_index = 0    # Absolute index of the next frame (stream time)
+        self._last_speech_frame = -1
+
+    def features(self, frames):
+        """Vectorized features of a (n_frames, frame_length) array: (energy_db, zcr_per_second, flatness)."""
+        energy_db = 10.0 * np.log10(np.einsum("ij,ij->i", frames, frames) / self.frame_length + 1e-12)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame_seconds
+        power = np.abs(np.fft.rfft(frames * self._window, axis=1))[:, self._band] ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        return energy_db, zcr, flatness
+
+    def _modulation(self, energy_db):
+        """Std of the (gated) log energy over the trailing history, for each frame."""
+        energy_db = np.maximum(energy_db, self.min_energy_db)
+        history = np.concatenate([self._energy_history, energy_db])
+        self._energy_history = history[-(self._history_frames - 1):]
+        missing = self._history_frames - 1 - (len(history) - len(energy_db))
+        if missing > 0:
+            # Stream start: repeat the first frame until there is a full history
+            history = np.concatenate([np.full(missing, history[0]), history])
+        return np.lib.stride_tricks.sliding_window_view(history, self._history_frames).std(axis=1)
+
+    def _probabilities(self, energy_db, zcr, flatness):
+        modulation = self._modulation(energy_db)
+        # The noise floor depends on the previous frame, so this part is sequential (a few frames per chunk).
+        # Steady sounds (low modulation) are absorbed into the floor faster than modulated ones.
+        floors = np.empty_like(energy_db)
+        floor = self.noise_floor_db
+        for i, energy in enumerate(energy_db):
+            floors[i] = floor
+            if energy < floor:
+                rate = self.floor_fall
+            elif modulation[i] < self.modulation_db:
+                rate = self.floor_rise * self.steady_rise_factor
+            else:
+                rate = self.floor_rise
+            floor = max(floor + rate * (energy - floor), self.min_energy_db)
+        self.noise_floor_db = floor
+
+        score = 0.6 * (energy_db - floors - self.snr_db)
+        score += 8.0 * (self.flatness_reference - flatness)
+        score -= np.maximum(zcr - self.max_zcr_per_second, 0.0) / 1000.0
+        score += 0.3 * (modulation - self.modulation_db)
+        probabilities = _sigmoid(score).astype(np.float32)
+        probabilities[energy_db < self.min_energy_db] = 0.0
+        return probabilities
+
+    def process(self, audio, sample_rate=None):
+        """
+        Runs the VAD over a chunk of mono float32 audio.
+        Returns a VADResult with one entry per complete frame (may be empty for tiny chunks).
+        """
+        if sample_rate is not None and int(sample_rate) != self.sample_rate:
+            self._configure(sample_rate)
+            self.reset()
+
+        audio = np.asarray(audio, dtype=np.float32)
+        if len(self._pending):
+            audio = np.concatenate([self._pending, audio])
+        n_frames = len(audio) // self.frame_length
+        self._pending = audio[n_frames * self.frame_length:].copy()
+        if n_frames == 0:
+            return VADResult(np.empty(0, dtype=np.float32), np.empty(0, dtype=bool), [])
+
+        frames = audio[:n_frames * self.frame_length].reshape(n_frames, self.frame_length)
+        probabilities = self._probabilities(*self.features(frames))
+
+        speech = np.empty(n_frames, dtype=bool)
+        events = []
+        for i, probability in enumerate(probabilities):
+            frame_index = self._frame_index + i
+            is_speech_frame = probability >= self.threshold
+            if is_speech_frame:
+                self._last_speech_frame = frame_index
+            if is_speech_frame != self.in_speech:
+                self._run += 1
+                if not self.in_speech and self._run >= self.onset_frames:
+                    self.in_speech = True
+                    self._run = 0
+                    # The segment starts at the first frame of the onset run
+                    events.append(("start", (frame_index - self.onset_frames + 1) * self.frame_seconds))
+                elif self.in_speech and self._run >= self.hangover_frames:
+                    self.in_speech = False
+                    self._run = 0
+                    events.append(("end", (self._last_speech_frame + 1) * self.frame_seconds))
+            else:
+                self._run = 0
+            speech[i] = self.in_speech
+        self._frame_index += n_frames
+        _speech_segments.inc(sum(1 for kind, _ in events if kind == "start"))
+        return VADResult(probabilities, speech, events)
@@ -1,62 +1,262 @@
-from audio.capture import AudioCapture
+from pipeline.startup import STARTUP, load_models
+from audio.sources import create_source
+import argparse
+import os
 import time
 import threading
-import queue
-from speech.whisper_engine import WhisperTranscriber
+from functools import partial
 
-from audio.preprocess import convert_to_float32, to_mono, resample_audio, is_speech
+from audio.preprocess import AudioPreprocessor, precompute_common_filters
+from audio.vad import FrameVAD
 from pipeline.rolling_buffer import RollingAudioBuffer
+from pipeline.adaptive import AdaptiveRateController
+from pipeline.segmenter import UtteranceSegmenter
 from overlay.subtitle_window import SubtitleOverlay
-from translation.translator import TranslationEngine
+from pipeline.metrics import METRICS, JSONLExporter, MetricsServer
+from pipeline.mailbox import CONTROL, WHOLE_STRETCH, LatestMailbox
+from pipeline.autotune import DEFAULT_PROFILE_PATH
 
-def stt_worker_loop(stt_queue: queue.Queue, overlay: SubtitleOverlay):
+# Instrumentos de métricas (no-op enquanto METRICS estiver desabilitado)
+_MS_BUCKETS = (10, 25, 50, 100, 200, 300, 500, 750, 1000, 2000, 5000)
+_stt_rtf = METRICS.histogram("stt_real_time_factor", (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0),
+                             description="Tempo de transcrição / duração da janela")
+_stt_ms = METRICS.histogram("stt_ms", _MS_BUCKETS)
+_translation_ms = METRICS.histogram("translation_ms", _MS_BUCKETS)
+_queue_depth = METRICS.gauge("stt_queue_depth")
+_windows_emitted = METRICS.counter("stt_windows_emitted")
+_windows_dropped = METRICS.counter("stt_windows_dropped")
+_vad_speech_seconds = METRICS.counter("vad_speech_seconds")
+_vad_total_seconds = METRICS.counter("vad_total_seconds")
+_vad_duty_cycle = METRICS.gauge("vad_duty_cycle", description="Fração do áudio classificada como fala")
+
+_final_utterances = METRICS.counter("stt_final_utterances")
+
+def _print_subtitle(language, text):
+    """Sink dos idiomas adicionais (o idioma principal vai para o overlay)."""
+    print(f"[{language.upper()}] {text}")
+
+# Beam search só na decodificação final de cada enunciado (as parciais continuam gulosas)
+FINAL_BEAM_SIZE = 5
+# Com segmentação, por quanto tempo de silêncio a legenda final continua na tela
+SUBTITLE_HOLD_SECONDS = 4.0
+
+def _process_final(final_item, overlay, transcriber, translator, streamer, tracer, transcript=None, language="pt"):
+    """Decodificação e tradução finais de um enunciado fechado pelo segmentador."""
+    utterance, capture_latency_ms, meta = final_item
+    meta["dequeued"] = time.time()
+    text, processing_time_ms = transcriber.transcribe(utterance, language="en", beam_size=FINAL_BEAM_SIZE)
+    meta["transcribed"] = time.time()
+    _stt_ms.observe(processing_time_ms)
+    _final_utterances.inc()
+
+    # O próximo enunciado começa do zero (sem delta contra o texto deste)
+    translator.clear_state()
+    if streamer is not None:
+        streamer.reset()
+    if not text:
+        return
+
+    translated_text, trans_time_ms = translator.translate(text)
+    meta["translated"] = time.time()
+    _translation_ms.observe(trans_time_ms)
+    print(f"\n[EN final] {text}")
+    print(f"[{language.upper()} final] {translated_text} ({len(utterance) / 16000:.1f}s | W:{processing_time_ms:.0f}ms | T:{trans_time_ms:.0f}ms)")
+    overlay.update_text(translated_text)
+    meta["displayed"] = time.time()
+    STARTUP.first_subtitle()
+    if transcript is not None:
+        transcript.add(text, translated_text, meta["captured"] - len(utterance) / 16000, meta["captured"])
+    if tracer is not None:
+        tracer.record("final_stt", (meta["transcribed"] - meta["dequeued"]) * 1000)
+        tracer.record("final_end_to_end", (meta["displayed"] - meta["captured"]) * 1000)
+
+def _load_transcriber(model_options=None, resources=None):
+    from speech.whisper_engine import WhisperTranscriber
+    if resources is not None:
+        resources.pin("stt") # As threads do CTranslate2 são criadas junto com o modelo
+    # model_name: tiny, base, small, medium, large
+    return WhisperTranscriber(**(model_options or {"model_name": "base"}))
+
+def _load_translator(target_languages=("pt",), translation_cache_path=None, translation_options=None, resources=None):
+    if resources is not None:
+        resources.pin("translation")
+    if len(target_languages) == 1:
+        from translation.translator import TranslationEngine
+        return TranslationEngine(to_code=target_languages[0], cache_path=translation_cache_path,
+                                 **(translation_options or {}))
+    # Um único STT alimentando vários idiomas (delta compartilhado, engines em paralelo)
+    from translation.cache import TranslationCache
+    from translation.fanout import TranslationFanout
+    cache = TranslationCache(max_entries=1024 * len(target_languages), path=translation_cache_path)
+    sinks = {code: _print_subtitle for code in target_languages[1:]}
+    return TranslationFanout.from_codes("en", target_languages, sinks=sinks, cache=cache, **(translation_options or {}))
+
+def stt_worker_loop(mailbox: LatestMailbox, overlay: SubtitleOverlay, transcriber=None, translator=None, tracer=None,
+                    streaming=False, translation_cache_path=None, rate_controller=None, segmented=False,
+                    target_languages=("pt",), transcript=None, model_options=None, resources=None):
     """
     Background worker that runs the heavy STT and Translation models.
-    It reads audio windows from the queue and updates the UI overlay.
+    It reads audio windows from the mailbox (pipeline.mailbox) and updates the UI overlay.
+    Transcriber/translator can be injected (e.g. stubs in pipeline.benchmark);
+    `tracer` (pipeline.latency.LatencyTracer) receives the per-stage timings.
+    With streaming=True, only the uncommitted audio is decoded (speech.streaming) and
+    only newly committed text is translated.
+    `rate_controller` (pipeline.adaptive.AdaptiveRateController) receives the time spent per window.
+    Clear signals and the utterances closed by the segmenter (pipeline.segmenter) arrive on the
+    mailbox's control lane: they are never dropped and are processed before any pending window.
+    With `segmented=True`, only those final results go to the transcript.
+    With several `target_languages`, one transcription feeds a TranslationFanout: the first
+    language goes to the overlay, the others are printed to the console.
+    `transcript` (pipeline.transcript.TranscriptSink) receives every displayed segment; the
+    files are written by its own thread, never by this one.
+    `model_options` are the WhisperTranscriber arguments (see resolve_settings / pipeline.autotune).
+    `resources` (pipeline.resources.ResourcePlan) sets the translation thread budget and, when it
+    pins threads, keeps this worker and the model threads on the STT/translation cores.
     """
     print("\n[Worker] Initializing models in background thread...")
-    # Initialize Transcriber
-    transcriber = WhisperTranscriber(model_name="base") # tiny, base, small, medium, large
-    translator = TranslationEngine()
+    if resources is not None:
+        resources.pin("stt")
+    translation_options = resources.translation_options(len(target_languages)) if resources is not None else {}
+    # Modelos não injetados são carregados em paralelo (com warm-up), ver pipeline.startup
+    factories = {}
+    if transcriber is None:
+        factories["transcriber"] = partial(_load_transcriber, model_options, resources)
+    if translator is None:
+        factories["translator"] = partial(_load_translator, target_languages, translation_cache_path,
+                                          translation_options, resources)
+    models = load_models(factories)
+    transcriber = models.get("transcriber", transcriber)
+    translator = models.get("translator", translator)
+    streamer = None
+    if streaming:
+        from speech.streaming import StreamingTranscriber
+        streamer = StreamingTranscriber(transcriber, language="en")
     print("[Worker] Ready for transcription.")
     
     while True:
-        # Wait for a chunk to process
-        item = stt_queue.get()
-        if item is None:
-            # Break signal
+        # Wait for a window; control messages (clear, final utterances) come before the pending window
+        delivery = mailbox.get()
+        if delivery is None:
+            # Mailbox closed and drained
+            if hasattr(translator, "close"):
+                translator.close()
             break
-            
-        window_to_transcribe, capture_latency_ms, is_clear_signal = item
-        
-        if is_clear_signal:
-            translator.clear_state()
-            overlay.update_text("") # Limpa a legenda na tela
-            stt_queue.task_done()
+
+        if delivery.kind == CONTROL:
+            kind, payload = delivery.value
+            if kind == "final":
+                _process_final(payload, overlay, transcriber, translator, streamer, tracer, transcript, target_languages[0])
+            else: # "clear"
+                translator.clear_state()
+                if streamer is not None:
+                    streamer.reset()
+                overlay.update_text("") # Limpa a legenda na tela
             continue
+
+        window_to_transcribe, capture_latency_ms, meta = delivery.value
+        meta["dequeued"] = time.time()
             
         # Transcribe
-        text, processing_time_ms = transcriber.transcribe(window_to_transcribe, language="en")
+        tentative = ""
+        if streamer is not None:
+            # Só o áudio ainda não confirmado é decodificado; `text` contém apenas palavras novas
+            streamer.insert_window(window_to_transcribe, meta["end_sample"])
+            decoded_seconds = streamer.buffer_seconds
+            text, tentative, processing_time_ms = streamer.process_iter()
+        else:
+            decoded_seconds = len(window_to_transcribe) / 16000
+            text, processing_time_ms = transcriber.transcribe(window_to_transcribe, language="en")
+        
+        meta["transcribed"] = time.time()
+        _stt_ms.observe(processing_time_ms)
+        if decoded_seconds:
+            _stt_rtf.observe(processing_time_ms / 1000 / decoded_seconds)
         
         if text:
-            translated_text, trans_time_ms = translator.incremental_translate(text)
+            if streamer is not None:
+                translated_text, trans_time_ms = translator.translate(text)
+            else:
+                translated_text, trans_time_ms = translator.incremental_translate(text)
+            meta["translated"] = time.time()
+            _translation_ms.observe(trans_time_ms)
             if translated_text:
-                print(f"\n[EN] {text}")
-                print(f"[PT] {translated_text} (W:{processing_time_ms:.0f}ms | T:{trans_time_ms:.0f}ms | Latency:{capture_latency_ms:.0f}ms)")
+                print(f"\n[EN] {text}" + (f" ~{tentative}" if tentative else ""))
+                print(f"[{target_languages[0].upper()}] {translated_text} (W:{processing_time_ms:.0f}ms | T:{trans_time_ms:.0f}ms | Latency:{capture_latency_ms:.0f}ms)")
                 overlay.update_text(translated_text) # Atualiza a legenda na tela
+                meta["displayed"] = time.time()
+                STARTUP.first_subtitle()
+                if transcript is not None and not segmented:
+                    # Com segmentação, só o resultado final de cada enunciado vai para o histórico
+                    transcript.add_incremental(text, translated_text, meta["captured"], decoded_seconds)
         else:
             print(".", end="", flush=True) # visual feedback for silence/no text
-            
-        stt_queue.task_done()
+        
+        if tracer is not None:
+            tracer.record_window(meta)
+        if rate_controller is not None:
+            rate_controller.window_processed(time.time() - meta["dequeued"], len(window_to_transcribe) / 16000)
+
+def _submit_final(mailbox, utterances, capture_latency_ms, meta):
+    """
+    Queues closed utterances on the mailbox's control lane (never dropped). Returns how many.
+    The pending partial window belongs to the utterance just closed, whose final decode covers
+    all of its audio: it is discarded without counting as untranscribed audio.
+    """
+    utterances = [u for u in utterances if u is not None]
+    for utterance in utterances:
+        mailbox.send(("final", (utterance, capture_latency_ms, dict(meta))), discard_pending=True, span=WHOLE_STRETCH)
+    return len(utterances)
 
-def audio_processing_loop(overlay: SubtitleOverlay):
-    capturer = AudioCapture()
-    # Queue size 1 means we only keep the absolute freshest window to transcribe
-    # If a new window arrives while whisper is busy, we will overwrite the old pending one.
-    stt_queue = queue.Queue(maxsize=1)
+def _window_lost(tracer=None, rate_controller=None):
+    """Callback do mailbox para janelas substituídas ou vencidas antes de serem transcritas."""
+    def lost(reason, item):
+        _windows_dropped.inc()
+        if tracer is not None:
+            tracer.window_dropped()
+        if rate_controller is not None:
+            rate_controller.window_dropped()
+    return lost
+
+def audio_processing_loop(overlay: SubtitleOverlay, capturer=None, transcriber=None, translator=None, tracer=None,
+                          window_size=1.5, update_rate=0.2, streaming=False, translation_cache_path=None,
+                          target_languages=("pt",), transcript=None,
+                          adaptive=False, max_update_rate=1.5, min_window_size=1.0, vad="frame", segment=False,
+                          max_utterance_seconds=15.0, recorder=None, model_options=None, resources=None,
+                          max_window_age=None, mailbox=None):
+    # Fonte de áudio plugável: loopback WASAPI por padrão, ou arquivo/sintética (audio.sources)
+    if capturer is None:
+        capturer = create_source("loopback")
+    # Captura e pré-processamento ficam nos núcleos reservados, longe das threads dos modelos
+    if resources is not None and resources.pin_threads:
+        resources.pin("capture")
+        capturer.cpu_affinity = resources.cores["capture"]
+    # Gravação da sessão (audio.recorder): a captura só enfileira os chunks, o gravador escreve os arquivos
+    if recorder is not None:
+        capturer.recorder = recorder
+    # Com segment=True, cada enunciado fechado pelo VAD vai pela fila de controle do mailbox (decodificação final)
+    segmenter = UtteranceSegmenter(max_utterance_seconds=max_utterance_seconds) if segment else None
+    
+    # Inicia o rolling buffer (janela: 1.5s, update: 0.2s) - reduced update for lower latency
+    rolling_buffer = RollingAudioBuffer(window_size=window_size, update_rate=update_rate, sample_rate=16000)
+    # Com adaptive=True, update_rate/window_size seguem a velocidade medida do STT (pipeline.adaptive)
+    rate_controller = None
+    if adaptive:
+        rate_controller = AdaptiveRateController(rolling_buffer, min_update_rate=update_rate,
+                                                 max_update_rate=max_update_rate, min_window_size=min_window_size)
+
+    # The mailbox only keeps the freshest window to transcribe: if a new window arrives while
+    # whisper is busy, it supersedes the pending one; windows older than `max_window_age` are skipped
+    if mailbox is None:
+        mailbox = LatestMailbox(max_age=max_window_age, metrics_prefix="stt_mailbox")
+    mailbox.on_drop = _window_lost(tracer, rate_controller)
     
     # Start the background worker thread
-    worker_thread = threading.Thread(target=stt_worker_loop, args=(stt_queue, overlay), daemon=True)
+    worker_thread = threading.Thread(
+        target=stt_worker_loop,
+        args=(mailbox, overlay, transcriber, translator, tracer, streaming, translation_cache_path, rate_controller,
+              segment, target_languages, transcript, model_options, resources),
+        daemon=True
+    )
     worker_thread.start()
     
     try:
@@ -66,8 +266,11 @@ def audio_processing_loop(overlay: SubtitleOverlay):
         
         print("\nStarting capture (Press Ctrl+C to stop)...")
         
-        # Inicia o rolling buffer (janela: 1.5s, update: 0.2s) - reduced update for lower latency
-        rolling_buffer = RollingAudioBuffer(window_size=1.5, update_rate=0.2, sample_rate=16000)
+        # Pré-processamento fundido (int16 -> mono float32 + VAD -> 16kHz) com buffers reutilizados
+        # VAD por frames (energia/ZCR/planicidade + piso de ruído + hangover) ou o limiar de RMS antigo
+        precompute_common_filters()
+        preprocessor = AudioPreprocessor(target_rate=16000, vad_threshold=0.001,
+                                         vad=FrameVAD() if vad == "frame" else None)
         
         # Reduced chunk duration to 0.2s for lower baseline latency
         capturer.start_capture(chunk_duration=0.2) 
@@ -75,18 +278,21 @@ def audio_processing_loop(overlay: SubtitleOverlay):
         silence_duration = 0.0
         
         while True:
-            # Puxa TODOS os pedaços acumulados na fila para evitar atrasos (latência)
-            chunks = []
-            while True:
-                c = capturer.get_latest_chunk()
-                if c:
-                    chunks.append(c)
-                else:
-                    break
+            # Espera (sem polling) até a captura entregar áudio e puxa TODOS os pedaços acumulados
+            # na fila de uma vez para evitar atrasos (latência)
+            chunks = capturer.drain_chunks(timeout=0.5)
             
             if not chunks:
-                # Sleep briefly to avoid busy loop se a fila estiver vazia
-                time.sleep(0.01)
+                # Fontes finitas (arquivo/sintética) terminam quando todo o áudio foi entregue
+                if capturer.finished:
+                    print("\nAudio source finished.")
+                    if segmenter is not None:
+                        meta = {"captured": time.time(), "drained": time.time(), "enqueued": time.time()}
+                        _submit_final(mailbox, [segmenter.flush()], 0, meta)
+                    mailbox.close() # The worker drains what is left and stops
+                    worker_thread.join()
+                    overlay.close()
+                    break
                 continue
             
             # Processa todos os pedaços capturados de uma vez
@@ -101,80 +307,414 @@ def audio_processing_loop(overlay: SubtitleOverlay):
             current_time = time.time()
             capture_latency_ms = (current_time - latest_timestamp) * 1000
             
-            # Preprocessing
-            audio_float = convert_to_float32(combined_data)
-            audio_mono = to_mono(audio_float, channels)
-            
-            # VAD Check no bloco de áudio atual para medir o tempo de silêncio
-            speech_detected, rms_val = is_speech(audio_mono, threshold=0.001)
+            # Preprocessing + VAD Check no bloco de áudio atual para medir o tempo de silêncio
+            audio_mono, speech_detected, rms_val = preprocessor.analyze(combined_data, rate, channels)
             
             chunk_duration_sec = len(audio_mono) / rate
             
+            if METRICS.enabled:
+                _vad_total_seconds.inc(chunk_duration_sec)
+                if speech_detected:
+                    _vad_speech_seconds.inc(chunk_duration_sec)
+                _vad_duty_cycle.set(_vad_speech_seconds.value / _vad_total_seconds.value)
+            
             if not speech_detected:
                 silence_duration += chunk_duration_sec
                 
+                if segmenter is not None and segmenter.in_utterance:
+                    # Fim da fala (VAD + hangover): fecha o enunciado e o envia para a decodificação final
+                    meta = {"captured": latest_timestamp, "drained": current_time, "enqueued": time.time()}
+                    if _submit_final(mailbox, [segmenter.flush()], capture_latency_ms, meta) and recorder is not None:
+                        recorder.utterance_ended()
+                    rolling_buffer.clear()
+                    preprocessor.reset()
+                
                 # Só limpa o buffer se o silêncio durar mais de 1.5 segundos.
-                if silence_duration > 1.5:
+                # Com segmentação a legenda final fica na tela por SUBTITLE_HOLD_SECONDS.
+                if silence_duration > (SUBTITLE_HOLD_SECONDS if segmenter is not None else 1.5):
                     rolling_buffer.clear()
+                    # O áudio do silêncio não é reamostrado, então o histórico do filtro fica velho
+                    preprocessor.reset()
                     
-                    # Push a clear signal to the queue, replacing any pending transcription
-                    try:
-                        if stt_queue.full():
-                            stt_queue.get_nowait()
-                        stt_queue.put_nowait((None, 0, True))
-                    except (queue.Empty, queue.Full):
-                        pass
+                    # Clear signal on the control lane, discarding any pending transcription
+                    mailbox.send(("clear", None), discard_pending=True)
 
                     print(".", end="", flush=True)
                     continue 
+                if segmenter is not None:
+                    continue # Entre enunciados não há decodificações parciais
             else:
                 silence_duration = 0.0
                 
-            audio_resampled = resample_audio(audio_mono, rate, 16000)
+            audio_resampled = preprocessor.resample()
+            
+            if segmenter is not None:
+                # Um chunk acumulado pode conter fim de fala (máscara por amostra do VAD) e monólogos
+                # longos são cortados no limite de duração
+                finished = segmenter.push(audio_resampled, preprocessor.speech_mask(len(audio_resampled)))
+                if finished:
+                    meta = {"captured": latest_timestamp, "drained": current_time, "enqueued": time.time()}
+                    _submit_final(mailbox, finished, capture_latency_ms, meta)
+                    rolling_buffer.clear()
+                    if recorder is not None:
+                        recorder.utterance_ended()
 
             # Adiciona ao buffer contínuo
             window_to_transcribe = rolling_buffer.append(audio_resampled)
             
             if window_to_transcribe is not None:
-                # Put the latest window to be transcribed in the queue.
-                # If the worker is still busy from a previous window, drop the old one and keep the latest.
-                item = (window_to_transcribe, capture_latency_ms, False)
-                try:
-                    if stt_queue.full():
-                        stt_queue.get_nowait() # Remove old
-                    stt_queue.put_nowait(item) # Set new
-                except (queue.Empty, queue.Full):
-                    pass
-            
-            # Sleep briefly to avoid busy loop
-            time.sleep(0.01)
+                # Post the latest window to be transcribed to the mailbox.
+                # If the worker is still busy from a previous window, the new one supersedes the pending one.
+                # Metadados da janela: timestamps por estágio e a posição absoluta do fim da janela
+                meta = {"captured": latest_timestamp, "drained": current_time, "enqueued": time.time(),
+                        "end_sample": rolling_buffer.total_samples}
+                _windows_emitted.inc()
+                if tracer is not None:
+                    tracer.window_emitted()
+                # Intervalo de áudio da janela (s), para contar o áudio de janelas perdidas
+                window_end = meta["end_sample"] / 16000
+                # A janela é uma view do ring buffer: copia antes de entregá-la ao worker, que pode
+                # segurá-la (pendente na caixa ou numa decodificação longa) além da validade da view
+                mailbox.post((window_to_transcribe.copy(), capture_latency_ms, meta), timestamp=latest_timestamp,
+                             span=(window_end - len(window_to_transcribe) / 16000, window_end))
+                _queue_depth.set(mailbox.depth)
+                if rate_controller is not None:
+                    rate_controller.update()
 
     except KeyboardInterrupt:
         print("\nStopping capture...")
-        stt_queue.put(None) # Signal worker to stop
+        mailbox.close() # Signal worker to stop
         overlay.close()
     except Exception as e:
         print(f"\nError in audio processing loop: {e}")
-        stt_queue.put(None)
+        mailbox.close()
         overlay.close()
     finally:
         capturer.close()
 
+def multistream_processing_loop(overlay: SubtitleOverlay, sources, transcriber=None, translator=None,
+                                window_size=1.5, update_rate=0.2, target_languages=("pt",),
+                                translation_cache_path=None, model_options=None, resources=None):
+    """
+    Legenda várias fontes ao mesmo tempo com um único modelo Whisper (speech.multistream):
+    `sources` é {rótulo: AudioSource}; cada fonte tem sua thread de captura/VAD/buffer
+    (feed_source) e uma linha própria no overlay, e as janelas de todas são decodificadas
+    em lote pelo MultiStreamEngine.
+    """
+    from speech.multistream import MultiStreamEngine, StreamOverlayLines, feed_source
+
+    print("\n[Multistream] Carregando modelos...")
+    if resources is not None:
+        resources.pin("stt")
+    translation_options = resources.translation_options(len(target_languages)) if resources is not None else {}
+    factories = {}
+    if transcriber is None:
+        factories["transcriber"] = partial(_load_transcriber, model_options, resources)
+    if translator is None:
+        factories["translator"] = partial(_load_translator, target_languages, translation_cache_path,
+                                          translation_options, resources)
+    models = load_models(factories)
+    transcriber = models.get("transcriber", transcriber)
+    translator = models.get("translator", translator)
+
+    def on_result(session, text, translation, processing_time_ms):
+        if translation:
+            print(f"[{session.stream_id}] {translation} (W:{processing_time_ms:.0f}ms)")
+            STARTUP.first_subtitle()
+
+    engine = MultiStreamEngine(transcriber, translator, on_result=on_result).start()
+    lines = StreamOverlayLines(overlay)
+    threads = []
+    for label, source in sources.items():
+        engine.add_stream(label, overlay=lines.line(label))
+        if resources is not None and resources.pin_threads:
+            source.cpu_affinity = resources.cores["capture"]
+        thread = threading.Thread(target=feed_source, args=(engine, label, source, window_size, update_rate),
+                                  daemon=True)
+        thread.start()
+        threads.append(thread)
+    print(f"[Multistream] Legendando {len(sources)} fontes: {', '.join(sources)}")
+    try:
+        for thread in threads:
+            thread.join()
+    except Exception as e:
+        print(f"\nError in multi-stream loop: {e}")
+    finally:
+        engine.close()
+        if hasattr(translator, "close"):
+            translator.close()
+
+def parse_stream_spec(value):
+    """Fonte de --stream: "loopback", "synthetic" ou "file:<caminho>". Retorna (tipo, caminho)."""
+    kind, _, path = value.partition(":")
+    if kind in ("loopback", "synthetic") and not path:
+        return kind, None
+    if kind == "file" and path:
+        return kind, path
+    raise argparse.ArgumentTypeError(f"fonte inválida '{value}' (use loopback, synthetic ou file:<caminho>)")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Transcrição e tradução em tempo real do áudio do sistema.")
+    parser.add_argument("--source", choices=["loopback", "file", "synthetic"], default="loopback",
+                        help="Origem do áudio (padrão: loopback WASAPI)")
+    parser.add_argument("--file", help="Arquivo WAV ou PCM bruto (int16) para --source file")
+    parser.add_argument("--stream", action="append", type=parse_stream_spec, metavar="FONTE",
+                        help="Legenda várias fontes com um único modelo Whisper (decodificação em lote); repita a "
+                             "opção para cada fonte: loopback, synthetic ou file:<caminho>. Substitui --source")
+    parser.add_argument("--pacing", choices=["realtime", "fast"], default="realtime",
+                        help="Ritmo de reprodução de fontes de arquivo/sintéticas")
+    parser.add_argument("--raw-rate", type=int, help="Taxa de amostragem de arquivos PCM brutos")
+    parser.add_argument("--raw-channels", type=int, help="Número de canais de arquivos PCM brutos")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Transcrição em streaming: confirma palavras estáveis e decodifica só o áudio novo")
+    parser.add_argument("--vad", choices=["frame", "energy"], default="frame",
+                        help="VAD por frames com piso de ruído adaptativo (padrão) ou limiar fixo de RMS")
+    parser.add_argument("--segment", action=argparse.BooleanOptionalAction, default=True,
+                        help="Fecha enunciados nos pontos finais do VAD e faz uma decodificação/tradução final (padrão: ligado)")
+    parser.add_argument("--max-utterance", type=float, default=15.0,
+                        help="Duração máxima (s) de um enunciado antes do corte forçado")
+    parser.add_argument("--adaptive", action=argparse.BooleanOptionalAction, default=True,
+                        help="Ajusta janela/taxa de atualização conforme a velocidade medida do STT (padrão: ligado)")
+    parser.add_argument("--max-update-rate", type=float, default=1.5,
+                        help="Maior intervalo (s) entre janelas que o controle adaptativo pode usar")
+    parser.add_argument("--min-window", type=float, default=1.0,
+                        help="Menor janela (s) que o controle adaptativo pode usar")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE_PATH,
+                        help="Perfil gerado por 'python -m pipeline.autotune' (ignorado se não existir; '' desativa)")
+    parser.add_argument("--model", help="Modelo Whisper (tiny, base, small...); padrão: perfil ou 'base'")
+    parser.add_argument("--compute-type", help="Compute type do CTranslate2 (int8, int8_float32, float32...)")
+    parser.add_argument("--cpu-threads", type=int, help="Threads do CTranslate2 por decodificação")
+    parser.add_argument("--window", type=float, help="Tamanho da janela deslizante (s); padrão: perfil ou 1.5")
+    parser.add_argument("--update-rate", type=float, help="Intervalo (s) entre janelas; padrão: perfil ou 0.2")
+    parser.add_argument("--max-window-age", type=float, default=3.0,
+                        help="Janelas capturadas há mais de N segundos quando o STT chega a elas são puladas "
+                             "(0 desliga o prazo)")
+    parser.add_argument("--cpu-budget", type=int,
+                        help="Quantos núcleos o pipeline usa no total (padrão: todos os disponíveis)")
+    parser.add_argument("--reserved-cores", type=int, default=1,
+                        help="Núcleos reservados para captura, pré-processamento e UI")
+    parser.add_argument("--translation-threads", type=int,
+                        help="Threads do CTranslate2 da tradução (padrão: 1/3 dos núcleos fora da captura)")
+    parser.add_argument("--pin-threads", action="store_true",
+                        help="Fixa captura/UI, STT e tradução nos seus núcleos (afinidade de CPU)")
+    parser.add_argument("--stt-process", action="store_true",
+                        help="Roda o Whisper em um processo separado (janelas via memória compartilhada)")
+    parser.add_argument("--stt-process-translation", action="store_true",
+                        help="Com --stt-process, roda também a tradução no processo do STT")
+    parser.add_argument("--languages", type=lambda value: tuple(code.strip() for code in value.split(",") if code.strip()),
+                        default=("pt",),
+                        help="Idiomas de destino separados por vírgula (ex: pt,es,fr); o primeiro vai para o overlay")
+    parser.add_argument("--translation-cache", help="Arquivo JSON para persistir o cache de traduções entre execuções")
+    parser.add_argument("--transcript-dir", help="Grava o histórico da sessão (JSONL/SRT/VTT) nesta pasta")
+    parser.add_argument("--transcript-formats", default="jsonl,srt,vtt",
+                        help="Formatos do histórico separados por vírgula (jsonl, srt, vtt)")
+    parser.add_argument("--transcript-max-mb", type=float, help="Rotaciona os arquivos do histórico a cada N MB")
+    parser.add_argument("--transcript-max-minutes", type=float, help="Rotaciona os arquivos do histórico a cada N minutos")
+    parser.add_argument("--record", metavar="DIR", help="Grava o áudio capturado em arquivos WAV nesta pasta")
+    parser.add_argument("--record-segment-minutes", type=float, default=5.0,
+                        help="Duração máxima de cada arquivo da gravação (minutos)")
+    parser.add_argument("--record-per-utterance", action="store_true",
+                        help="Com --segment, começa um arquivo novo a cada enunciado")
+    parser.add_argument("--metrics-jsonl", help="Grava snapshots periódicos das métricas neste arquivo JSONL")
+    parser.add_argument("--metrics-interval", type=float, default=5.0, help="Intervalo (s) entre snapshots JSONL")
+    parser.add_argument("--metrics-port", type=int, help="Expõe as métricas em http://127.0.0.1:<porta>/metrics")
+    args = parser.parse_args(argv)
+    if (args.raw_rate is None) != (args.raw_channels is None):
+        # Um PCM bruto não tem cabeçalho: sem os dois valores o formato seria adivinhado
+        parser.error("--raw-rate e --raw-channels devem ser passados juntos")
+    if args.stream and (args.transcript_dir or args.record):
+        # O histórico e a gravação seguem uma única fonte (stt_worker_loop / audio_processing_loop)
+        parser.error("--stream não pode ser combinado com --transcript-dir ou --record")
+    if not args.languages:
+        parser.error("--languages precisa de ao menos um código de idioma (ex: pt)")
+    if args.stt_process_translation and len(args.languages) > 1:
+        # O processo de STT hospeda um único TranslationEngine; os sinks dos demais idiomas imprimem no processo principal
+        parser.error("--stt-process-translation aceita um único idioma em --languages; "
+                     "para vários idiomas, deixe a tradução no processo principal")
+    return args
+
+def build_source(args):
+    """Cria a fonte de áudio escolhida na linha de comando (None = loopback padrão)."""
+    if args.source == "loopback":
+        return None
+    kwargs = {}
+    if args.source == "file" and args.raw_rate:
+        kwargs = {"sample_rate": args.raw_rate, "channels": args.raw_channels}
+    return create_source(args.source, path=args.file, pacing=args.pacing, **kwargs)
+
+def build_stream_sources(args):
+    """Fontes de --stream, rotuladas pela posição e pelo nome ({rótulo: AudioSource})."""
+    sources = {}
+    for index, (kind, path) in enumerate(args.stream, start=1):
+        label = f"{index}:{os.path.basename(path) if path else kind}"
+        sources[label] = create_source(kind, path=path, pacing=args.pacing)
+    return sources
+
+def start_metrics(args):
+    """Habilita as métricas e inicia os exportadores pedidos. Retorna os exportadores ativos."""
+    exporters = []
+    if args.metrics_jsonl or args.metrics_port:
+        METRICS.enable()
+    if args.metrics_jsonl:
+        exporters.append(JSONLExporter(METRICS, args.metrics_jsonl, interval=args.metrics_interval).start())
+    if args.metrics_port:
+        server = MetricsServer(METRICS, port=args.metrics_port).start()
+        print(f"Métricas disponíveis em http://127.0.0.1:{server.port}/metrics")
+        exporters.append(server)
+    return exporters
+
+def start_transcript(args):
+    """Inicia o gravador do histórico da sessão (pipeline.transcript). Retorna o sink ou None."""
+    if not args.transcript_dir:
+        return None
+    from pipeline.transcript import TranscriptSink
+    formats = tuple(fmt.strip() for fmt in args.transcript_formats.split(",") if fmt.strip())
+    max_bytes = int(args.transcript_max_mb * 1024 * 1024) if args.transcript_max_mb else None
+    max_seconds = args.transcript_max_minutes * 60 if args.transcript_max_minutes else None
+    sink = TranscriptSink(args.transcript_dir, formats=formats, max_bytes=max_bytes, max_seconds=max_seconds,
+                          language=args.languages[0]).start()
+    print(f"Histórico da sessão em {args.transcript_dir}")
+    return sink
+
+def start_recorder(args):
+    """Inicia a gravação segmentada do áudio capturado (audio.recorder). Retorna o gravador ou None."""
+    if not args.record:
+        return None
+    from audio.recorder import SegmentedWavRecorder
+    recorder = SegmentedWavRecorder(output_dir=args.record, segment_seconds=args.record_segment_minutes * 60,
+                                    split_on_utterance=args.record_per_utterance).start()
+    print(f"Gravando o áudio em {args.record}")
+    return recorder
+
+def resolve_settings(args):
+    """
+    Configuração do STT: linha de comando > perfil do autotune (pipeline.autotune) > padrões.
+    Retorna (argumentos do WhisperTranscriber, window_size, update_rate).
+    """
+    from pipeline.autotune import load_profile
+    profile = load_profile(args.profile) or {}
+    if profile:
+        print(f"Perfil de hardware carregado de {args.profile} ({profile.get('model_name')}/"
+              f"{profile.get('compute_type')}, janela {profile.get('window_size')}s a cada {profile.get('update_rate')}s)")
+
+    def pick(cli_value, key, default):
+        if cli_value is not None:
+            return cli_value
+        return profile.get(key, default)
+
+    model_options = {"model_name": pick(args.model, "model_name", "base")}
+    for key, cli_value in (("compute_type", args.compute_type), ("cpu_threads", args.cpu_threads)):
+        value = pick(cli_value, key, None)
+        if value is not None:
+            model_options[key] = value
+    return model_options, pick(args.window, "window_size", 1.5), pick(args.update_rate, "update_rate", 0.2)
+
+def resolve_resources(args, model_options):
+    """
+    Orçamento de threads/núcleos de cada estágio (pipeline.resources). As threads do STT vêm de
+    `--cpu-threads`/perfil quando definidas; senão, do plano, que é gravado em `model_options`.
+    """
+    from pipeline.resources import plan_resources
+    resources = plan_resources(total_cores=args.cpu_budget, stt_threads=model_options.get("cpu_threads"),
+                               translation_threads=args.translation_threads, reserved_cores=args.reserved_cores,
+                               pin=args.pin_threads)
+    model_options.update(resources.stt_options())
+    print(f"Orçamento de CPU: {resources.summary()}")
+    return resources
+
+def start_stt_process(args, model_options=None, resources=None):
+    """Inicia o STT (e opcionalmente a tradução) em um processo separado. Retorna o worker ou None."""
+    if not args.stt_process:
+        return None
+    from pipeline.stt_process import ProcessSTTWorker, DEFAULT_TRANSCRIBER_SPEC, DEFAULT_TRANSLATOR_SPEC
+    translator_spec = None
+    if args.stt_process_translation:
+        translator_options = resources.translation_options() if resources is not None else {}
+        translator_spec = (DEFAULT_TRANSLATOR_SPEC[0], {"to_code": args.languages[0], "cache_path": args.translation_cache,
+                                                        **translator_options})
+    cpu_affinity = None
+    if resources is not None and resources.pin_threads:
+        cpu_affinity = sorted(set(resources.cores["stt"]) | set(resources.cores["translation"]))
+    print("Iniciando processo de STT e carregando modelos...")
+    transcriber_spec = (DEFAULT_TRANSCRIBER_SPEC[0], model_options or DEFAULT_TRANSCRIBER_SPEC[1])
+    return ProcessSTTWorker(transcriber_spec=transcriber_spec, translator_spec=translator_spec,
+                            cpu_affinity=cpu_affinity).start()
+
 def main():
+    args = parse_args()
+    exporters = start_metrics(args)
+    model_options, window_size, update_rate = resolve_settings(args)
+    resources = resolve_resources(args, model_options)
+    stt_process = start_stt_process(args, model_options, resources)
+    transcript = start_transcript(args)
+    recorder = start_recorder(args)
+    
     print("Inicializando Overlay de Legendas...")
     overlay = SubtitleOverlay(font_size=32)
     
     # Inicia o processamento de áudio em uma thread separada (background)
-    audio_thread = threading.Thread(target=audio_processing_loop, args=(overlay,), daemon=True)
+    if args.stream:
+        # Várias fontes, um único modelo: --streaming/--segment/--adaptive valem só para uma fonte
+        audio_thread = threading.Thread(
+            target=multistream_processing_loop,
+            args=(overlay, build_stream_sources(args)),
+            kwargs={
+                "transcriber": stt_process,
+                "translator": stt_process.translator if stt_process else None,
+                "window_size": window_size,
+                "update_rate": update_rate,
+                "target_languages": args.languages,
+                "translation_cache_path": args.translation_cache,
+                "model_options": model_options,
+                "resources": resources,
+            },
+            daemon=True
+        )
+    else:
+        audio_thread = threading.Thread(
+            target=audio_processing_loop,
+            args=(overlay, build_source(args)),
+            kwargs={
+                "transcriber": stt_process,
+                "translator": stt_process.translator if stt_process else None,
+                "streaming": args.streaming,
+                "translation_cache_path": args.translation_cache,
+                "target_languages": args.languages,
+                "transcript": transcript,
+                "model_options": model_options,
+                "resources": resources,
+                "window_size": window_size,
+                "update_rate": update_rate,
+                "recorder": recorder,
+                "adaptive": args.adaptive,
+                "max_update_rate": args.max_update_rate,
+                "min_window_size": args.min_window,
+                "vad": args.vad,
+                "segment": args.segment,
+                "max_utterance_seconds": args.max_utterance,
+                "max_window_age": args.max_window_age or None,
+            },
+            daemon=True
+        )
     audio_thread.start()
     
     # Inicia o loop principal do Tkinter (UI) na thread principal
     # Isso vai travar a thread atual até a janela ser fechada
+    resources.pin("capture") # A UI divide os núcleos reservados com a captura
     try:
         overlay.start()
     except KeyboardInterrupt:
         print("\nEncerrando aplicação...")
         overlay.close()
+    finally:
+        if transcript is not None:
+            transcript.close()
+        if recorder is not None:
+            recorder.close()
+        for exporter in exporters:
+            exporter.stop()
+        if stt_process is not None:
+            stt_process.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,78 @@
+import queue
+import time
+
+from pipeline.metrics import METRICS
+
+_overlay_updates = METRICS.counter("overlay_updates")
+_overlay_coalesced = METRICS.counter("overlay_updates_coalesced",
+                                     description="Textos substituídos por um mais novo antes de serem desenhados")
+_apply_to_paint_ms = METRICS.histogram("overlay_apply_to_paint_ms", (1, 2, 5, 10, 20, 50, 100, 200, 500))
+
+class HeadlessOverlay:
+    """
+    Overlay sem janela, com a mesma interface do SubtitleOverlay (update_text, close, start).
+    Usado em benchmarks e em máquinas sem display: "aplica" o texto na thread que chamou
+    start(), como o mainloop do Tkinter faria, e mede a latência entre update_text e a aplicação.
+
+    Segue a mesma política do SubtitleOverlay: acorda só quando há texto novo, esvazia a fila
+    e aplica apenas o texto mais recente. `paint_ms` simula o custo de layout/desenho de cada
+    texto aplicado, para medir o efeito da coalescência sem um display.
+    """
+    def __init__(self, on_apply=None, paint_ms=0.0, coalesce=True):
+        """
+        :param paint_ms: Custo simulado (ms) de desenhar cada texto aplicado.
+        :param coalesce: False aplica todos os textos da fila, um a um (comportamento antigo).
+        """
+        # Fila thread-safe para receber atualizações do main.py
+        self.text_queue = queue.Queue()
+        self.current_text = ""
+        self.updates_applied = 0
+        self.updates_coalesced = 0
+        # Callback opcional chamado a cada texto aplicado: on_apply(text, latency_ms)
+        self.on_apply = on_apply
+        self.paint_ms = paint_ms
+        self.coalesce = coalesce
+
+    def update_text(self, text):
+        """Método público e thread-safe para atualizar o texto da legenda."""
+        self.text_queue.put((text, time.time()))
+
+    def close(self):
+        """Sinaliza para o loop terminar."""
+        self.text_queue.put(None)
+
+    def _next_batch(self):
+        """Bloqueia até haver atualização; retorna os itens pendentes (o None de parada é o último)."""
+        items = [self.text_queue.get()]
+        if self.coalesce:
+            try:
+                while items[-1] is not None:
+                    items.append(self.text_queue.get_nowait())
+            except queue.Empty:
+                pass
+        return items
+
+    def start(self):
+        """Trava a thread atual aplicando as atualizações até close() ser chamado."""
+        while True:
+            items = self._next_batch()
+            stop = items[-1] is None
+            updates = [item for item in items if item is not None]
+            if len(updates) > 1:
+                self.updates_coalesced += len(updates) - 1
+                _overlay_coalesced.inc(len(updates) - 1)
+            if updates:
+                self._apply(*updates[-1])
+            if stop:
+                return
+
+    def _apply(self, text, submitted_at):
+        self.current_text = text
+        if self.paint_ms:
+            time.sleep(self.paint_ms / 1000)
+        self.updates_applied += 1
+        _overlay_updates.inc()
+        latency_ms = (time.time() - submitted_at) * 1000
+        _apply_to_paint_ms.observe(latency_ms)
+        if self.on_apply is not None:
+            self.on_apply(text, latency_ms)
@@ -5,12 +5,26 @@ import time
 import ctypes
 import os
 
+from pipeline.metrics import METRICS
+
+_overlay_updates = METRICS.counter("overlay_updates")
+_overlay_coalesced = METRICS.counter("overlay_updates_coalesced",
+                                     description="Textos substituídos por um mais novo antes de serem desenhados")
+_overlay_repositions = METRICS.counter("overlay_repositions")
+_apply_to_paint_ms = METRICS.histogram("overlay_apply_to_paint_ms", (1, 2, 5, 10, 20, 50, 100, 200, 500))
+
+# Intervalo do poll do mainloop (~1 quadro a 60Hz). As outras threads só marcam uma flag:
+# chamar o Tk de fora da thread da interface (event_generate) bloqueia enquanto ela está ocupada
+POLL_MS = 15
+
 class SubtitleOverlay:
     def __init__(self, font_family="Arial", font_size=28, text_color="#FFFF00", 
-                 position="bottom-center", x_offset=0, y_offset=150):
+                 position="bottom-center", x_offset=0, y_offset=150, on_apply=None):
         """
         Inicializa o overlay transparente de legendas.
         Usa preto ('black') como cor de Chroma Key para o Windows ignorar e deixar invisível.
+        :param on_apply: Callback opcional on_apply(text, latency_ms), com a latência entre
+                         update_text e o texto desenhado na tela.
         """
         self.root = tk.Tk()
         
@@ -46,12 +60,19 @@ class SubtitleOverlay:
         
         # Fila thread-safe para receber atualizações do main.py
         self.text_queue = queue.Queue()
+        self.on_apply = on_apply
+        self.updates_applied = 0
+        self.updates_coalesced = 0
+        self._submitted_at = None   # Momento do update_text mais recente (latência até a pintura)
+        self._wake_lock = threading.Lock()
+        self._wake_pending = False  # Há texto novo na fila que o poll ainda não aplicou
+        self._label_size = None     # Tamanho pedido pelo Label no último reposicionamento
         
         self._update_window_position()
         self._apply_clickthrough()
         self.root.deiconify() # Revela a janela
         
-        # Inicia loop de leitura da fila
+        # As atualizações são aplicadas pelo poll, na thread da interface
         self._check_queue()
 
     def _apply_clickthrough(self):
@@ -105,35 +126,80 @@ class SubtitleOverlay:
             y = (screen_height // 2) - (window_height // 2)
         
         self.root.geometry(f"+{int(x)}+{int(y)}")
+        self._label_size = (self.label.winfo_reqwidth(), self.label.winfo_reqheight())
+        _overlay_repositions.inc()
 
-    def _check_queue(self):
-        """Pool de atualizações: verifica periodicamente se há novo texto para exibir."""
+    def _drain_queue(self):
+        """
+        Esvazia a fila e aplica apenas o texto mais recente: durante fala rápida, os textos
+        que já foram substituídos por um mais novo não chegam a ser desenhados.
+        Retorna False se a janela foi fechada.
+        """
+        with self._wake_lock:
+            self._wake_pending = False
+        latest = None
+        received = 0
         try:
             while True:
                 new_text = self.text_queue.get_nowait()
                 if new_text is None:  # Sinal secreto de parada
                     self.root.destroy()
-                    return
-                
-                # Atualiza o texto na interface
-                self.label.config(text=new_text)
-                
-                # Reposiciona caso o texto tenha feito a janela mudar de largura/altura
-                self._update_window_position()
-                
+                    return False
+                latest = new_text
+                received += 1
         except queue.Empty:
             pass
         
-        # Continua checando a cada 50ms (rápido o suficiente para tempo real, leve para CPU)
-        self.root.after(50, self._check_queue)
-        
+        if received:
+            if received > 1:
+                self.updates_coalesced += received - 1
+                _overlay_coalesced.inc(received - 1)
+            self._apply_text(latest, self._submitted_at)
+        return True
+
+    def _apply_text(self, text, submitted_at):
+        # Atualiza o texto na interface
+        self.label.config(text=text)
+        self.updates_applied += 1
+        _overlay_updates.inc()
+        
+        # O Label calcula o tamanho pedido na hora do config: só reposiciona (update_idletasks
+        # + geometria) se a legenda realmente mudou de largura/altura
+        if (self.label.winfo_reqwidth(), self.label.winfo_reqheight()) != self._label_size:
+            self._update_window_position()
+        
+        if submitted_at is not None:
+            # Callbacks ociosos rodam depois do redesenho agendado pelo config acima
+            self.root.after_idle(self._painted, text, submitted_at)
+
+    def _painted(self, text, submitted_at):
+        latency_ms = (time.time() - submitted_at) * 1000
+        _apply_to_paint_ms.observe(latency_ms)
+        if self.on_apply is not None:
+            self.on_apply(text, latency_ms)
+
+    def _check_queue(self):
+        """Poll da thread da interface: só esvazia a fila quando alguma thread marcou texto novo."""
+        with self._wake_lock:
+            pending = self._wake_pending
+        if not pending or self._drain_queue():
+            self.root.after(POLL_MS, self._check_queue)
+        
+    def _wake(self):
+        """Marca que há texto novo para o próximo poll; não chama o Tk, então nunca bloqueia."""
+        with self._wake_lock:
+            self._wake_pending = True
+
     def update_text(self, text):
         """Método público e thread-safe para atualizar o texto da legenda."""
+        self._submitted_at = time.time()
         self.text_queue.put(text)
+        self._wake()
         
     def close(self):
         """Sinaliza para a janela fechar de forma segura."""
         self.text_queue.put(None)
+        self._wake()
         
     def start(self):
         """
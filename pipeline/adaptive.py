@@ -0,0 +1,111 @@
+"""
+Controle adaptativo da janela e da taxa de atualização do RollingAudioBuffer.
+
+Com o mailbox de último valor (pipeline.mailbox), se o STT leva mais que `update_rate` por
+janela, a maioria das janelas emitidas é substituída antes de ser transcrita: a CPU gasta no pré-processamento e
+na cópia dessas janelas é desperdiçada. O controlador mede quanto tempo o worker realmente
+leva por janela (transcrição + tradução) e ajusta o buffer para que o intervalo entre
+janelas cubra esse tempo com uma folga (`target_utilization`):
+
+    update_rate = tempo_por_janela / target_utilization   (limitado a [min, max])
+
+Descartes observados aumentam a taxa imediatamente. Se mesmo o `max_update_rate` não basta,
+a janela encolhe (decodificações mais curtas); quando sobra folga, ela volta a crescer até
+o tamanho configurado. A janela nunca fica menor que o `update_rate`, para não haver
+buracos no áudio transcrito.
+"""
+import threading
+
+from pipeline.metrics import METRICS
+
+_update_rate_gauge = METRICS.gauge("adaptive_update_rate_s")
+_window_size_gauge = METRICS.gauge("adaptive_window_size_s")
+_adjustments = METRICS.counter("adaptive_adjustments")
+
+class AdaptiveRateController:
+    def __init__(self, rolling_buffer, min_update_rate=0.2, max_update_rate=1.5, min_window_size=1.0,
+                 max_window_size=None, target_utilization=0.8, smoothing=0.3, tolerance=0.1):
+        """
+        :param rolling_buffer: RollingAudioBuffer cujos `update_rate`/`window_size` serão ajustados.
+        :param max_window_size: Janela máxima (padrão: a janela configurada no buffer).
+        :param target_utilization: Fração do intervalo entre janelas que o worker pode ocupar.
+        :param smoothing: Peso da medição mais recente na média exponencial do tempo por janela.
+        :param tolerance: Variação relativa mínima para aplicar um ajuste (evita oscilação).
+        """
+        self.buffer = rolling_buffer
+        self.min_update_rate = min_update_rate
+        self.max_update_rate = max_update_rate
+        self.max_window_size = max_window_size if max_window_size is not None else rolling_buffer.window_size
+        self.min_window_size = min(min_window_size, self.max_window_size)
+        self.target_utilization = target_utilization
+        self.smoothing = smoothing
+        self.tolerance = tolerance
+
+        self._lock = threading.Lock()
+        self.processing_seconds = None # Média exponencial do tempo de worker por janela
+        self._pending_drops = 0
+        self.drops = 0
+        self.processed = 0
+
+    def window_processed(self, busy_seconds, window_seconds=None):
+        """
+        Chamado pelo worker ao terminar uma janela.
+        :param busy_seconds: Tempo total gasto com a janela (STT + tradução + UI).
+        :param window_seconds: Duração da janela processada (padrão: a janela atual do buffer).
+        O tempo é normalizado pela janela, para que encolher a janela reflita na estimativa.
+        """
+        window_seconds = window_seconds or self.buffer.window_size
+        per_second = busy_seconds / window_seconds
+        with self._lock:
+            self.processed += 1
+            if self.processing_seconds is None:
+                self.processing_seconds = per_second
+            else:
+                self.processing_seconds += self.smoothing * (per_second - self.processing_seconds)
+
+    def window_dropped(self):
+        """Chamado quando uma janela pendente foi substituída antes de ser transcrita."""
+        with self._lock:
+            self._pending_drops += 1
+            self.drops += 1
+
+    def update(self):
+        """
+        Recalcula e aplica `update_rate`/`window_size` (chamado pela thread de áudio, que é a
+        dona do buffer). Retorna True se algo mudou.
+        """
+        with self._lock:
+            cost_per_second = self.processing_seconds
+            drops, self._pending_drops = self._pending_drops, 0
+        if cost_per_second is None:
+            return False
+
+        window = self.buffer.window_size
+        update_rate = self.buffer.update_rate
+        target = cost_per_second * window / self.target_utilization
+        if drops:
+            # Ainda há descarte: sobe pelo menos 25% mesmo que a média ainda não tenha alcançado
+            target = max(target, update_rate * 1.25)
+
+        new_window = window
+        if target > self.max_update_rate:
+            # Nem a taxa máxima basta: encolhe a janela (decodificação mais curta)
+            new_window = max(self.min_window_size, window * self.max_update_rate / target)
+        elif target < self.min_update_rate * self.target_utilization and window < self.max_window_size:
+            # Sobra folga mesmo na taxa mínima: devolve contexto ao Whisper
+            new_window = min(self.max_window_size, window * 1.25)
+        new_update_rate = min(max(target, self.min_update_rate), self.max_update_rate)
+        new_window = max(new_window, new_update_rate)
+
+        changed = False
+        if abs(new_update_rate - update_rate) > self.tolerance * update_rate:
+            self.buffer.update_rate = new_update_rate
+            changed = True
+        if abs(new_window - window) > self.tolerance * window:
+            self.buffer.window_size = new_window
+            changed = True
+        if changed:
+            _adjustments.inc()
+            _update_rate_gauge.set(self.buffer.update_rate)
+            _window_size_gauge.set(self.buffer.window_size)
+        return changed
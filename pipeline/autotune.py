@@ -0,0 +1,242 @@
+"""
+Auto-ajuste do STT para a máquina atual.
+
+    python -m pipeline.autotune --clip referencia.wav --reference referencia.txt
+
+Mede cada combinação de modelo Whisper, compute type do CTranslate2 e número de threads:
+  - precisão: WER da transcrição completa do clipe (trechos cortados nos silêncios e
+    decodificados com beam search, como na decodificação final) contra o texto de referência;
+  - velocidade: tempo de decodificação das janelas deslizantes de cada par
+    (window_size, update_rate). No loop ao vivo, "tempo real" significa decodificar cada
+    janela antes da próxima chegar, então o fator de tempo real considerado é
+    p95(tempo por janela) / update_rate, que precisa ficar abaixo de `max_rtf`.
+
+Escolhe a configuração mais precisa que cumpre o limite (empate: a mais rápida) e, nela, o
+menor update_rate viável (menor latência). O resultado é gravado como um perfil JSON que o
+main.py carrega na inicialização (`--profile`); opções passadas na linha de comando continuam
+tendo prioridade.
+
+Sem `--reference`, a transcrição do maior modelo testado serve de referência (WER relativo).
+Modelos são testados do menor para o maior; se nenhuma configuração de um modelo cumpre o
+limite, os maiores não são testados.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import time
+
+import numpy as np
+
+from pipeline.offline import TARGET_RATE, load_audio, plan_chunks
+
+DEFAULT_PROFILE_PATH = os.path.join(os.path.expanduser("~"), ".realtime_translation", "profile.json")
+
+# Pares (window_size, update_rate) testados, em segundos
+WINDOW_SETTINGS = ((1.0, 0.2), (1.5, 0.2), (1.5, 0.3), (2.5, 0.3), (2.5, 0.5), (3.0, 0.5))
+CPU_COMPUTE_TYPES = ("int8", "int8_float32", "float32")
+CUDA_COMPUTE_TYPES = ("float16", "int8_float16", "int8")
+
+def normalize_words(text):
+    """Minúsculas, sem pontuação, separado em palavras (para o WER)."""
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+def word_error_rate(reference, hypothesis):
+    """(substituições + inserções + remoções) / palavras da referência."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = np.arange(len(hyp) + 1)
+    for i, word in enumerate(ref, 1):
+        current = np.empty_like(previous)
+        current[0] = i
+        for j, other in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other))
+        previous = current
+    return float(previous[-1]) / len(ref)
+
+def transcribe_clip(transcriber, audio, beam_size=5):
+    """Transcrição completa do clipe, em trechos cortados nos silêncios (como o modo offline)."""
+    texts = [transcriber.transcribe(audio[start:end], language="en", beam_size=beam_size)[0]
+             for start, end in plan_chunks(audio, max_chunk_seconds=30.0)]
+    return " ".join(text.strip() for text in texts if text.strip())
+
+def measure_windows(transcriber, audio, window_size, update_rate, max_windows=12):
+    """
+    Decodifica (guloso, como as parciais) até `max_windows` janelas deslizantes do clipe.
+    Retorna tempos em ms e o fator de tempo real do loop ao vivo (p95 / update_rate).
+    """
+    window = int(window_size * TARGET_RATE)
+    ends = np.arange(window, len(audio) + 1, int(update_rate * TARGET_RATE))
+    if len(ends) == 0:
+        ends = np.array([len(audio)])
+    if len(ends) > max_windows:
+        ends = ends[np.linspace(0, len(ends) - 1, max_windows).astype(int)]
+    times_ms = []
+    for end in ends:
+        start_time = time.time()
+        transcriber.transcribe(audio[max(end - window, 0):end], language="en")
+        times_ms.append((time.time() - start_time) * 1000)
+    p95_ms = float(np.percentile(times_ms, 95))
+    return {
+        "window_size": window_size,
+        "update_rate": update_rate,
+        "mean_ms": round(float(np.mean(times_ms)), 1),
+        "p95_ms": round(p95_ms, 1),
+        "rtf": round(p95_ms / 1000 / update_rate, 3),
+    }
+
+def _default_factory(device):
+    def build(model_name, compute_type, cpu_threads):
+        from speech.whisper_engine import WhisperTranscriber
+        return WhisperTranscriber(model_name=model_name, device=device, compute_type=compute_type,
+                                  cpu_threads=cpu_threads)
+    return build
+
+def autotune(audio, reference=None, models=("tiny", "base", "small"), compute_types=None, thread_counts=None,
+             window_settings=WINDOW_SETTINGS, max_rtf=0.8, device=None, transcriber_factory=None, log=print):
+    """
+    Mede todas as combinações e escolhe a configuração. Retorna (perfil, resultados).
+    :param transcriber_factory: callable(model_name, compute_type, cpu_threads) -> transcriber
+                                (padrão: WhisperTranscriber no `device`).
+    """
+    if device is None and transcriber_factory is None:
+        from speech.whisper_engine import _default_device
+        device = _default_device()
+    compute_types = compute_types or (CUDA_COMPUTE_TYPES if device == "cuda" else CPU_COMPUTE_TYPES)
+    cpu_count = os.cpu_count() or 1
+    thread_counts = thread_counts or sorted({max(1, cpu_count // 2), cpu_count})
+    transcriber_factory = transcriber_factory or _default_factory(device)
+
+    results = []
+    for model_name in models:
+        model_results = []
+        for compute_type in compute_types:
+            text = None # A precisão não depende do número de threads: mede uma vez por compute type
+            for cpu_threads in thread_counts:
+                label = f"{model_name}/{compute_type}/{cpu_threads} threads"
+                try:
+                    transcriber = transcriber_factory(model_name, compute_type, cpu_threads)
+                except (ValueError, RuntimeError) as e:
+                    log(f"[Autotune] {label}: indisponível nesta máquina ({e})")
+                    break
+                if hasattr(transcriber, "warmup"):
+                    transcriber.warmup()
+                windows = [measure_windows(transcriber, audio, *setting) for setting in window_settings]
+                if text is None:
+                    text = transcribe_clip(transcriber, audio)
+                result = {"model_name": model_name, "compute_type": compute_type, "cpu_threads": cpu_threads,
+                          "device": device, "text": text, "windows": windows}
+                model_results.append(result)
+                log(f"[Autotune] {label}: menor RTF {min(w['rtf'] for w in windows):.2f}")
+                del transcriber
+        results.extend(model_results)
+        if model_results and not any(w["rtf"] <= max_rtf for r in model_results for w in r["windows"]):
+            log(f"[Autotune] Nenhuma configuração de '{model_name}' cumpre RTF <= {max_rtf}; modelos maiores ignorados.")
+            break
+    if not results:
+        raise RuntimeError("No configuration could be measured.")
+
+    reference_kind = "reference"
+    if reference is None:
+        reference, reference_kind = results[-1]["text"], "largest_model"
+    for result in results:
+        result["wer"] = round(word_error_rate(reference, result["text"]), 4)
+    return select_profile(results, max_rtf, reference_kind), results
+
+def select_profile(results, max_rtf=0.8, reference_kind="reference"):
+    """
+    A configuração mais precisa com alguma janela viável (empate: menor RTF); nela, o menor
+    update_rate viável e, entre esses, a maior janela. Sem nada viável, a mais rápida.
+    """
+    def best_window(result, viable_only=True):
+        windows = [w for w in result["windows"] if w["rtf"] <= max_rtf] if viable_only else result["windows"]
+        if not windows:
+            return None
+        if not viable_only:
+            return min(windows, key=lambda w: w["rtf"])
+        return min(windows, key=lambda w: (w["update_rate"], -w["window_size"], w["rtf"]))
+
+    viable = [(result, best_window(result)) for result in results]
+    viable = [(result, window) for result, window in viable if window is not None]
+    if viable:
+        result, window = min(viable, key=lambda item: (item[0]["wer"], min(w["rtf"] for w in item[0]["windows"])))
+    else:
+        result = min(results, key=lambda r: min(w["rtf"] for w in r["windows"]))
+        window = best_window(result, viable_only=False)
+
+    return {
+        "model_name": result["model_name"],
+        "compute_type": result["compute_type"],
+        "cpu_threads": result["cpu_threads"],
+        "device": result["device"],
+        "window_size": window["window_size"],
+        "update_rate": window["update_rate"],
+        "rtf": window["rtf"],
+        "p95_ms": window["p95_ms"],
+        "wer": result["wer"],
+        "viable": bool(viable),
+        "max_rtf": max_rtf,
+        "reference": reference_kind,
+        "host": platform.node(),
+        "cpu_count": os.cpu_count(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def save_profile(profile, path=DEFAULT_PROFILE_PATH):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+
+def load_profile(path=DEFAULT_PROFILE_PATH):
+    """Perfil salvo pelo autotune, ou None se não existir / estiver inválido."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[Autotune] Perfil {path} ignorado: {e}")
+        return None
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Escolhe modelo/compute type/threads/janela mais adequados a esta máquina.")
+    parser.add_argument("--clip", required=True, help="Clipe de referência (WAV) com fala representativa")
+    parser.add_argument("--reference", help="Arquivo de texto com a transcrição correta do clipe")
+    parser.add_argument("--models", default="tiny,base,small", help="Modelos candidatos, do menor para o maior")
+    parser.add_argument("--compute-types", help="Compute types candidatos (padrão: int8,int8_float32,float32 na CPU)")
+    parser.add_argument("--threads", help="Números de threads candidatos (padrão: metade e todos os núcleos)")
+    parser.add_argument("--device", choices=["cpu", "cuda"], help="Padrão: CUDA se disponível")
+    parser.add_argument("--max-rtf", type=float, default=0.8,
+                        help="Limite de p95(tempo por janela) / update_rate para o loop ao vivo")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE_PATH, help="Onde gravar o perfil")
+    parser.add_argument("--output", help="Grava todas as medições (JSON) neste arquivo")
+    return parser.parse_args(argv)
+
+def _split(value, cast=str):
+    return tuple(cast(item.strip()) for item in value.split(",") if item.strip()) if value else None
+
+def main_cli(argv=None):
+    args = parse_args(argv)
+    reference = None
+    if args.reference:
+        with open(args.reference, encoding="utf-8") as f:
+            reference = f.read()
+    profile, results = autotune(load_audio(args.clip), reference=reference, models=_split(args.models),
+                                compute_types=_split(args.compute_types), thread_counts=_split(args.threads, int),
+                                max_rtf=args.max_rtf, device=args.device)
+    save_profile(profile, args.profile)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(profile, indent=2), file=sys.stdout)
+    if not profile["viable"]:
+        print(f"[Autotune] Nenhuma configuração cumpre RTF <= {args.max_rtf}; perfil salvo com a mais rápida.")
+    print(f"[Autotune] Perfil salvo em {args.profile}")
+
+if __name__ == "__main__":
+    main_cli()
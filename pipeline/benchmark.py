@@ -0,0 +1,239 @@
+"""
+Benchmark de latência de ponta a ponta do pipeline principal.
+
+Executa a lógica real de main.audio_processing_loop / main.stt_worker_loop a partir de
+áudio gravado (ou sintético), com Whisper/Argos reais ou stubs e um overlay headless,
+e imprime p50/p95/p99 de cada estágio e a taxa de janelas descartadas em JSON.
+
+Exemplos (a partir da raiz do projeto):
+    python -m pipeline.benchmark --file gravacao.wav
+    python -m pipeline.benchmark --synthetic --stt base --translator argos --output base.json
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+
+import main
+from audio.sources import FileReplaySource, SyntheticSource
+from overlay.headless import HeadlessOverlay
+from pipeline.latency import LatencyTracer
+from pipeline.mailbox import LatestMailbox
+
+class StubTranscriber:
+    """
+    Substitui o WhisperTranscriber com um custo fixo e um texto deslizante previsível.
+    Em transcribe_batch, cada janela extra custa `batch_overhead` do custo de uma janela
+    (modelo compartilhado, encoder/decoder em lote).
+    """
+    def __init__(self, latency_ms=150.0, words_per_window=6, batch_overhead=0.3):
+        self.latency_ms = latency_ms
+        self.words_per_window = words_per_window
+        self.batch_overhead = batch_overhead
+        self.calls = 0
+
+    def transcribe(self, audio_data, language=None, beam_size=1):
+        start_time = time.time()
+        time.sleep(self.latency_ms / 1000)
+        self.calls += 1
+        words = [f"word{i}" for i in range(self.calls, self.calls + self.words_per_window)]
+        return " ".join(words), (time.time() - start_time) * 1000
+
+    def transcribe_batch(self, audios, language=None, beam_size=1):
+        start_time = time.time()
+        time.sleep(self.latency_ms * (1 + self.batch_overhead * (len(audios) - 1)) / 1000)
+        self.calls += 1
+        words = [f"word{i}" for i in range(self.calls, self.calls + self.words_per_window)]
+        return [" ".join(words)] * len(audios), (time.time() - start_time) * 1000
+
+class StubTranslator:
+    """Substitui o TranslationEngine com um custo fixo por chamada."""
+    def __init__(self, latency_ms=30.0):
+        self.latency_ms = latency_ms
+
+    def incremental_translate(self, current_english_text):
+        return self.translate(current_english_text)
+
+    def translate(self, text):
+        translations, processing_time_ms = self.translate_batch([text])
+        return translations[0], processing_time_ms
+
+    def translate_batch(self, texts):
+        start_time = time.time()
+        time.sleep(self.latency_ms / 1000)
+        return [text.upper() for text in texts], (time.time() - start_time) * 1000
+
+    def clear_state(self):
+        pass
+
+def build_models(args):
+    if args.stt == "stub":
+        transcriber = StubTranscriber(latency_ms=args.stub_stt_ms)
+    else:
+        from speech.whisper_engine import WhisperTranscriber
+        transcriber = WhisperTranscriber(model_name=args.stt)
+
+    if args.translator == "stub":
+        translator = StubTranslator(latency_ms=args.stub_translation_ms)
+    else:
+        from translation.translator import TranslationEngine
+        translator = TranslationEngine(from_code=args.from_code, to_code=args.to_code)
+    return transcriber, translator
+
+def run_benchmark(source, transcriber, translator, window_size=1.5, update_rate=0.2, chunk_duration=0.2,
+                  adaptive=False, segment=False, overlay_paint_ms=0.0, coalesce=True, max_window_age=None):
+    """
+    Roda o pipeline até a fonte terminar e retorna o resumo do LatencyTracer.
+    O overlay headless roda na thread atual, como o Tkinter faria na main thread.
+    Com adaptive=True, a janela/taxa seguem o AdaptiveRateController (pipeline.adaptive).
+    Com segment=True, os enunciados fechados pelo VAD passam pela decodificação final
+    (estágios final_stt/final_end_to_end).
+    `overlay_paint_ms` simula o custo de desenhar cada legenda; com coalesce=False o overlay
+    aplica todos os textos da fila em vez de só o mais recente.
+    `mailbox` no resumo traz as janelas substituídas/vencidas e quantos segundos de áudio
+    nenhuma janela transcrita cobriu (pipeline.mailbox); `max_window_age` é o prazo das janelas.
+    """
+    tracer = LatencyTracer()
+    overlay = HeadlessOverlay(on_apply=lambda text, latency_ms: tracer.record("overlay_apply", latency_ms),
+                              paint_ms=overlay_paint_ms, coalesce=coalesce)
+
+    # audio_processing_loop chama start_capture com 0.2s; respeita o chunk pedido aqui
+    source.start_capture = _with_chunk_duration(source.start_capture, chunk_duration)
+    mailbox = LatestMailbox(max_age=max_window_age)
+
+    started = time.time()
+    audio_thread = threading.Thread(
+        target=main.audio_processing_loop,
+        args=(overlay, source, transcriber, translator, tracer),
+        kwargs={"window_size": window_size, "update_rate": update_rate, "adaptive": adaptive, "segment": segment,
+                "mailbox": mailbox},
+        daemon=True
+    )
+    audio_thread.start()
+    overlay.start() # Retorna quando o loop de áudio fecha o overlay (fim da fonte)
+    audio_thread.join()
+
+    summary = tracer.summary()
+    summary["wall_time_s"] = round(time.time() - started, 3)
+    summary["overlay_updates"] = overlay.updates_applied
+    summary["overlay_updates_coalesced"] = overlay.updates_coalesced
+    summary["mailbox"] = mailbox.stats()
+    return summary
+
+def run_multistream_benchmark(sources, transcriber, translator, window_size=1.5, update_rate=0.2,
+                              chunk_duration=0.2, max_batch_size=8):
+    """
+    Alimenta N fontes em um único MultiStreamEngine (um modelo, decodificação em lote) e
+    retorna janelas processadas/substituídas por stream e o tamanho médio dos lotes.
+    """
+    from speech.multistream import MultiStreamEngine, feed_source
+
+    engine = MultiStreamEngine(transcriber, translator, max_batch_size=max_batch_size).start()
+    threads = []
+    started = time.time()
+    for index, source in enumerate(sources):
+        engine.add_stream(index)
+        thread = threading.Thread(target=feed_source, args=(engine, index, source, window_size, update_rate,
+                                                            chunk_duration), daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    engine.close()
+
+    sessions = list(engine.sessions.values())
+    return {
+        "streams": len(sessions),
+        "wall_time_s": round(time.time() - started, 3),
+        "batches": engine.batches,
+        "mean_batch_size": round(engine.windows_processed / engine.batches, 3) if engine.batches else 0.0,
+        "windows_processed": engine.windows_processed,
+        "windows_superseded": sum(s.windows_superseded for s in sessions),
+        "per_stream": {str(s.stream_id): {"submitted": s.windows_submitted, "processed": s.windows_processed}
+                       for s in sessions},
+    }
+
+def _with_chunk_duration(start_capture, chunk_duration):
+    def start(*args, **kwargs):
+        return start_capture(chunk_duration=chunk_duration)
+    return start
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de latência por estágio do pipeline.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="Arquivo WAV gravado para reproduzir")
+    source.add_argument("--synthetic", action="store_true", help="Usa a fonte sintética (fala simulada + silêncio)")
+    parser.add_argument("--pacing", choices=["realtime", "fast"], default="realtime")
+    parser.add_argument("--synthetic-repeat", type=int, default=5, help="Repetições do roteiro sintético")
+    parser.add_argument("--stt", default="stub", help="'stub' ou nome do modelo Whisper (tiny, base, small...)")
+    parser.add_argument("--translator", choices=["stub", "argos"], default="stub")
+    parser.add_argument("--stub-stt-ms", type=float, default=150.0)
+    parser.add_argument("--stub-translation-ms", type=float, default=30.0)
+    parser.add_argument("--from-code", default="en")
+    parser.add_argument("--to-code", default="pt")
+    parser.add_argument("--window-size", type=float, default=1.5)
+    parser.add_argument("--update-rate", type=float, default=0.2)
+    parser.add_argument("--chunk-duration", type=float, default=0.2)
+    parser.add_argument("--adaptive", action="store_true", help="Liga o controle adaptativo de janela/taxa")
+    parser.add_argument("--streams", type=int, default=1,
+                        help="Com N > 1, replica a fonte em N streams servidos por um único modelo (MultiStreamEngine)")
+    parser.add_argument("--segment", action="store_true", help="Liga a segmentação em enunciados com decodificação final")
+    parser.add_argument("--overlay-paint-ms", type=float, default=0.0,
+                        help="Custo simulado de desenhar cada legenda no overlay headless")
+    parser.add_argument("--no-coalesce", dest="coalesce", action="store_false",
+                        help="Overlay aplica todos os textos da fila (sem coalescer no mais recente)")
+    parser.add_argument("--max-window-age", type=float,
+                        help="Prazo (s) das janelas no mailbox do STT; as vencidas são puladas")
+    parser.add_argument("--output", help="Grava o JSON neste arquivo (padrão: stdout)")
+    return parser.parse_args(argv)
+
+def main_cli(argv=None):
+    args = parse_args(argv)
+    if args.file:
+        source = FileReplaySource(args.file, pacing=args.pacing)
+    else:
+        source = SyntheticSource(pacing=args.pacing, repeat=args.synthetic_repeat)
+
+    transcriber, translator = build_models(args)
+    if args.streams > 1:
+        if args.file:
+            sources = [FileReplaySource(args.file, pacing=args.pacing) for _ in range(args.streams)]
+        else:
+            sources = [SyntheticSource(pacing=args.pacing, repeat=args.synthetic_repeat, seed=i)
+                       for i in range(args.streams)]
+        report = json.dumps(run_multistream_benchmark(sources, transcriber, translator, args.window_size,
+                                                      args.update_rate, args.chunk_duration), indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(report)
+        print(report, file=sys.stdout)
+        return
+
+    summary = run_benchmark(source, transcriber, translator, args.window_size, args.update_rate, args.chunk_duration,
+                            adaptive=args.adaptive, segment=args.segment,
+                            overlay_paint_ms=args.overlay_paint_ms, coalesce=args.coalesce,
+                            max_window_age=args.max_window_age)
+    summary["config"] = {
+        "source": args.file or "synthetic",
+        "pacing": args.pacing,
+        "stt": args.stt,
+        "translator": args.translator,
+        "window_size": args.window_size,
+        "update_rate": args.update_rate,
+        "chunk_duration": args.chunk_duration,
+        "adaptive": args.adaptive,
+        "segment": args.segment,
+        "overlay_paint_ms": args.overlay_paint_ms,
+        "coalesce": args.coalesce,
+        "max_window_age": args.max_window_age,
+    }
+
+    report = json.dumps(summary, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    print(report, file=sys.stdout)
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,73 @@
+import threading
+import numpy as np
+
+# (nome do estágio, marca inicial, marca final) dentro do dicionário de timings de cada janela
+STAGES = (
+    ("capture", "captured", "drained"),
+    ("preprocess", "drained", "enqueued"),
+    ("queue_wait", "enqueued", "dequeued"),
+    ("stt", "dequeued", "transcribed"),
+    ("translation", "transcribed", "translated"),
+    ("end_to_end", "captured", "displayed"),
+)
+
+class LatencyTracer:
+    """
+    Coleta as latências de cada estágio do pipeline (captura -> legenda) e as janelas
+    descartadas, para o benchmark de ponta a ponta.
+
+    Thread-safe: as janelas são emitidas na thread de áudio, registradas na thread do
+    worker e o overlay reporta a aplicação do texto na thread da UI.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {name: [] for name, _, _ in STAGES}
+        self.samples["overlay_apply"] = []
+        self.windows_emitted = 0
+        self.windows_dropped = 0
+        self.windows_processed = 0
+
+    def window_emitted(self):
+        with self._lock:
+            self.windows_emitted += 1
+
+    def window_dropped(self):
+        with self._lock:
+            self.windows_dropped += 1
+
+    def record_window(self, timings):
+        """Registra os timestamps (segundos, time.time()) de uma janela processada pelo worker."""
+        with self._lock:
+            self.windows_processed += 1
+            for name, start, end in STAGES:
+                if start in timings and end in timings:
+                    self.samples[name].append((timings[end] - timings[start]) * 1000)
+
+    def record(self, stage, latency_ms):
+        """Registra uma amostra avulsa (ex: overlay_apply, medido pelo próprio overlay)."""
+        with self._lock:
+            self.samples.setdefault(stage, []).append(latency_ms)
+
+    def summary(self):
+        """Retorna um dicionário serializável em JSON com p50/p95/p99 (ms) de cada estágio."""
+        with self._lock:
+            stages = {}
+            for name, values in self.samples.items():
+                if not values:
+                    continue
+                p50, p95, p99 = np.percentile(values, [50, 95, 99])
+                stages[name] = {
+                    "count": len(values),
+                    "p50_ms": round(float(p50), 3),
+                    "p95_ms": round(float(p95), 3),
+                    "p99_ms": round(float(p99), 3),
+                    "max_ms": round(float(max(values)), 3),
+                }
+            emitted = self.windows_emitted
+            return {
+                "windows_emitted": emitted,
+                "windows_processed": self.windows_processed,
+                "windows_dropped": self.windows_dropped,
+                "dropped_window_rate": round(self.windows_dropped / emitted, 4) if emitted else 0.0,
+                "stages": stages,
+            }
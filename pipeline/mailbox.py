@@ -0,0 +1,227 @@
+"""
+Caixa de "último valor" para entregar as janelas de áudio ao worker do STT.
+
+Substitui o `queue.Queue(maxsize=1)` com full()/get_nowait()/put_nowait(), que podia
+descartar um sinal de limpeza pendente e descartava janelas sem registro. Aqui:
+  - `post` guarda só a janela mais recente (com número de sequência); a pendente que ela
+    substitui conta como `superseded`;
+  - `send` usa uma fila separada de controle (limpeza, enunciados finais) que nunca descarta
+    nada e é entregue antes da janela pendente; com `discard_pending=True` a janela pendente
+    é descartada (`discarded`), pois a mensagem a torna obsoleta;
+  - janelas mais velhas que `max_age` quando o worker chega a elas são puladas (`expired`);
+  - com o intervalo de áudio (`span`, em segundos) de cada janela, conta quanto áudio das
+    janelas perdidas nenhuma janela entregue cobriu (`untranscribed_seconds`);
+  - `close` deixa o worker esvaziar o que resta e então `get` retorna None.
+
+Os intervalos são relativos ao trecho contínuo atual (o RollingAudioBuffer zera a posição
+a cada limpeza); um `send` com `discard_pending=True` fecha o trecho. Se a mensagem cobre o
+áudio do trecho (um enunciado final, decodificado inteiro), ela passa `span=WHOLE_STRETCH`.
+"""
+import collections
+import queue
+import threading
+import time
+
+from pipeline.metrics import METRICS
+
+Delivery = collections.namedtuple("Delivery", ["kind", "value", "seq", "age"])
+
+CONTROL = "control"
+VALUE = "value"
+# `span` de uma mensagem que cobre todo o áudio do trecho (ex: enunciado final decodificado inteiro)
+WHOLE_STRETCH = (float("-inf"), float("inf"))
+
+def _uncovered(spans, start, end):
+    """Duração da união de `spans` dentro de (start, end)."""
+    total = 0.0
+    cursor = start
+    for span_start, span_end in sorted(spans):
+        span_start, span_end = max(span_start, cursor), min(span_end, end)
+        if span_end > span_start:
+            total += span_end - span_start
+            cursor = span_end
+    return total
+
+class LatestMailbox:
+    def __init__(self, max_age=None, on_drop=None, metrics_prefix=None):
+        """
+        :param max_age: Idade máxima (s) de uma janela na entrega, medida a partir do `timestamp`
+                        passado em `post` (padrão: o momento do post). None desliga o prazo.
+        :param on_drop: callback(motivo, valor) para janelas perdidas ("superseded" ou "expired"),
+                        chamado fora do lock.
+        :param metrics_prefix: Registra contadores `<prefixo>_superseded`, `_expired`, `_discarded`
+                               e `_untranscribed_seconds` em METRICS.
+        """
+        self.max_age = max_age
+        self.on_drop = on_drop
+        self._cond = threading.Condition()
+        self._control = collections.deque()
+        self._pending = None # (seq, value, timestamp, span)
+        self._seq = 0
+        self._closed = False
+        # Contabilidade do áudio não transcrito no trecho atual
+        self._covered_until = float("-inf")
+        self._lost_spans = []
+
+        self.posted = 0
+        self.delivered = 0
+        self.superseded = 0
+        self.expired = 0
+        self.discarded = 0
+        self.controls = 0
+        self.untranscribed_seconds = 0.0
+
+        self._metrics = None
+        if metrics_prefix:
+            self._metrics = {
+                "superseded": METRICS.counter(f"{metrics_prefix}_superseded",
+                                              description="Janelas substituídas por uma mais nova antes da entrega"),
+                "expired": METRICS.counter(f"{metrics_prefix}_expired",
+                                           description="Janelas puladas por passarem do prazo"),
+                "discarded": METRICS.counter(f"{metrics_prefix}_discarded"),
+                "untranscribed_seconds": METRICS.counter(f"{metrics_prefix}_untranscribed_seconds",
+                                                         description="Áudio de janelas perdidas não coberto por outra"),
+            }
+
+    @property
+    def depth(self):
+        """Mensagens de controle + janela pendente."""
+        with self._cond:
+            return len(self._control) + (self._pending is not None)
+
+    def post(self, value, timestamp=None, span=None):
+        """
+        Deixa `value` como a janela pendente, substituindo a anterior. Nunca bloqueia.
+        :param span: (início, fim) do áudio da janela em segundos, para `untranscribed_seconds`.
+        Retorna o número de sequência, ou None se a caixa já foi fechada.
+        """
+        with self._cond:
+            if self._closed:
+                return None
+            self._seq += 1
+            replaced = self._pending
+            if replaced is not None:
+                self._lose(replaced, "superseded")
+            self._pending = (self._seq, value, time.time() if timestamp is None else timestamp, span)
+            self.posted += 1
+            seq = self._seq
+            self._cond.notify_all()
+        if replaced is not None:
+            self._notify_drop("superseded", replaced[1])
+        return seq
+
+    def send(self, message, discard_pending=False, span=None):
+        """
+        Enfileira uma mensagem de controle (nunca descartada, entregue antes da janela pendente).
+        Com `discard_pending=True` a janela pendente é descartada e o trecho de áudio atual termina;
+        `span` é o áudio do trecho que a mensagem cobre (ex: o enunciado final inteiro).
+        """
+        with self._cond:
+            self._seq += 1
+            self._control.append((self._seq, message, time.time()))
+            self.controls += 1
+            if discard_pending:
+                if self._pending is not None:
+                    self.discarded += 1
+                    self._count("discarded", 1)
+                    if self._pending[3] is not None:
+                        self._lost_spans.append(self._pending[3])
+                    self._pending = None
+                self._end_stretch(span)
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """
+        Próxima entrega (Delivery): mensagens de controle primeiro, depois a janela pendente
+        (se ainda estiver no prazo). Depois de `close`, retorna None quando não sobra nada.
+        Levanta queue.Empty se `timeout` (s) passar sem entrega.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        expired = []
+        try:
+            with self._cond:
+                while True:
+                    if self._control:
+                        seq, message, sent_at = self._control.popleft()
+                        return Delivery(CONTROL, message, seq, time.time() - sent_at)
+                    if self._pending is not None:
+                        seq, value, timestamp, span = self._pending
+                        self._pending = None
+                        age = time.time() - timestamp
+                        if self.max_age is not None and age > self.max_age:
+                            self._lose((seq, value, timestamp, span), "expired")
+                            expired.append(value)
+                            continue
+                        self._deliver(span)
+                        return Delivery(VALUE, value, seq, age)
+                    if self._closed:
+                        return None
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        raise queue.Empty
+                    self._cond.wait(remaining)
+        finally:
+            for value in expired:
+                self._notify_drop("expired", value)
+
+    def close(self):
+        """Não aceita novas janelas; o worker ainda recebe o que está pendente."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "posted": self.posted,
+                "delivered": self.delivered,
+                "superseded": self.superseded,
+                "expired": self.expired,
+                "dropped": self.superseded + self.expired,
+                "discarded": self.discarded,
+                "controls": self.controls,
+                "untranscribed_seconds": round(self.untranscribed_seconds + self._open_loss(), 3),
+            }
+
+    # --- Contabilidade (chamada com o lock) ---
+
+    def _lose(self, pending, reason):
+        setattr(self, reason, getattr(self, reason) + 1)
+        self._count(reason, 1)
+        if pending[3] is not None:
+            self._lost_spans.append(pending[3])
+
+    def _deliver(self, span):
+        self.delivered += 1
+        if span is None:
+            return
+        start, end = span
+        self._add_loss(_uncovered(self._lost_spans, self._covered_until, start))
+        self._lost_spans = [(max(s, end), e) for s, e in self._lost_spans if e > end]
+        self._covered_until = max(self._covered_until, end)
+
+    def _end_stretch(self, covering_span):
+        loss = self._open_loss()
+        if covering_span is not None:
+            start, end = covering_span
+            loss -= _uncovered(self._lost_spans, max(self._covered_until, start), end)
+        self._add_loss(loss)
+        self._lost_spans = []
+        self._covered_until = float("-inf")
+
+    def _open_loss(self):
+        """Áudio perdido do trecho atual que ainda pode vir a ser coberto."""
+        return _uncovered(self._lost_spans, self._covered_until, float("inf"))
+
+    def _add_loss(self, seconds):
+        if seconds > 0:
+            self.untranscribed_seconds += seconds
+            self._count("untranscribed_seconds", seconds)
+
+    def _count(self, name, amount):
+        if self._metrics is not None:
+            self._metrics[name].inc(amount)
+
+    def _notify_drop(self, reason, value):
+        if self.on_drop is not None:
+            self.on_drop(reason, value)
@@ -0,0 +1,192 @@
+"""
+Métricas leves do pipeline: contadores, gauges e histogramas de buckets fixos.
+
+Os instrumentos são criados uma vez no nível do módulo (ex: `METRICS.counter("stt_windows_dropped")`)
+e consultam `registry.enabled` a cada chamada; com o registro desabilitado (padrão) o custo
+é uma chamada de método e um teste de atributo.
+
+Exportação:
+  - JSONLExporter: grava um snapshot por linha a cada N segundos.
+  - MetricsServer: endpoint HTTP local (GET /metrics) que devolve o snapshot em JSON.
+"""
+import bisect
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class Counter:
+    """Valor que só cresce (ex: janelas descartadas)."""
+    def __init__(self, registry, name, description=""):
+        self._registry = registry
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def inc(self, amount=1):
+        if not self._registry.enabled:
+            return
+        with self._registry.lock:
+            self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+class Gauge:
+    """Valor instantâneo (ex: profundidade da fila)."""
+    def __init__(self, registry, name, description=""):
+        self._registry = registry
+        self.name = name
+        self.description = description
+        self.value = 0.0
+
+    def set(self, value):
+        if not self._registry.enabled:
+            return
+        self.value = value
+
+    def snapshot(self):
+        return self.value
+
+class Histogram:
+    """
+    Histograma com buckets fixos (limites superiores inclusivos, como no Prometheus).
+    O último bucket (+inf) recebe tudo que passar do maior limite.
+    """
+    def __init__(self, registry, name, buckets, description=""):
+        self._registry = registry
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        if not self._registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._registry.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self._registry.lock:
+            return {
+                "count": self.count,
+                "sum": round(self.sum, 6),
+                "buckets": {**{str(b): c for b, c in zip(self.buckets, self.counts)}, "+inf": self.counts[-1]},
+            }
+
+class MetricsRegistry:
+    """Agrupa os instrumentos; `get-or-create` por nome, seguro entre threads."""
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self.lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(self, name, *args, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name, description=""):
+        return self._get_or_create(Counter, name, description=description)
+
+    def gauge(self, name, description=""):
+        return self._get_or_create(Gauge, name, description=description)
+
+    def histogram(self, name, buckets, description=""):
+        return self._get_or_create(Histogram, name, buckets, description=description)
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def snapshot(self):
+        """Retorna {timestamp, counters, gauges, histograms} serializável em JSON."""
+        with self.lock:
+            metrics = list(self._metrics.values())
+        result = {"timestamp": time.time(), "counters": {}, "gauges": {}, "histograms": {}}
+        for metric in metrics:
+            if isinstance(metric, Counter):
+                result["counters"][metric.name] = metric.snapshot()
+            elif isinstance(metric, Gauge):
+                result["gauges"][metric.name] = metric.snapshot()
+            else:
+                result["histograms"][metric.name] = metric.snapshot()
+        return result
+
+# Registro global usado pelos módulos do pipeline (desabilitado por padrão)
+METRICS = MetricsRegistry()
+
+class JSONLExporter:
+    """Grava periodicamente o snapshot do registro como uma linha JSON (append) em `path`."""
+    def __init__(self, registry, path, interval=5.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.registry.snapshot()) + "\n")
+
+    def stop(self):
+        """Para o exportador e grava um último snapshot."""
+        self._stop.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+        self.write_snapshot()
+
+class MetricsServer:
+    """Endpoint HTTP local de consulta (pull): GET /metrics devolve o snapshot em JSON."""
+    def __init__(self, registry, host="127.0.0.1", port=9464):
+        registry_ref = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = json.dumps(registry_ref.snapshot()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # Sem spam no console
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
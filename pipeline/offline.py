@@ -0,0 +1,359 @@
+"""
+Modo offline: legenda arquivos de áudio gravados com a maior vazão possível.
+
+    python -m pipeline.offline aula1.wav aula2.wav --output-dir legendas --stt base --translator argos
+
+O arquivo nunca é carregado inteiro: o PCM é mapeado em memória, convertido para mono 16kHz
+em blocos (StreamingResampler) e o FrameVAD percorre bloco a bloco, guardando só os limites
+das falas, que viram trechos de até `max_chunk_seconds`. O áudio de cada trecho é lido do
+arquivo (read_chunk) só quando ele é decodificado. Os trechos são transcritos
+em lotes (WhisperTranscriber.transcribe_batch: um encoder e um decoder em lote por chamada)
+por um pool de workers que chamam o mesmo modelo (WhisperModel com num_workers); cada lote
+é traduzido com translate_batch na própria thread do worker. As legendas (SRT/VTT/JSONL,
+via pipeline.transcript) usam os tempos do arquivo: início e fim de cada trecho.
+
+Retomada: para cada arquivo, `<nome>.manifest.json` guarda a impressão digital do arquivo,
+a configuração e o plano de trechos, e `<nome>.partial.jsonl` recebe cada trecho concluído.
+Rodar de novo o mesmo comando pula os arquivos concluídos e, nos interrompidos, processa
+só os trechos que faltam. A vazão é reportada como múltiplo do tempo real.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from audio.preprocess import StreamingResampler, convert_to_float32, to_mono
+from audio.sources import FileReplaySource
+from audio.vad import FrameVAD
+from pipeline.metrics import METRICS
+from pipeline.transcript import FORMATS, TranscriptSink
+
+TARGET_RATE = 16000
+# Um trecho precisa caber em um segmento do Whisper para a decodificação em lote
+MAX_CHUNK_SECONDS = 30.0
+# Blocos curtos: o StreamingResampler cria temporários proporcionais ao bloco (~20 MB por 5 s a 48kHz)
+BLOCK_SECONDS = 5.0
+
+_chunks_processed = METRICS.counter("offline_chunks_processed")
+_rt_multiple = METRICS.gauge("offline_real_time_multiple")
+
+def open_audio(path, sample_rate=None, channels=None):
+    """Abre um arquivo (WAV ou PCM bruto) mapeado em memória, sem ler o áudio."""
+    return FileReplaySource(path, pacing="fast", sample_rate=sample_rate, channels=channels)
+
+def audio_length(source):
+    """Número de amostras do áudio do arquivo a 16kHz."""
+    return StreamingResampler(source.sample_rate, TARGET_RATE).expected_output_length(len(source.pcm))
+
+def _resample_blocks(source, start, end, block_seconds):
+    """Converte os frames [start, end) do PCM mapeado para mono 16kHz, bloco a bloco (o último é o flush)."""
+    resampler = StreamingResampler(source.sample_rate, TARGET_RATE)
+    block = max(1, int(block_seconds * source.sample_rate))
+    for position in range(start, end, block):
+        frames = np.ascontiguousarray(source.pcm[position:min(position + block, end)]).reshape(-1)
+        yield resampler.process(to_mono(convert_to_float32(frames), source.channels))
+    tail = resampler.flush()
+    if len(tail):
+        yield tail
+
+def iter_audio_blocks(source, block_seconds=BLOCK_SECONDS):
+    """Gera o áudio mono float32 a 16kHz do arquivo em blocos consecutivos de ~`block_seconds`."""
+    return _resample_blocks(source, 0, len(source.pcm), block_seconds)
+
+def read_chunk(source, start, end):
+    """
+    Áudio mono float32 a 16kHz das amostras [start, end) do arquivo, lendo do PCM mapeado só
+    o trecho necessário. Igual ao mesmo intervalo do arquivo inteiro convertido (load_audio).
+    """
+    resampler = StreamingResampler(source.sample_rate, TARGET_RATE)
+    up, down = resampler.up, resampler.down
+    # Meio filtro de margem de cada lado; o início é múltiplo de `down`, para que as saídas do
+    # trecho caiam exatamente nas posições das saídas do arquivo inteiro
+    margin = resampler.half_len // up + 1
+    source_start = max(0, start * down // up - margin) // down * down
+    source_end = min(len(source.pcm), -(-end * down // up) + margin)
+    resampled = np.concatenate(list(_resample_blocks(source, source_start, source_end, BLOCK_SECONDS)))
+    offset = source_start * up // down
+    return resampled[start - offset:end - offset]
+
+def load_audio(path, sample_rate=None, channels=None, block_seconds=BLOCK_SECONDS):
+    """
+    Lê um arquivo inteiro e devolve o áudio mono float32 a 16kHz (~230 MB por hora).
+    O modo offline não usa esta função: ele percorre o arquivo com iter_audio_blocks e read_chunk.
+    """
+    source = open_audio(path, sample_rate=sample_rate, channels=channels)
+    audio = np.empty(audio_length(source), dtype=np.float32)
+    position = 0
+    for block in iter_audio_blocks(source, block_seconds):
+        audio[position:position + len(block)] = block
+        position += len(block)
+    return audio[:position]
+
+def plan_chunks(audio, max_chunk_seconds=15.0, padding_seconds=0.2, vad=None):
+    """
+    Divide o áudio (16kHz) nos silêncios: trechos de fala do VAD (com `padding_seconds` de
+    margem) são agrupados enquanto cabem em `max_chunk_seconds`; falas mais longas que isso
+    são cortadas em partes iguais. Retorna [(início, fim)] em amostras.
+    `audio` é um array ou um iterável de blocos consecutivos (iter_audio_blocks): o VAD
+    percorre bloco a bloco e só os limites das falas ficam em memória.
+    """
+    if not 0 < max_chunk_seconds <= MAX_CHUNK_SECONDS:
+        raise ValueError(f"max_chunk_seconds must be in (0, {MAX_CHUNK_SECONDS:.0f}].")
+    vad = vad or FrameVAD(sample_rate=TARGET_RATE)
+    blocks = [audio] if isinstance(audio, np.ndarray) else audio
+
+    # Falas [(frame inicial, frame final)]; o FrameVAD guarda o estado (e o frame incompleto) entre blocos
+    runs = []
+    total_samples = 0
+    frames_seen = 0
+    run_start = None
+    for block in blocks:
+        total_samples += len(block)
+        speech = vad.process(block, TARGET_RATE).speech
+        edges = np.diff(np.concatenate([[run_start is not None], speech]).astype(np.int8))
+        for index in np.flatnonzero(edges):
+            if edges[index] == 1:
+                run_start = frames_seen + int(index)
+            else:
+                runs.append((run_start, frames_seen + int(index)))
+                run_start = None
+        frames_seen += len(speech)
+    if run_start is not None:
+        runs.append((run_start, frames_seen))
+
+    max_samples = int(max_chunk_seconds * TARGET_RATE)
+    padding = int(padding_seconds * TARGET_RATE)
+    chunks = []
+    for start, end in runs:
+        start = max(start * vad.frame_length - padding, 0)
+        end = min(end * vad.frame_length + padding, total_samples)
+        if chunks and start <= chunks[-1][1]:
+            start = chunks[-1][1] # Margens sobrepostas: o trecho anterior já cobre o começo
+        if chunks and end - chunks[-1][0] <= max_samples:
+            chunks[-1][1] = end
+            continue
+        pieces = -(-(end - start) // max_samples)
+        bounds = np.linspace(start, end, pieces + 1).astype(int)
+        chunks.extend([int(a), int(b)] for a, b in zip(bounds[:-1], bounds[1:]))
+    return [tuple(chunk) for chunk in chunks if chunk[1] > chunk[0]]
+
+def _transcribe(transcriber, audios, language, beam_size):
+    if hasattr(transcriber, "transcribe_batch"):
+        texts, _ = transcriber.transcribe_batch(audios, language=language, beam_size=beam_size)
+        return texts
+    return [transcriber.transcribe(audio, language=language, beam_size=beam_size)[0] for audio in audios]
+
+def _translate(translator, texts):
+    if translator is None:
+        return [""] * len(texts)
+    indexes = [i for i, text in enumerate(texts) if text]
+    translations = [""] * len(texts)
+    if indexes:
+        translated, _ = translator.translate_batch([texts[i] for i in indexes])
+        for i, text in zip(indexes, translated):
+            translations[i] = text
+    return translations
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+def _read_journal(path):
+    """Trechos já concluídos ({índice: registro}); uma última linha incompleta (interrupção) é ignorada."""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[record["index"]] = record
+    return done
+
+def _write_json(path, data):
+    # Grava em um arquivo temporário e renomeia: uma interrupção nunca deixa o manifesto pela metade
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+def caption_file(path, transcriber, translator=None, output_dir="captions", formats=FORMATS, language="en",
+                 target_language="pt", beam_size=5, workers=2, batch_size=8, max_chunk_seconds=15.0,
+                 sample_rate=None, channels=None, config=None):
+    """
+    Legenda um arquivo, retomando um processamento interrompido quando possível.
+    :param config: Identifica a configuração (modelo, idiomas...); mudou, o arquivo é refeito do zero.
+    :return: Estatísticas do arquivo (duração, tempo de parede, múltiplo do tempo real, trechos).
+    """
+    started = time.time()
+    name = os.path.splitext(os.path.basename(path))[0]
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, f"{name}.manifest.json")
+    journal_path = os.path.join(output_dir, f"{name}.partial.jsonl")
+    config = dict(config or {}, language=language, target_language=target_language, beam_size=beam_size,
+                  max_chunk_seconds=max_chunk_seconds, formats=list(formats))
+    fingerprint = _fingerprint(path)
+
+    manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("fingerprint") != fingerprint or manifest.get("config") != config:
+            manifest = None # Arquivo ou configuração diferentes: recomeça
+    if manifest is not None and manifest.get("complete"):
+        return {"file": path, "status": "skipped", "audio_seconds": manifest["audio_seconds"]}
+
+    source = open_audio(path, sample_rate=sample_rate, channels=channels)
+    if manifest is None:
+        manifest = {"source": os.path.abspath(path), "fingerprint": fingerprint, "config": config,
+                    "audio_seconds": audio_length(source) / TARGET_RATE,
+                    "chunks": [list(chunk) for chunk in plan_chunks(iter_audio_blocks(source), max_chunk_seconds)],
+                    "complete": False}
+        _write_json(manifest_path, manifest)
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+    chunks = manifest["chunks"]
+    done = _read_journal(journal_path)
+    resumed = len(done)
+
+    pending = [i for i in range(len(chunks)) if i not in done]
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    lock = threading.Lock()
+
+    with open(journal_path, "a", encoding="utf-8") as journal:
+        def run_batch(indexes):
+            # Só o áudio dos trechos deste lote é lido e convertido
+            texts = _transcribe(transcriber, [read_chunk(source, *chunks[i]) for i in indexes], language, beam_size)
+            translations = _translate(translator, texts)
+            records = [{"index": i, "start": chunks[i][0] / TARGET_RATE, "end": chunks[i][1] / TARGET_RATE,
+                        "source": text.strip(), "translation": translation}
+                       for i, text, translation in zip(indexes, texts, translations)]
+            with lock:
+                for record in records:
+                    journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    done[record["index"]] = record
+                journal.flush()
+            _chunks_processed.inc(len(records))
+
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="offline") as pool:
+            for future in as_completed([pool.submit(run_batch, batch) for batch in batches]):
+                future.result()
+
+    records = [done[i] for i in sorted(done) if done[i]["source"]]
+    sink = TranscriptSink(output_dir, session_name=name, formats=formats, session_start=0.0,
+                          max_pending=len(records) + 1, language=target_language).start()
+    for record in records:
+        sink.add(record["source"], record["translation"], record["start"], record["end"])
+    sink.close()
+
+    manifest["complete"] = True
+    _write_json(manifest_path, manifest)
+    os.remove(journal_path)
+
+    wall_seconds = time.time() - started
+    return {
+        "file": path,
+        "status": "resumed" if resumed else "done",
+        "audio_seconds": round(manifest["audio_seconds"], 3),
+        "wall_seconds": round(wall_seconds, 3),
+        "real_time_multiple": round(manifest["audio_seconds"] / wall_seconds, 2) if wall_seconds else None,
+        "chunks": len(chunks),
+        "chunks_resumed": resumed,
+        "segments": len(records),
+    }
+
+def caption_files(paths, transcriber, translator=None, **kwargs):
+    """Legenda vários arquivos em sequência (o paralelismo fica dentro de cada arquivo). Retorna o relatório."""
+    started = time.time()
+    files = [caption_file(path, transcriber, translator, **kwargs) for path in paths]
+    wall_seconds = time.time() - started
+    audio_seconds = sum(f["audio_seconds"] for f in files if f["status"] != "skipped")
+    report = {
+        "files": files,
+        "audio_seconds": round(audio_seconds, 3),
+        "wall_seconds": round(wall_seconds, 3),
+        "real_time_multiple": round(audio_seconds / wall_seconds, 2) if wall_seconds else None,
+    }
+    _rt_multiple.set(report["real_time_multiple"] or 0.0)
+    return report
+
+def build_models(args):
+    if args.stt == "stub":
+        from pipeline.benchmark import StubTranscriber
+        transcriber_factory = lambda: StubTranscriber(latency_ms=args.stub_stt_ms)
+    else:
+        def transcriber_factory():
+            from speech.whisper_engine import WhisperTranscriber
+            return WhisperTranscriber(model_name=args.stt, cpu_threads=args.cpu_threads, num_workers=args.workers)
+
+    translator_factory = None
+    if args.translator == "stub":
+        from pipeline.benchmark import StubTranslator
+        translator_factory = lambda: StubTranslator(latency_ms=args.stub_translation_ms)
+    elif args.translator == "argos":
+        def translator_factory():
+            from translation.translator import TranslationEngine
+            return TranslationEngine(from_code=args.from_code, to_code=args.to_code)
+
+    from pipeline.startup import load_models
+    models = load_models({"transcriber": transcriber_factory, "translator": translator_factory},
+                         warmup=args.stt != "stub")
+    return models["transcriber"], models.get("translator")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Legenda arquivos de áudio gravados (transcrição + tradução em lote).")
+    parser.add_argument("files", nargs="+", help="Arquivos WAV (ou PCM bruto com --raw-rate/--raw-channels)")
+    parser.add_argument("--output-dir", default="captions", help="Pasta das legendas e dos manifestos de retomada")
+    parser.add_argument("--formats", default="srt,vtt,jsonl", help="Formatos de saída separados por vírgula")
+    parser.add_argument("--stt", default="base", help="Modelo Whisper (tiny, base, small...) ou 'stub'")
+    parser.add_argument("--translator", choices=["argos", "stub", "none"], default="argos")
+    parser.add_argument("--from-code", default="en")
+    parser.add_argument("--to-code", default="pt")
+    parser.add_argument("--workers", type=int, default=max(1, min(4, (os.cpu_count() or 2) // 2)),
+                        help="Lotes decodificados em paralelo (decodificações simultâneas no modelo)")
+    parser.add_argument("--cpu-threads", type=int, default=0, help="Threads do CTranslate2 por decodificação (0 = padrão)")
+    parser.add_argument("--batch-size", type=int, default=8, help="Trechos por decodificação em lote")
+    parser.add_argument("--beam-size", type=int, default=5)
+    parser.add_argument("--max-chunk", type=float, default=15.0, help="Duração máxima (s) de cada trecho (até 30)")
+    parser.add_argument("--raw-rate", type=int, help="Taxa de amostragem de arquivos PCM brutos")
+    parser.add_argument("--raw-channels", type=int, help="Número de canais de arquivos PCM brutos")
+    parser.add_argument("--stub-stt-ms", type=float, default=150.0)
+    parser.add_argument("--stub-translation-ms", type=float, default=30.0)
+    parser.add_argument("--output", help="Grava o relatório JSON neste arquivo (padrão: stdout)")
+    return parser.parse_args(argv)
+
+def main_cli(argv=None):
+    args = parse_args(argv)
+    transcriber, translator = build_models(args)
+    report = caption_files(
+        args.files, transcriber, translator,
+        output_dir=args.output_dir,
+        formats=tuple(fmt.strip() for fmt in args.formats.split(",") if fmt.strip()),
+        language=args.from_code,
+        target_language=args.to_code if translator is not None else args.from_code,
+        beam_size=args.beam_size,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        max_chunk_seconds=args.max_chunk,
+        sample_rate=args.raw_rate,
+        channels=args.raw_channels,
+        config={"stt": args.stt, "translator": args.translator},
+    )
+    if hasattr(translator, "close"):
+        translator.close()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output, file=sys.stdout)
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,136 @@
+"""
+Orçamento de núcleos de CPU por estágio do pipeline.
+
+Sem configuração, o WhisperModel e o Translator do CTranslate2 usam cada um cerca de uma
+thread por núcleo e disputam os mesmos núcleos com a thread de captura e a do Tk, o que
+aparece como picos de latência. `plan_resources` divide os núcleos disponíveis em:
+  - captura: captura, pré-processamento e UI (leves, mas sensíveis a atraso);
+  - stt: threads do CTranslate2 do Whisper (`cpu_threads`);
+  - tradução: threads do CTranslate2 do Argos (`inter_threads` = 1, `intra_threads`).
+
+Com `pin=True`, cada thread chama `plan.pin(estágio)` ao começar e fica restrita aos seus
+núcleos. No Linux a afinidade é por thread e herdada pelas threads criadas depois, então as
+threads internas do CTranslate2 (criadas junto com o modelo) herdam a afinidade de quem
+carregou o modelo. No Windows só a thread que chama é fixada; o processo de STT separado
+(pipeline.stt_process) é fixado inteiro com `pin_current_process`.
+"""
+import os
+import sys
+import threading
+
+STAGES = ("capture", "stt", "translation")
+
+def available_cores():
+    """Núcleos que este processo pode usar (no Linux, respeita a afinidade/cpuset atual)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def _windows_mask(cores):
+    return sum(1 << core for core in cores)
+
+def pin_current_thread(cores):
+    """Restringe a thread atual aos `cores`. Retorna False se não foi possível."""
+    cores = sorted(set(cores))
+    if not cores:
+        return False
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            # No Linux o "pid" aceito pela syscall é o id da thread
+            os.sched_setaffinity(threading.get_native_id(), cores)
+            return True
+        if sys.platform == "win32":
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentThread.restype = ctypes.c_void_p
+            kernel32.SetThreadAffinityMask.argtypes = (ctypes.c_void_p, ctypes.c_size_t)
+            return kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), _windows_mask(cores)) != 0
+    except (OSError, ValueError) as e:
+        print(f"[Resources] Não foi possível fixar a thread nos núcleos {cores}: {e}")
+    return False
+
+def pin_current_process(cores):
+    """
+    Restringe o processo atual aos `cores`. No Linux vale para a thread atual e para as
+    criadas depois dela, então deve ser chamado antes de criar threads.
+    """
+    cores = sorted(set(cores))
+    if not cores:
+        return False
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+            kernel32.SetProcessAffinityMask.argtypes = (ctypes.c_void_p, ctypes.c_size_t)
+            return kernel32.SetProcessAffinityMask(kernel32.GetCurrentProcess(), _windows_mask(cores)) != 0
+        except (OSError, ValueError) as e:
+            print(f"[Resources] Não foi possível fixar o processo nos núcleos {cores}: {e}")
+            return False
+    return pin_current_thread(cores)
+
+class ResourcePlan:
+    """
+    Núcleos e número de threads de cada estágio (ver `plan_resources`).
+    `stt_threads`/`translation_threads` podem ser maiores que a lista de núcleos do estágio
+    quando pedidos explicitamente; os núcleos só importam com `pin=True`.
+    """
+    def __init__(self, capture_cores, stt_cores, translation_cores, stt_threads=None, translation_threads=None,
+                 pin=False):
+        self.cores = {"capture": list(capture_cores), "stt": list(stt_cores), "translation": list(translation_cores)}
+        self.stt_threads = stt_threads or len(self.cores["stt"])
+        self.translation_threads = translation_threads or len(self.cores["translation"])
+        self.pin_threads = pin
+
+    def stt_options(self):
+        """Argumentos de thread do WhisperTranscriber."""
+        return {"cpu_threads": self.stt_threads}
+
+    def translation_options(self, num_engines=1):
+        """
+        Argumentos de thread do TranslationEngine. Um único decode por vez por engine
+        (`inter_threads` = 1); com vários idiomas em paralelo, o orçamento é dividido entre eles.
+        """
+        return {"inter_threads": 1, "intra_threads": max(1, self.translation_threads // max(1, num_engines))}
+
+    def pin(self, stage):
+        """Fixa a thread atual nos núcleos do estágio, se o plano pede fixação."""
+        if not self.pin_threads:
+            return False
+        return pin_current_thread(self.cores[stage])
+
+    def summary(self):
+        parts = [f"{stage}: {','.join(map(str, self.cores[stage]))}" for stage in STAGES]
+        threads = f"STT {self.stt_threads} threads, tradução {self.translation_threads} threads"
+        return f"{threads} | núcleos {' | '.join(parts)}{' (fixados)' if self.pin_threads else ''}"
+
+    def as_dict(self):
+        return {"cores": {stage: list(cores) for stage, cores in self.cores.items()},
+                "stt_threads": self.stt_threads, "translation_threads": self.translation_threads,
+                "pin": self.pin_threads}
+
+def plan_resources(total_cores=None, stt_threads=None, translation_threads=None, reserved_cores=1, pin=False,
+                   cores=None):
+    """
+    Divide os núcleos entre os estágios.
+    :param total_cores: Quantos dos núcleos disponíveis usar (padrão: todos).
+    :param stt_threads: Threads do Whisper (padrão: o que sobra depois da captura e da tradução).
+    :param translation_threads: Threads do Argos (padrão: 1/3 dos núcleos fora da captura, mínimo 1).
+    :param reserved_cores: Núcleos reservados para captura, pré-processamento e UI.
+    :param cores: Lista de núcleos a dividir (padrão: `available_cores()`).
+    Em 8 núcleos: captura no 0, STT nos 1-5 e tradução nos 6-7. Com poucos núcleos os estágios
+    passam a compartilhar núcleos em vez de ficar sem nenhum.
+    """
+    cores = list(cores) if cores is not None else available_cores()
+    if total_cores:
+        cores = cores[:total_cores]
+    reserved = min(reserved_cores, len(cores) - 1) if len(cores) > 1 else 0
+    capture = cores[:reserved] or cores[:1]
+    rest = cores[reserved:] or cores
+
+    translation_count = min(translation_threads or max(1, len(rest) // 3), len(rest))
+    stt_count = min(stt_threads or max(1, len(rest) - translation_count), len(rest))
+    stt = rest[:stt_count]
+    translation = rest[stt_count:stt_count + translation_count] or rest[-translation_count:]
+    return ResourcePlan(capture, stt, translation, stt_threads=stt_threads or len(stt),
+                        translation_threads=translation_threads or len(translation), pin=pin)
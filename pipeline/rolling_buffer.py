@@ -5,18 +5,77 @@ class RollingAudioBuffer:
     Mantém um buffer contínuo de áudio para processamento em tempo real (rolling buffer).
     Permite adicionar pequenos trechos de áudio (ex: 0.3s ou 0.4s) e extrair janelas maiores
     (ex: 2.0s ou 2.5s) a uma taxa de atualização específica (ex: 0.5s).
+
+    Internamente é um ring buffer de capacidade fixa com layout espelhado: cada amostra é
+    escrita duas vezes (posição `p` e `p + capacidade`), de modo que qualquer janela que
+    termina na cabeça de escrita é sempre contígua na memória. Assim `append` escreve no
+    lugar, sem `np.concatenate`, e as janelas retornadas são views somente-leitura (sem cópia).
+
+    Uma janela retornada permanece válida até que `capacidade - tamanho_da_janela` novas
+    amostras sejam adicionadas (8.5s com os valores padrão); um único chunk com `capacidade`
+    amostras ou mais invalida todas as janelas. Quem entrega a janela a outra thread (caixa
+    de correio, MultiStreamEngine) deve entregar `window.copy()`.
     """
-    def __init__(self, window_size=2.5, update_rate=0.5, sample_rate=16000):
+    def __init__(self, window_size=2.5, update_rate=0.5, sample_rate=16000, max_duration=10.0):
         self.window_size = window_size
         self.update_rate = update_rate
         self.sample_rate = sample_rate
-        
-        self.buffer = np.array([], dtype=np.float32)
+
+        # Limite do buffer global para evitar estouro de memória (ex: limite de 10 segundos)
+        self.max_buffer_size = int(max_duration * sample_rate)
+
+        # Layout espelhado: 2x a capacidade, alocado uma única vez
+        self._storage = np.zeros(2 * self.max_buffer_size, dtype=np.float32)
+        self._write_pos = 0   # Próxima posição de escrita (0 <= pos < capacidade)
+        self._filled = 0      # Quantas amostras válidas existem (<= capacidade)
+        self.total_samples = 0 # Amostras adicionadas desde o último clear (contador absoluto)
+
         self.samples_since_last_update = 0
         self.has_first_window = False
-        
-        # Limite do buffer global para evitar estouro de memória (ex: limite de 10 segundos)
-        self.max_buffer_size = int(10 * sample_rate)
+
+    def __len__(self):
+        return self._filled
+
+    @property
+    def buffer(self):
+        """Todo o áudio válido em ordem cronológica (view somente-leitura)."""
+        return self.latest(self._filled)
+
+    def _write(self, new_audio):
+        """Escreve as amostras no ring buffer (nas duas metades do espelho)."""
+        capacity = self.max_buffer_size
+        n = len(new_audio)
+        if n >= capacity:
+            # Só as últimas `capacidade` amostras sobrevivem
+            new_audio = new_audio[-capacity:]
+            self._storage[:capacity] = new_audio
+            self._storage[capacity:] = new_audio
+            self._write_pos = 0
+            self._filled = capacity
+            return
+
+        pos = self._write_pos
+        first = min(n, capacity - pos)
+        self._storage[pos:pos + first] = new_audio[:first]
+        self._storage[pos + capacity:pos + capacity + first] = new_audio[:first]
+        rest = n - first
+        if rest:
+            self._storage[:rest] = new_audio[first:]
+            self._storage[capacity:capacity + rest] = new_audio[first:]
+
+        self._write_pos = (pos + n) % capacity
+        self._filled = min(self._filled + n, capacity)
+
+    def latest(self, num_samples):
+        """
+        Retorna as `num_samples` amostras mais recentes como uma view contígua e
+        somente-leitura (sem cópia).
+        """
+        num_samples = min(int(num_samples), self._filled)
+        end = self._write_pos + self.max_buffer_size
+        view = self._storage[end - num_samples:end]
+        view.flags.writeable = False
+        return view
 
     def append(self, new_audio: np.ndarray):
         """
@@ -24,35 +83,36 @@ class RollingAudioBuffer:
         Retorna o frame para transcrição se a taxa de atualização for atingida e
         houver áudio suficiente para uma janela, caso contrário retorna None.
         """
-        self.buffer = np.concatenate((self.buffer, new_audio))
+        self._write(new_audio)
         self.samples_since_last_update += len(new_audio)
-        
-        # Mantém o buffer global em um tamanho máximo
-        if len(self.buffer) > self.max_buffer_size:
-            self.buffer = self.buffer[-self.max_buffer_size:]
-            
-        window_samples = int(self.window_size * self.sample_rate)
+        self.total_samples += len(new_audio)
+
+        window_samples = min(int(self.window_size * self.sample_rate), self.max_buffer_size)
         update_samples = int(self.update_rate * self.sample_rate)
-        
+
         # Lógica para retornar o frame:
         # Se ainda não atingiu a primeira janela completa de (ex: 2s ou 2.5s)
-        if len(self.buffer) >= window_samples:
+        if self._filled >= window_samples:
             if not self.has_first_window:
                 self.has_first_window = True
                 self.samples_since_last_update = 0
-                return self.buffer[-window_samples:]
-            
+                return self.latest(window_samples)
+
             # Depois da primeira janela, atualiza conforme a taxa de update (ex: 0.5s)
             if self.samples_since_last_update >= update_samples:
                 # Usamos modulo caso um chunk maior que update_samples seja inserido
                 # para que não emita múltiplas vezes acidentalmente em um único update.
                 self.samples_since_last_update %= update_samples
-                return self.buffer[-window_samples:]
-        
+                return self.latest(window_samples)
+
         return None
 
     def clear(self):
-        """Limpa o buffer global."""
-        self.buffer = np.array([], dtype=np.float32)
+        """
+        Limpa o buffer global (sem realocar a memória). A cabeça de escrita não volta ao
+        início: janelas já entregues (views) continuam válidas depois do clear.
+        """
+        self._filled = 0
+        self.total_samples = 0
         self.samples_since_last_update = 0
         self.has_first_window = False
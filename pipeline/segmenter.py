@@ -0,0 +1,94 @@
+"""
+Segmentação em enunciados (utterances) nos pontos finais do VAD.
+
+Enquanto o VAD indica fala, o áudio a 16kHz é acumulado no enunciado aberto; as janelas
+deslizantes do RollingAudioBuffer continuam gerando legendas parciais só para essa cauda.
+Quando o VAD fecha o segmento (fim da fala + hangover), o enunciado inteiro é entregue
+uma única vez para a decodificação final (beam search) e a tradução final, e o buffer
+deslizante recomeça do zero. Monólogos sem pausa são cortados em `max_utterance_seconds`,
+o que limita quanto áudio cada decodificação cobre.
+"""
+import numpy as np
+
+from pipeline.metrics import METRICS
+
+_utterances = METRICS.counter("utterances_finalized")
+_utterances_forced = METRICS.counter("utterances_forced_cut", description="Enunciados cortados pelo limite de duração")
+_utterance_seconds = METRICS.histogram("utterance_seconds", (0.5, 1, 2, 3, 5, 8, 12, 15, 30))
+
+class UtteranceSegmenter:
+    def __init__(self, sample_rate=16000, max_utterance_seconds=15.0, min_utterance_seconds=0.3):
+        """
+        :param max_utterance_seconds: Duração máxima de um enunciado (corte forçado).
+        :param min_utterance_seconds: Enunciados mais curtos são descartados (cliques, ruídos).
+        """
+        self.sample_rate = sample_rate
+        self.min_samples = int(min_utterance_seconds * sample_rate)
+        self._audio = np.zeros(int(max_utterance_seconds * sample_rate), dtype=np.float32)
+        self._length = 0
+
+    @property
+    def in_utterance(self):
+        return self._length > 0
+
+    @property
+    def seconds(self):
+        """Duração do enunciado aberto."""
+        return self._length / self.sample_rate
+
+    def push(self, audio, speech):
+        """
+        Recebe o áudio a 16kHz de um chunk e a decisão (suavizada) do VAD: um bool para o
+        chunk inteiro ou uma máscara por amostra (um chunk acumulado pode conter fala e pausa).
+        Retorna a lista de enunciados finalizados (cópias float32), possivelmente vazia.
+        Trechos sem fala não são acumulados; o primeiro deles fecha o enunciado aberto.
+        """
+        mask = np.broadcast_to(np.asarray(speech, dtype=bool), (len(audio),))
+        # Limites dos trechos contíguos de fala / não fala
+        bounds = [0, *(np.flatnonzero(mask[1:] != mask[:-1]) + 1), len(audio)]
+        finished = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            if start == end:
+                continue
+            if mask[start]:
+                finished.extend(self._append(audio[start:end]))
+            else:
+                utterance = self.flush()
+                if utterance is not None:
+                    finished.append(utterance)
+        return finished
+
+    def _append(self, audio):
+        finished = []
+        capacity = len(self._audio)
+        while len(audio):
+            if self._length == capacity:
+                # Monólogo sem pausa: fecha o enunciado no limite de duração e continua em um novo
+                utterance = self._finalize(forced=True)
+                if utterance is not None:
+                    finished.append(utterance)
+            take = min(len(audio), capacity - self._length)
+            self._audio[self._length:self._length + take] = audio[:take]
+            self._length += take
+            audio = audio[take:]
+        return finished
+
+    def flush(self):
+        """Fecha o enunciado aberto (fim da fala ou fim da fonte). Retorna o áudio ou None."""
+        if self._length == 0:
+            return None
+        return self._finalize(forced=False)
+
+    def _finalize(self, forced):
+        length, self._length = self._length, 0
+        if length < self.min_samples:
+            return None
+        _utterances.inc()
+        if forced:
+            _utterances_forced.inc()
+        _utterance_seconds.observe(length / self.sample_rate)
+        return self._audio[:length].copy()
+
+    def reset(self):
+        """Descarta o enunciado aberto."""
+        self._length = 0
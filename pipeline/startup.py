@@ -0,0 +1,65 @@
+"""
+Inicialização rápida do pipeline.
+
+- Os imports pesados (faster_whisper/ctranslate2, argostranslate) só acontecem dentro das
+  fábricas dos modelos, não no import dos módulos.
+- Whisper e Argos carregam em paralelo (o carregamento dos modelos CTranslate2 roda em C++
+  e libera o GIL), cada um seguido de uma inferência curta de aquecimento, para que a
+  primeira janela real não pague o custo da inferência "fria".
+- `STARTUP` marca os tempos desde o início do processo até a primeira legenda exibida.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline.metrics import METRICS
+
+_time_to_first_subtitle = METRICS.gauge("startup_time_to_first_subtitle_ms")
+_models_ready = METRICS.gauge("startup_models_ready_ms")
+
+class StartupTimer:
+    """Marca etapas da inicialização em ms desde `start` (cada etapa é marcada uma única vez)."""
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.time()
+        self.marks = {}
+
+    def mark(self, stage):
+        if stage not in self.marks:
+            self.marks[stage] = (time.time() - self.start) * 1000
+        return self.marks[stage]
+
+    def first_subtitle(self):
+        """Chamado a cada legenda exibida; só a primeira é registrada e reportada."""
+        if "first_subtitle" in self.marks:
+            return
+        elapsed = self.mark("first_subtitle")
+        _time_to_first_subtitle.set(elapsed)
+        print(f"\n[Startup] Primeira legenda em {elapsed:.0f}ms ({self.summary()})")
+
+    def summary(self):
+        return ", ".join(f"{stage}: {ms:.0f}ms" for stage, ms in self.marks.items())
+
+# O relógio começa quando o módulo é importado (main.py importa este módulo primeiro)
+STARTUP = StartupTimer()
+
+def _load(name, factory, warmup, timer):
+    model = factory()
+    timer.mark(f"{name}_loaded")
+    if warmup and hasattr(model, "warmup"):
+        model.warmup()
+        timer.mark(f"{name}_warm")
+    return model
+
+def load_models(factories, warmup=True, timer=STARTUP):
+    """
+    Carrega os modelos em paralelo e faz o aquecimento de cada um.
+    :param factories: {"nome": callable sem argumentos}; entradas None são ignoradas.
+    :return: {"nome": modelo}
+    """
+    factories = {name: factory for name, factory in factories.items() if factory is not None}
+    if not factories:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(factories), thread_name_prefix="model-load") as pool:
+        futures = {name: pool.submit(_load, name, factory, warmup, timer) for name, factory in factories.items()}
+        models = {name: future.result() for name, future in futures.items()}
+    _models_ready.set(timer.mark("models_ready"))
+    return models
@@ -0,0 +1,240 @@
+"""
+STT (e opcionalmente tradução) em um processo separado.
+
+O processo principal fica só com captura, pré-processamento e a UI; o Whisper (e o Argos,
+se pedido) rodam em outro processo, sem disputar o GIL com o áudio em tempo real.
+As janelas de áudio trafegam por slots de `multiprocessing.shared_memory` (sem pickle
+dos arrays); pela fila vão só comandos pequenos (slot, tamanho, idioma) e os resultados.
+
+Uso:
+    worker = ProcessSTTWorker(translator_spec=("translation.translator:TranslationEngine", {}))
+    worker.start()
+    text, ms = worker.transcribe(window, language="en")     # mesma API do WhisperTranscriber
+    translated, ms = worker.translator.incremental_translate(text)
+    worker.close()
+"""
+import importlib
+import itertools
+import multiprocessing as mp
+import queue
+import threading
+from concurrent.futures import Future
+from functools import partial
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from pipeline.resources import pin_current_process
+from pipeline.startup import load_models
+
+DEFAULT_TRANSCRIBER_SPEC = ("speech.whisper_engine:WhisperTranscriber", {"model_name": "base"})
+DEFAULT_TRANSLATOR_SPEC = ("translation.translator:TranslationEngine", {})
+# Intervalo (s) em que a thread leitora confere se o processo filho ainda está vivo
+LIVENESS_POLL_SECONDS = 0.5
+
+def _build(spec):
+    """Cria um objeto a partir de ("modulo:Classe", kwargs), importando no processo filho."""
+    path, kwargs = spec
+    module_name, attr = path.split(":")
+    return getattr(importlib.import_module(module_name), attr)(**kwargs)
+
+def _worker_main(shm_name, num_slots, slot_samples, requests, responses, transcriber_spec, translator_spec,
+                 cpu_affinity=None):
+    """Loop do processo filho: carrega os modelos e atende os comandos até receber None."""
+    if cpu_affinity:
+        # Antes de qualquer thread: as do CTranslate2 herdam a afinidade (pipeline.resources)
+        pin_current_process(cpu_affinity)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    slots = np.ndarray((num_slots, slot_samples), dtype=np.float32, buffer=shm.buf)
+    try:
+        # Mesmo carregamento paralelo com warm-up do processo principal
+        models = load_models({
+            "transcriber": partial(_build, transcriber_spec),
+            "translator": partial(_build, translator_spec) if translator_spec else None,
+        })
+        transcriber = models["transcriber"]
+        translator = models.get("translator")
+    except Exception as e:
+        responses.put((0, "error", f"Failed to load models: {e!r}"))
+        shm.close()
+        return
+    responses.put((0, "ok", "ready"))
+
+    while True:
+        message = requests.get()
+        if message is None:
+            break
+        request_id, command, args = message
+        try:
+            if command == "transcribe":
+                slot, num_samples, language, beam_size = args
+                result = transcriber.transcribe(slots[slot, :num_samples], language=language, beam_size=beam_size)
+            elif command == "transcribe_words":
+                slot, num_samples, language, initial_prompt, beam_size = args
+                result = transcriber.transcribe_words(slots[slot, :num_samples], language=language,
+                                                      initial_prompt=initial_prompt, beam_size=beam_size)
+            elif translator is not None and command in RemoteTranslator.COMMANDS:
+                result = getattr(translator, command)(*args)
+            else:
+                raise ValueError(f"Unknown command '{command}'")
+            responses.put((request_id, "ok", result))
+        except Exception as e:
+            responses.put((request_id, "error", repr(e)))
+
+    if translator is not None and hasattr(translator, "close"):
+        translator.close()
+    del slots
+    shm.close()
+
+class RemoteTranslator:
+    """Proxy do TranslationEngine que roda no processo do STT (mesma interface)."""
+    COMMANDS = ("incremental_translate", "translate", "translate_batch", "clear_state", "close")
+
+    def __init__(self, worker):
+        self._worker = worker
+
+    def incremental_translate(self, current_english_text):
+        return self._worker.call("incremental_translate", (current_english_text,))
+
+    def translate(self, text):
+        return self._worker.call("translate", (text,))
+
+    def translate_batch(self, texts):
+        return self._worker.call("translate_batch", (list(texts),))
+
+    def clear_state(self):
+        return self._worker.call("clear_state", ())
+
+    def close(self):
+        return self._worker.call("close", ())
+
+class ProcessSTTWorker:
+    """
+    Proxy do WhisperTranscriber que executa o modelo em um processo filho.
+
+    `num_slots` janelas podem estar em voo ao mesmo tempo (uma por thread chamadora);
+    cada chamada pega um slot livre da memória compartilhada, copia a janela para ele,
+    envia o comando e espera a resposta, que uma thread leitora entrega pelo id do pedido.
+    `cpu_affinity` (lista de núcleos, ver pipeline.resources) fixa o processo filho nesses núcleos.
+    """
+    def __init__(self, transcriber_spec=DEFAULT_TRANSCRIBER_SPEC, translator_spec=None, num_slots=4,
+                 max_window_seconds=30.0, sample_rate=16000, start_timeout=600.0, cpu_affinity=None):
+        self.transcriber_spec = transcriber_spec
+        self.translator_spec = translator_spec
+        self.num_slots = num_slots
+        self.slot_samples = int(max_window_seconds * sample_rate)
+        self.start_timeout = start_timeout
+        self.cpu_affinity = cpu_affinity
+        self.translator = RemoteTranslator(self) if translator_spec else None
+
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._failure = None # Erro que falha os pedidos depois que o processo filho terminou
+        self._free_slots = queue.Queue()
+        for slot in range(num_slots):
+            self._free_slots.put(slot)
+        self.process = None
+        self._shm = None
+
+    def start(self):
+        """Cria a memória compartilhada, inicia o processo e espera os modelos carregarem."""
+        ctx = mp.get_context("spawn") # Processo limpo, sem herdar threads/Tk do pai
+        self._shm = shared_memory.SharedMemory(create=True, size=self.num_slots * self.slot_samples * 4)
+        self._slots = np.ndarray((self.num_slots, self.slot_samples), dtype=np.float32, buffer=self._shm.buf)
+        self._requests = ctx.Queue()
+        self._responses = ctx.Queue()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(self._shm.name, self.num_slots, self.slot_samples, self._requests, self._responses,
+                  self.transcriber_spec, self.translator_spec, self.cpu_affinity),
+            daemon=True
+        )
+        self.process.start()
+
+        _, status, payload = self._responses.get(timeout=self.start_timeout)
+        if status != "ok":
+            self.close()
+            raise RuntimeError(payload)
+
+        self._reader = threading.Thread(target=self._read_responses, daemon=True)
+        self._reader.start()
+        return self
+
+    def _read_responses(self):
+        while True:
+            try:
+                message = self._responses.get(timeout=LIVENESS_POLL_SECONDS)
+            except queue.Empty:
+                # Fila vazia e processo morto (crash, OOM, kill): ninguém mais vai responder
+                if not self.process.is_alive():
+                    self._fail_pending(RuntimeError(
+                        f"STT process exited unexpectedly (exit code {self.process.exitcode})."))
+                    return
+                continue
+            if message is None:
+                return
+            request_id, status, payload = message
+            with self._pending_lock:
+                future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if status == "ok":
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(f"STT process error: {payload}"))
+
+    def _fail_pending(self, error):
+        """Falha os pedidos em voo e os próximos com `error`."""
+        with self._pending_lock:
+            self._failure = error
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(error)
+
+    def call(self, command, args, timeout=None):
+        """Envia um comando ao processo filho e espera o resultado."""
+        request_id = next(self._ids)
+        future = Future()
+        with self._pending_lock:
+            if self._failure is not None:
+                raise self._failure
+            self._pending[request_id] = future
+        self._requests.put((request_id, command, args))
+        return future.result(timeout=timeout)
+
+    def _call_with_window(self, command, audio_data, extra_args):
+        slot = self._free_slots.get()
+        try:
+            # Janelas maiores que o slot mantêm o áudio mais recente
+            audio_data = audio_data[-self.slot_samples:]
+            num_samples = len(audio_data)
+            self._slots[slot, :num_samples] = audio_data
+            return self.call(command, (slot, num_samples) + extra_args)
+        finally:
+            self._free_slots.put(slot)
+
+    def transcribe(self, audio_data, language=None, beam_size=1):
+        """Mesma interface de WhisperTranscriber.transcribe: retorna (texto, tempo_ms)."""
+        return self._call_with_window("transcribe", audio_data, (language, beam_size))
+
+    def transcribe_words(self, audio_data, language=None, initial_prompt=None, beam_size=1):
+        """Mesma interface de WhisperTranscriber.transcribe_words (modo streaming)."""
+        return self._call_with_window("transcribe_words", audio_data, (language, initial_prompt, beam_size))
+
+    def close(self):
+        """Encerra o processo filho e libera a memória compartilhada."""
+        if self.process is not None and self.process.is_alive():
+            self._requests.put(None)
+            self.process.join(timeout=10)
+            if self.process.is_alive():
+                self.process.terminate()
+        if self.process is not None:
+            self._responses.put(None) # Encerra a thread leitora
+        if self._failure is None:
+            self._fail_pending(RuntimeError("STT process closed."))
+        if self._shm is not None:
+            del self._slots
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
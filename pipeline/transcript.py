@@ -0,0 +1,210 @@
+"""
+Histórico da sessão: legendas confirmadas gravadas em JSONL, SRT e WebVTT.
+
+O worker de STT só chama `TranscriptSink.add`, que coloca o segmento em uma fila em memória
+e retorna imediatamente; uma thread de escrita agrupa os segmentos pendentes, grava todos
+os formatos de uma vez e faz um único flush por lote. Os arquivos são rotacionados por
+tamanho e/ou tempo (`<sessão>-001.srt`, `<sessão>-002.srt`, ...), e `close()` grava o que
+ainda estiver na fila antes de fechar.
+
+Os tempos das legendas (SRT/VTT) são relativos ao início da sessão, também nos arquivos
+rotacionados, para que todas as partes fiquem na mesma linha do tempo da gravação.
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+from pipeline.metrics import METRICS
+
+_segments_written = METRICS.counter("transcript_segments_written")
+_segments_dropped = METRICS.counter("transcript_segments_dropped",
+                                    description="Segmentos descartados com a fila do gravador cheia")
+_rotations = METRICS.counter("transcript_rotations")
+_batch_ms = METRICS.histogram("transcript_write_batch_ms", (1, 2, 5, 10, 25, 50, 100, 250))
+
+FORMATS = ("jsonl", "srt", "vtt")
+
+def format_timestamp(seconds, separator=","):
+    """00:01:02,345 (SRT) ou 00:01:02.345 (WebVTT, separator='.')."""
+    millis = int(round(max(seconds, 0.0) * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+class _RotatingFile:
+    """Arquivo de um formato; abre a próxima parte quando passa do tamanho ou da idade máximos."""
+    def __init__(self, base_path, extension, max_bytes=None, max_seconds=None):
+        self.base_path = base_path
+        self.extension = extension
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.part = 0
+        self.file = None
+        self.opened_at = 0.0
+        self.cues = 0 # Numeração das legendas SRT (recomeça em cada parte)
+
+    @property
+    def path(self):
+        if self.max_bytes is None and self.max_seconds is None:
+            return f"{self.base_path}.{self.extension}"
+        return f"{self.base_path}-{self.part:03d}.{self.extension}"
+
+    def _open(self):
+        self.part += 1
+        self.file = open(self.path, "w", encoding="utf-8")
+        self.opened_at = time.time()
+        self.cues = 0
+        if self.extension == "vtt":
+            self.file.write("WEBVTT\n\n")
+
+    def _should_rotate(self):
+        if self.cues == 0:
+            return False
+        if self.max_bytes is not None and self.file.tell() >= self.max_bytes:
+            return True
+        return self.max_seconds is not None and time.time() - self.opened_at >= self.max_seconds
+
+    def write(self, render):
+        """Grava `render(número da legenda)`, rotacionando antes se preciso."""
+        if self.file is None:
+            self._open()
+        elif self._should_rotate():
+            self.file.close()
+            _rotations.inc()
+            self._open()
+        self.cues += 1
+        self.file.write(render(self.cues))
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+class TranscriptSink:
+    def __init__(self, directory, session_name=None, formats=FORMATS, max_bytes=None, max_seconds=None,
+                 flush_interval=1.0, max_pending=10000, session_start=None, language="pt"):
+        """
+        :param directory: Pasta dos arquivos (criada se não existir).
+        :param session_name: Nome base dos arquivos (padrão: data/hora de início da sessão).
+        :param formats: Subconjunto de ("jsonl", "srt", "vtt").
+        :param max_bytes: Rotaciona cada arquivo ao passar deste tamanho.
+        :param max_seconds: Rotaciona cada arquivo após este tempo aberto.
+        :param flush_interval: Espera máxima (s) para juntar segmentos em um lote antes de gravar.
+        :param max_pending: Tamanho da fila; com ela cheia, novos segmentos são descartados (o STT nunca bloqueia).
+        :param session_start: Instante (time.time()) que corresponde a 00:00:00 nas legendas.
+        :param language: Idioma padrão das traduções registradas.
+        """
+        unknown = set(formats) - set(FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown transcript formats: {sorted(unknown)}")
+        self.session_start = session_start if session_start is not None else time.time()
+        session_name = session_name or time.strftime("session-%Y%m%d-%H%M%S", time.localtime(self.session_start))
+        os.makedirs(directory, exist_ok=True)
+        base_path = os.path.join(directory, session_name)
+        self.files = {fmt: _RotatingFile(base_path, fmt, max_bytes, max_seconds) for fmt in formats}
+        self.flush_interval = flush_interval
+        self.language = language
+        self.segments_written = 0
+        self.segments_dropped = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._last_end = None
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="transcript-writer", daemon=True)
+        self.thread.start()
+        return self
+
+    def add(self, source_text, translated_text, start, end, language=None, final=True):
+        """
+        Registra um segmento confirmado (não bloqueia). `start`/`end` são instantes time.time()
+        do áudio do segmento. Retorna False se o segmento foi descartado (fila cheia).
+        """
+        segment = {
+            "start": round(max(start - self.session_start, 0.0), 3),
+            "end": round(max(end - self.session_start, 0.0), 3),
+            "source": source_text,
+            "translation": translated_text,
+            "language": language or self.language,
+            "final": final,
+            "time": end,
+        }
+        self._last_end = end
+        try:
+            self._queue.put_nowait(segment)
+        except queue.Full:
+            self.segments_dropped += 1
+            _segments_dropped.inc()
+            return False
+        return True
+
+    def add_incremental(self, source_text, translated_text, end, window_seconds, language=None):
+        """
+        Segmento de uma janela parcial (sem segmentação): começa onde o anterior terminou,
+        limitado ao início da janela que o produziu.
+        """
+        start = end - window_seconds
+        if self._last_end is not None:
+            start = min(max(start, self._last_end), end)
+        return self.add(source_text, translated_text, start, end, language=language, final=False)
+
+    def _take_batch(self):
+        """Espera o primeiro segmento e junta os que chegarem até `flush_interval` depois."""
+        batch = [self._queue.get()]
+        deadline = time.time() + self.flush_interval
+        while batch[-1] is not None:
+            remaining = deadline - time.time()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            stop = batch[-1] is None
+            self._write([segment for segment in batch if segment is not None])
+            if stop:
+                for rotating in self.files.values():
+                    rotating.close()
+                return
+
+    def _write(self, segments):
+        if not segments:
+            return
+        start_time = time.time()
+        for segment in segments:
+            for fmt, rotating in self.files.items():
+                rotating.write(lambda cue_number: self._render(fmt, segment, cue_number))
+        for rotating in self.files.values():
+            rotating.flush()
+        self.segments_written += len(segments)
+        _segments_written.inc(len(segments))
+        _batch_ms.observe((time.time() - start_time) * 1000)
+
+    @staticmethod
+    def _render(fmt, segment, cue_number):
+        if fmt == "jsonl":
+            return json.dumps(segment, ensure_ascii=False) + "\n"
+        text = segment["translation"] or segment["source"]
+        if fmt == "srt":
+            timing = f"{format_timestamp(segment['start'])} --> {format_timestamp(segment['end'])}"
+            return f"{cue_number}\n{timing}\n{text}\n\n"
+        timing = f"{format_timestamp(segment['start'], '.')} --> {format_timestamp(segment['end'], '.')}"
+        return f"{timing}\n{text}\n\n"
+
+    def close(self):
+        """Grava os segmentos pendentes e fecha os arquivos."""
+        if self.thread is None:
+            return
+        self._queue.put(None) # Bloqueia só se a fila estiver cheia, até o gravador liberar espaço
+        self.thread.join()
+        self.thread = None
@@ -0,0 +1,297 @@
+import itertools
+import threading
+import time
+from functools import partial
+
+from audio.preprocess import AudioPreprocessor, precompute_common_filters
+from audio.vad import FrameVAD
+from pipeline.metrics import METRICS
+from pipeline.rolling_buffer import RollingAudioBuffer
+from translation.batcher import TranslationBatcher
+from translation.delta import TranscriptDelta
+
+_batch_size = METRICS.histogram("multistream_batch_size", (1, 2, 3, 4, 6, 8, 12, 16))
+_batch_ms = METRICS.histogram("multistream_batch_ms", (25, 50, 100, 200, 300, 500, 750, 1000, 2000, 5000))
+_superseded = METRICS.counter("multistream_windows_superseded",
+                              description="Pending windows replaced by a newer one from the same stream")
+_failed_batches = METRICS.counter("multistream_failed_batches",
+                                  description="Batches dropped because transcription or translation raised")
+
+class StreamSession:
+    """Per-stream state kept by MultiStreamEngine: pending window, translation delta and overlay."""
+    def __init__(self, stream_id, overlay=None, language="en"):
+        self.stream_id = stream_id
+        self.overlay = overlay
+        self.language = language
+        self.pending = None          # (window, seq); only the latest window is kept
+        self.delta = TranscriptDelta() # Incremental translation delta of this stream
+        self.cleared_seq = 0         # Windows submitted before the last clear_stream are stale
+        self.text = ""
+        self.translation = ""
+        self.windows_submitted = 0
+        self.windows_processed = 0
+        self.windows_superseded = 0
+
+class MultiStreamEngine:
+    """
+    Captions several audio streams with ONE loaded Whisper model.
+
+    Each stream submits its sliding windows; like the single-stream queue, only the latest
+    pending window per stream is kept. A single decode thread collects the pending windows
+    of all streams (waiting up to `max_wait_ms` for more streams to fill the batch), runs
+    them through `transcriber.transcribe_batch` (one batched encoder pass and one batched
+    decode, see WhisperTranscriber.transcribe_batch) and hands the new text of every stream
+    to a TranslationBatcher. The translations are delivered to each stream's overlay from the
+    batcher thread, so the next decode batch starts while the previous one is translated, and
+    texts of consecutive batches share one `translate_batch` call within the batcher's
+    `translation_batch_size` / `translation_latency_ms` budget.
+
+    Memory stays flat as streams are added (one model, one decode loop); transcribers
+    without `transcribe_batch` are called once per window.
+    """
+    def __init__(self, transcriber, translator=None, max_batch_size=8, max_wait_ms=20.0, on_result=None,
+                 translation_batch_size=16, translation_latency_ms=20.0):
+        """
+        :param translator: Shared TranslationEngine (only its stateless translate_batch is used;
+                           the incremental delta state lives in each StreamSession). Translators
+                           without translate_batch are called once per text on the decode thread.
+        :param on_result: Optional callback(session, text, translation, processing_time_ms).
+        :param translation_batch_size: Max texts per translate_batch call (TranslationBatcher).
+        :param translation_latency_ms: How long the batcher waits for more texts after the first one.
+        """
+        self.transcriber = transcriber
+        self.translator = translator
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.on_result = on_result
+        self.translation_batch_size = translation_batch_size
+        self.translation_latency_ms = translation_latency_ms
+        self._batcher = None
+
+        self.sessions = {}
+        self._cond = threading.Condition()
+        self._seq = itertools.count(1) # Orders window submissions and stream clears
+        self._running = False
+        self.thread = None
+        self.batches = 0
+        self.failed_batches = 0
+        self.windows_processed = 0
+
+    def add_stream(self, stream_id, overlay=None, language="en"):
+        with self._cond:
+            if stream_id in self.sessions:
+                raise ValueError(f"Stream '{stream_id}' already exists.")
+            session = StreamSession(stream_id, overlay=overlay, language=language)
+            self.sessions[stream_id] = session
+            return session
+
+    def submit(self, stream_id, window):
+        """
+        Queues the latest window of a stream, replacing its pending one (if any).
+        The window is copied: a RollingAudioBuffer view would be overwritten while it waits.
+        """
+        window = window.copy()
+        with self._cond:
+            session = self.sessions[stream_id]
+            if session.pending is not None:
+                session.windows_superseded += 1
+                _superseded.inc()
+            session.pending = (window, next(self._seq))
+            session.windows_submitted += 1
+            self._cond.notify_all()
+
+    def clear_stream(self, stream_id):
+        """Long silence on a stream: drops its pending window, translation state and subtitle."""
+        with self._cond:
+            session = self.sessions[stream_id]
+            session.pending = None
+            session.delta.reset()
+            session.cleared_seq = next(self._seq)
+            if session.overlay is not None:
+                session.overlay.update_text("")
+
+    def start(self):
+        if self.translator is not None and hasattr(self.translator, "translate_batch"):
+            self._batcher = TranslationBatcher(self.translator, max_batch_size=self.translation_batch_size,
+                                               max_latency_ms=self.translation_latency_ms)
+        self._running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def close(self):
+        """Stops the decode thread after the batch in flight, then delivers the pending translations."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+        if self._batcher is not None:
+            self._batcher.close()
+
+    def _pending_sessions(self):
+        return [s for s in self.sessions.values() if s.pending is not None]
+
+    def _take_batch(self):
+        """Blocks until windows are pending; returns [(session, window, seq)] (oldest first)."""
+        with self._cond:
+            self._cond.wait_for(lambda: not self._running or self._pending_sessions())
+            if not self._running:
+                return None
+            # Give the other streams a moment to join the batch
+            deadline = time.time() + self.max_wait_ms / 1000
+            while self._running and len(self._pending_sessions()) < min(self.max_batch_size, len(self.sessions)):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            pending = sorted(self._pending_sessions(), key=lambda s: s.pending[1])[:self.max_batch_size]
+            batch = []
+            for session in pending:
+                window, seq = session.pending
+                session.pending = None
+                batch.append((session, window, seq))
+            return batch
+
+    def _transcribe(self, windows, language):
+        if hasattr(self.transcriber, "transcribe_batch"):
+            return self.transcriber.transcribe_batch(windows, language=language)
+        start_time = time.time()
+        texts = [self.transcriber.transcribe(window, language=language)[0] for window in windows]
+        return texts, (time.time() - start_time) * 1000
+
+    def _translate(self, text):
+        """Synchronous path for translators without translate_batch."""
+        if self.translator is None:
+            return text
+        return self.translator.translate(text)[0]
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            self.batches += 1
+            _batch_size.observe(len(batch))
+
+            # Whisper's prompt carries the language, so streams are batched per language
+            by_language = {}
+            for item in batch:
+                by_language.setdefault(item[0].language, []).append(item)
+            for language, items in by_language.items():
+                try:
+                    texts, processing_time_ms = self._transcribe([window for _, window, _ in items], language)
+                    _batch_ms.observe(processing_time_ms)
+                    self._deliver(items, texts, processing_time_ms)
+                except Exception as e:
+                    # One bad window must not stop captioning for every stream; the next windows retry
+                    self.failed_batches += 1
+                    _failed_batches.inc()
+                    print(f"Error processing batch of streams {[session.stream_id for session, _, _ in items]}: {e!r}")
+
+    def _deliver(self, items, texts, processing_time_ms):
+        # Delta against each stream's previous transcript; only the new text is translated.
+        # Under the lock: clear_stream resets the delta, and a window from before the clear is dropped
+        deliveries = []
+        with self._cond:
+            for (session, _, seq), text in zip(items, texts):
+                if seq < session.cleared_seq:
+                    continue
+                session.text = text.strip()
+                deliveries.append((session, seq, session.text, session.delta.update(text)))
+
+        for session, seq, text, delta in deliveries:
+            if delta and self._batcher is not None:
+                future = self._batcher.submit(delta)
+                future.add_done_callback(partial(self._translated, session, seq, text, processing_time_ms))
+            else:
+                self._show(session, seq, text, self._translate(delta) if delta else "", processing_time_ms)
+
+    def _translated(self, session, seq, text, processing_time_ms, future):
+        """Runs on the batcher thread when a stream's translation is ready."""
+        try:
+            translation = future.result()
+        except Exception as e:
+            print(f"Error translating stream {session.stream_id}: {e!r}")
+            translation = ""
+        self._show(session, seq, text, translation, processing_time_ms)
+
+    def _show(self, session, seq, text, translation, processing_time_ms):
+        with self._cond:
+            session.windows_processed += 1
+            self.windows_processed += 1
+            if seq < session.cleared_seq:
+                return # The stream was cleared while this window was translated
+            if translation:
+                session.translation = translation
+                if session.overlay is not None:
+                    session.overlay.update_text(translation)
+        if self.on_result is not None:
+            self.on_result(session, text, translation, processing_time_ms)
+
+class StreamOverlayLines:
+    """
+    Shows the captions of several streams on ONE overlay (a single Tk window serves every
+    source): one "label: text" line per stream, in the order the streams were added.
+    `line(label)` returns the per-stream overlay to pass to MultiStreamEngine.add_stream.
+    """
+    def __init__(self, overlay):
+        self.overlay = overlay
+        self._lines = {}
+        self._lock = threading.Lock()
+
+    def line(self, label):
+        with self._lock:
+            self._lines.setdefault(label, "")
+        return _StreamLine(self, label)
+
+    def _set(self, label, text):
+        with self._lock:
+            self._lines[label] = text
+            combined = "\n".join(f"{name}: {line}" for name, line in self._lines.items() if line)
+            self.overlay.update_text(combined)
+
+class _StreamLine:
+    def __init__(self, lines, label):
+        self._lines = lines
+        self.label = label
+
+    def update_text(self, text):
+        self._lines._set(self.label, text)
+
+def feed_source(engine, stream_id, source, window_size=1.5, update_rate=0.2, chunk_duration=0.2, silence_clear=1.5):
+    """
+    Capture loop of one stream: audio source -> preprocessing/VAD -> rolling buffer -> engine.
+    Runs until a finite source finishes (or forever for live capture); start one thread per stream.
+    """
+    precompute_common_filters()
+    preprocessor = AudioPreprocessor(target_rate=16000, vad=FrameVAD())
+    rolling_buffer = RollingAudioBuffer(window_size=window_size, update_rate=update_rate, sample_rate=16000)
+    silence_duration = 0.0
+    source.start_capture(chunk_duration=chunk_duration)
+    try:
+        while True:
+            chunks = source.drain_chunks(timeout=0.5)
+            if not chunks:
+                if source.finished:
+                    return
+                continue
+
+            rate, channels = chunks[0][2], chunks[0][3]
+            audio_mono, speech_detected, _ = preprocessor.analyze(b"".join(c[0] for c in chunks), rate, channels)
+            if not speech_detected:
+                silence_duration += len(audio_mono) / rate
+                if silence_duration > silence_clear:
+                    rolling_buffer.clear()
+                    preprocessor.reset()
+                    engine.clear_stream(stream_id)
+                    continue
+            else:
+                silence_duration = 0.0
+
+            window = rolling_buffer.append(preprocessor.resample())
+            if window is not None:
+                engine.submit(stream_id, window)
+    finally:
+        source.close()
@@ -0,0 +1,174 @@
+import re
+import time
+
+import numpy as np
+
+def _normalize_word(word):
+    """Lower-case and strip punctuation so 'Hello,' and 'hello' agree."""
+    return re.sub(r"[^\w']", "", word.lower())
+
+def _join_words(words):
+    # faster-whisper words carry their own leading space (" Hello")
+    return "".join(w[2] for w in words).strip()
+
+class HypothesisBuffer:
+    """
+    Local-agreement commit policy (LocalAgreement-2).
+
+    Each decode produces a hypothesis: a list of (start, end, word) with absolute
+    timestamps. A word is committed once two consecutive hypotheses agree on it
+    (longest common prefix of the uncommitted part). Words that only appear in the
+    latest hypothesis stay tentative.
+    """
+    def __init__(self):
+        self.committed_tail = []   # Last committed words, used to drop repeats at the buffer start
+        self.last_committed_time = 0.0
+        self.previous = []         # Uncommitted part of the previous hypothesis
+        self.new = []
+
+    def insert(self, words):
+        """Takes a new hypothesis (absolute timestamps)."""
+        # Ignore words that belong to audio already committed (small tolerance for timestamp jitter)
+        new = [w for w in words if w[0] > self.last_committed_time - 0.1]
+
+        # Whisper often repeats the last committed words at the start of the trimmed buffer
+        if new and abs(new[0][0] - self.last_committed_time) < 1.0:
+            for n in range(min(len(self.committed_tail), len(new), 5), 0, -1):
+                tail = [_normalize_word(w[2]) for w in self.committed_tail[-n:]]
+                head = [_normalize_word(w[2]) for w in new[:n]]
+                if tail == head:
+                    new = new[n:]
+                    break
+        self.new = new
+
+    def flush(self):
+        """Commits the prefix on which the previous and the new hypothesis agree. Returns the committed words."""
+        committed = []
+        while self.new and self.previous:
+            if _normalize_word(self.new[0][2]) != _normalize_word(self.previous[0][2]):
+                break
+            committed.append(self.new.pop(0))
+            self.previous.pop(0)
+
+        if committed:
+            self.last_committed_time = committed[-1][1]
+            self.committed_tail = (self.committed_tail + committed)[-5:]
+        self.previous = self.new
+        self.new = []
+        return committed
+
+    @property
+    def tentative(self):
+        return self.previous
+
+    def reset(self):
+        self.committed_tail = []
+        self.last_committed_time = 0.0
+        self.previous = []
+        self.new = []
+
+class StreamingTranscriber:
+    """
+    Streaming transcription on top of WhisperTranscriber.
+
+    Instead of re-decoding every sliding window from scratch, it keeps its own buffer
+    with the audio that has not been committed yet, decodes it with the committed text
+    as prompt, commits the words that are stable across consecutive hypotheses and
+    trims the committed audio from the buffer using the word timestamps. Each decode
+    therefore only covers the open tail of the speech.
+
+    Audio comes in as the windows emitted by RollingAudioBuffer plus their absolute end
+    sample (`RollingAudioBuffer.total_samples`); only the samples not seen yet are appended.
+    """
+    def __init__(self, transcriber, language="en", sample_rate=16000, max_buffer_seconds=15.0,
+                 min_trim_seconds=1.0, prompt_chars=200):
+        self.transcriber = transcriber
+        self.language = language
+        self.sample_rate = sample_rate
+        self.min_trim_seconds = min_trim_seconds
+        self.prompt_chars = prompt_chars
+
+        self._audio = np.zeros(int(max_buffer_seconds * sample_rate), dtype=np.float32)
+        self.hypothesis = HypothesisBuffer()
+        self.committed_text = ""
+        self.reset()
+
+    def reset(self):
+        """Drops the audio and the hypotheses (e.g. after a long silence). Committed prompt is kept."""
+        self._length = 0
+        self._buffer_start = 0.0     # Stream time (s) of self._audio[0]
+        self._last_end_sample = None
+        self.hypothesis.reset()
+
+    @property
+    def buffer_seconds(self):
+        return self._length / self.sample_rate
+
+    def insert_window(self, window, end_sample):
+        """Appends the part of `window` (ending at absolute sample `end_sample`) not seen yet."""
+        if self._last_end_sample is None or end_sample < self._last_end_sample:
+            # First window, or the rolling buffer was cleared
+            new_samples = window
+            self._buffer_start = (end_sample - len(window)) / self.sample_rate
+            self._length = 0
+            self.hypothesis.reset()
+        elif end_sample - self._last_end_sample > len(window):
+            # Windows were dropped and part of the audio was never seen: restart from this window
+            new_samples = window
+            self._buffer_start = (end_sample - len(window)) / self.sample_rate
+            self._length = 0
+            self.hypothesis.reset()
+        else:
+            new_samples = window[len(window) - (end_sample - self._last_end_sample):]
+        self._last_end_sample = end_sample
+        self._append(new_samples)
+
+    def _append(self, samples):
+        capacity = len(self._audio)
+        overflow = self._length + len(samples) - capacity
+        if overflow > 0:
+            # Buffer full without a commit: drop the oldest audio
+            self._trim(min(overflow, self._length))
+            samples = samples[-capacity:]
+        self._audio[self._length:self._length + len(samples)] = samples
+        self._length += len(samples)
+
+    def _trim(self, num_samples):
+        if num_samples <= 0:
+            return
+        remaining = self._length - num_samples
+        self._audio[:remaining] = self._audio[num_samples:self._length]
+        self._length = remaining
+        self._buffer_start += num_samples / self.sample_rate
+
+    def _prompt(self):
+        return self.committed_text[-self.prompt_chars:]
+
+    def process_iter(self):
+        """
+        Decodes the uncommitted buffer once.
+        Returns (newly_committed_text, tentative_text, processing_time_ms).
+        """
+        if self._length == 0:
+            return "", "", 0.0
+
+        start_time = time.time()
+        words, _ = self.transcriber.transcribe_words(
+            self._audio[:self._length], language=self.language, initial_prompt=self._prompt()
+        )
+        offset = self._buffer_start
+        self.hypothesis.insert([(start + offset, end + offset, word) for start, end, word in words])
+        committed = self.hypothesis.flush()
+
+        committed_text = _join_words(committed)
+        if committed_text:
+            # Only the tail is needed as prompt; keep the history bounded
+            self.committed_text = (self.committed_text + " " + committed_text).strip()[-4 * self.prompt_chars:]
+
+        # Trim the committed audio, keeping the buffer aligned with the stream timeline
+        trim_seconds = self.hypothesis.last_committed_time - self._buffer_start
+        if trim_seconds >= self.min_trim_seconds:
+            self._trim(min(int(trim_seconds * self.sample_rate), self._length))
+
+        processing_time = (time.time() - start_time) * 1000
+        return committed_text, _join_words(self.hypothesis.tentative), processing_time
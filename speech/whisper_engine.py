@@ -1,24 +1,50 @@
-from faster_whisper import WhisperModel
 import numpy as np
-import torch
 import time
 
+def _default_device():
+    # ctranslate2 ships with faster-whisper; asking it avoids importing torch just for this check
+    import ctranslate2
+    return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+
 class WhisperTranscriber:
-    def __init__(self, model_name="base", device=None):
-        self.device = device if device else ("cuda" if torch.cuda.is_available() else "cpu")
+    def __init__(self, model_name="base", device=None, cpu_threads=0, num_workers=1, compute_type=None):
+        """
+        :param cpu_threads: CTranslate2 threads per decode (0 = library default).
+        :param num_workers: Decodes that may run concurrently when the model is called from
+                            several threads (e.g. the offline batch mode's worker pool).
+        :param compute_type: CTranslate2 compute type (int8, int8_float32, float32, float16...);
+                             default: float16 on CUDA, int8 on CPU (pipeline.autotune picks it per machine).
+        """
+        # Imported here so that importing this module stays cheap (see pipeline.startup)
+        from faster_whisper import WhisperModel
+
+        self.device = device if device else _default_device()
         
         # faster-whisper default configuration for compute_type
-        compute_type = "float16" if self.device == "cuda" else "int8"
+        if compute_type is None:
+            compute_type = "float16" if self.device == "cuda" else "int8"
+        self.compute_type = compute_type
         
         print(f"Loading Faster Whisper model '{model_name}' on {self.device} ({compute_type})...")
-        self.model = WhisperModel(model_name, device=self.device, compute_type=compute_type)
+        self.model = WhisperModel(model_name, device=self.device, compute_type=compute_type,
+                                  cpu_threads=cpu_threads, num_workers=num_workers)
         print("Faster Whisper model loaded.")
+        self._batched = None # BatchedInferencePipeline, created on the first transcribe_batch
 
-    def transcribe(self, audio_data, language=None):
+    def warmup(self, seconds=1.0):
+        """
+        Runs one short decode so the first real window does not pay the cold-inference cost
+        (kernel selection, memory pools). Returns the processing time in ms.
+        """
+        _, processing_time = self.transcribe(np.zeros(int(16000 * seconds), dtype=np.float32), language="en")
+        return processing_time
+
+    def transcribe(self, audio_data, language=None, beam_size=1):
         """
         Transcribes audio data.
         :param audio_data: numpy array of audio data (float32, 16kHz, mono).
         :param language: Optional language code (e.g., "pt", "en") to guide the model.
+        :param beam_size: 1 (greedy) for the sliding windows; larger for final decodes of whole utterances.
         :return: Transcribed text.
         """
         start_time = time.time()
@@ -29,7 +55,7 @@ class WhisperTranscriber:
         segments, info = self.model.transcribe(
             audio_data, 
             language=language,
-            beam_size=1,
+            beam_size=beam_size,
             vad_filter=False # We already do VAD before
         )
         
@@ -37,3 +63,70 @@ class WhisperTranscriber:
         
         processing_time = (time.time() - start_time) * 1000
         return text, processing_time
+
+    def transcribe_words(self, audio_data, language=None, initial_prompt=None, beam_size=1):
+        """
+        Transcribes audio data keeping word-level timestamps (used by streaming mode).
+        :param audio_data: numpy array of audio data (float32, 16kHz, mono).
+        :param initial_prompt: Previously committed text, used as decoding context.
+        :return: (list of (start_s, end_s, word) relative to the audio start, processing time in ms).
+        """
+        start_time = time.time()
+
+        segments, info = self.model.transcribe(
+            audio_data,
+            language=language,
+            beam_size=beam_size,
+            initial_prompt=initial_prompt or None,
+            word_timestamps=True,
+            condition_on_previous_text=True,
+            vad_filter=False # We already do VAD before
+        )
+
+        words = [(word.start, word.end, word.word) for segment in segments for word in (segment.words or [])]
+
+        processing_time = (time.time() - start_time) * 1000
+        return words, processing_time
+
+    def transcribe_batch(self, audios, language=None, beam_size=1):
+        """
+        Transcribes several independent windows (e.g. from different streams) with a single
+        batched encoder pass and a single batched decode, through faster-whisper's public
+        BatchedInferencePipeline: the windows are laid end to end and passed as
+        `clip_timestamps`, so each one becomes one chunk of the batch.
+        Each window must be at most 30 s (one Whisper segment).
+        :param audios: list of numpy arrays (float32, 16kHz, mono).
+        :return: (list of texts in input order, processing time in ms for the whole batch).
+        """
+        start_time = time.time()
+        if not audios:
+            return [], 0.0
+        if self._batched is None:
+            from faster_whisper import BatchedInferencePipeline
+            self._batched = BatchedInferencePipeline(model=self.model)
+
+        offsets = np.cumsum([0] + [len(audio) for audio in audios])
+        segments, info = self._batched.transcribe(
+            np.concatenate(audios).astype(np.float32, copy=False),
+            language=language or "en",
+            beam_size=beam_size,
+            temperature=0.0,
+            clip_timestamps=[{"start": int(start), "end": int(end)} for start, end in zip(offsets[:-1], offsets[1:])],
+            batch_size=len(audios),
+            without_timestamps=True,
+            vad_filter=False # We already do VAD before
+        )
+
+        # Each chunk's segments start at the chunk's offset in the concatenated audio
+        window_starts = offsets[:-1] / 16000
+        parts = [[] for _ in audios]
+        for segment in segments:
+            # Same silence rule as WhisperModel.transcribe (no_speech_threshold=0.6, log_prob_threshold=-1.0)
+            if segment.no_speech_prob > 0.6 and segment.avg_logprob < -1.0:
+                continue
+            index = int(np.searchsorted(window_starts, segment.start + 1e-3, side="right")) - 1
+            parts[index].append(segment.text)
+        texts = [" ".join(part).strip() for part in parts]
+
+        processing_time = (time.time() - start_time) * 1000
+        return texts, processing_time
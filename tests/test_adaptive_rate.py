@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+
+# Add the project root to sys.path so we can import the pipeline modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline.adaptive import AdaptiveRateController
+from pipeline.rolling_buffer import RollingAudioBuffer
+
+class TestAdaptiveRateController(unittest.TestCase):
+    def setUp(self):
+        self.buffer = RollingAudioBuffer(window_size=2.0, update_rate=0.2, sample_rate=16000)
+        self.controller = AdaptiveRateController(self.buffer, min_update_rate=0.2, max_update_rate=1.5,
+                                                 min_window_size=1.0, target_utilization=0.8)
+
+    def _run(self, busy_seconds, iterations=20):
+        for _ in range(iterations):
+            self.controller.window_processed(busy_seconds, self.buffer.window_size)
+            self.controller.update()
+
+    def test_no_change_without_measurements(self):
+        self.assertFalse(self.controller.update())
+        self.assertEqual(self.buffer.update_rate, 0.2)
+
+    def test_slow_stt_raises_update_rate_until_every_window_fits(self):
+        self._run(0.6)
+        # 0.6s per window / 0.8 utilization = 0.75s between windows
+        self.assertAlmostEqual(self.buffer.update_rate, 0.75, delta=0.08)
+        self.assertEqual(self.buffer.window_size, 2.0)
+
+    def test_fast_stt_stays_at_minimum_rate(self):
+        self._run(0.05)
+        self.assertEqual(self.buffer.update_rate, 0.2)
+        self.assertEqual(self.buffer.window_size, 2.0)
+
+    def test_drops_raise_the_rate_immediately(self):
+        self.controller.window_processed(0.1)
+        self.controller.window_dropped()
+        self.assertTrue(self.controller.update())
+        self.assertAlmostEqual(self.buffer.update_rate, 0.25)
+
+    def test_very_slow_stt_shrinks_window_within_bounds(self):
+        self._run(3.0)
+        self.assertEqual(self.buffer.update_rate, 1.5)
+        self.assertEqual(self.buffer.window_size, 1.5) # Never shorter than the update interval
+        self.assertGreaterEqual(self.buffer.window_size, 1.0)
+
+    def test_window_grows_back_when_stt_speeds_up(self):
+        self._run(3.0)
+        self._run(0.02, iterations=60)
+        self.assertEqual(self.buffer.update_rate, 0.2)
+        self.assertAlmostEqual(self.buffer.window_size, 2.0, delta=0.2)
+
+if __name__ == '__main__':
+    unittest.main()
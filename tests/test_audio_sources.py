@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+import time
+import wave
+import tempfile
+import contextlib
+import io
+import numpy as np
+
+# Add the project root to sys.path so we can import audio.sources
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio.sources import FileReplaySource, SyntheticSource, create_source
+import main
+
+def drain(source, timeout=5.0):
+    """Collects every chunk until the source reports it is finished."""
+    chunks = []
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        chunk = source.get_latest_chunk()
+        if chunk:
+            chunks.append(chunk)
+        elif source.finished:
+            break
+        else:
+            time.sleep(0.001)
+    return chunks
+
+class TestAudioSources(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        # 1s of stereo ramp at 8kHz
+        self.pcm = (np.arange(8000 * 2) % 30000).astype(np.int16).reshape(-1, 2)
+        self.wav_path = os.path.join(self.tmpdir.name, "clip.wav")
+        with wave.open(self.wav_path, "wb") as wf:
+            wf.setnchannels(2)
+            wf.setsampwidth(2)
+            wf.setframerate(8000)
+            wf.writeframes(self.pcm.tobytes())
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_wav_replay_fast_delivers_every_chunk(self):
+        """Fast pacing never drops chunks, even with a tiny buffer."""
+        source = FileReplaySource(self.wav_path, pacing="fast", buffer_size=2)
+        source.start_capture(chunk_duration=0.1)
+        chunks = drain(source)
+        source.close()
+
+        self.assertEqual(len(chunks), 10)
+        data, timestamp, rate, channels = chunks[0]
+        self.assertIsInstance(data, bytes)
+        self.assertEqual((rate, channels), (8000, 2))
+        self.assertEqual(b"".join(c[0] for c in chunks), self.pcm.tobytes())
+
+    def test_raw_pcm_replay(self):
+        raw_path = os.path.join(self.tmpdir.name, "clip.pcm")
+        self.pcm.tofile(raw_path)
+        source = create_source("file", path=raw_path, pacing="fast", sample_rate=8000, channels=2)
+        source.start_capture(chunk_duration=0.25)
+        chunks = drain(source)
+        source.close()
+        self.assertEqual(b"".join(c[0] for c in chunks), self.pcm.tobytes())
+
+    def test_realtime_pacing_follows_the_clock(self):
+        """Real-time pacing takes about as long as the audio itself."""
+        source = SyntheticSource([("tone", 0.3)], sample_rate=8000, channels=1, pacing="realtime")
+        start = time.time()
+        source.start_capture(chunk_duration=0.1)
+        chunks = drain(source)
+        elapsed = time.time() - start
+        source.close()
+        self.assertEqual(len(chunks), 3)
+        self.assertGreaterEqual(elapsed, 0.28)
+
+    def test_synthetic_segments(self):
+        """Silence gaps are silent and speech-like noise has energy."""
+        source = SyntheticSource([("speech", 0.5), ("silence", 0.5)], sample_rate=16000, channels=2)
+        pcm = source.render()
+        self.assertEqual(pcm.shape, (16000, 2))
+        self.assertGreater(np.abs(pcm[:8000]).max(), 1000)
+        self.assertEqual(np.abs(pcm[8000:]).max(), 0)
+
+    def test_drain_chunks_blocks_until_data(self):
+        """drain_chunks wakes up when the producer pushes, and returns everything pending."""
+        source = SyntheticSource([("tone", 0.2)], sample_rate=8000, channels=1, pacing="realtime")
+        start = time.time()
+        self.assertEqual(source.drain_chunks(timeout=0.05), [])
+        self.assertGreaterEqual(time.time() - start, 0.04)
+
+        source.start_capture(chunk_duration=0.1)
+        chunks = source.drain_chunks(timeout=2.0)
+        self.assertGreaterEqual(len(chunks), 1)
+        # After the last chunk the finished source returns immediately
+        while not source.finished or source.audio_queue:
+            chunks += source.drain_chunks(timeout=2.0)
+        start = time.time()
+        self.assertEqual(source.drain_chunks(timeout=2.0), [])
+        self.assertLess(time.time() - start, 0.5)
+        source.close()
+        self.assertEqual(len(chunks), 2)
+
+    def test_unknown_source(self):
+        with self.assertRaises(ValueError):
+            create_source("microphone")
+
+class TestRawFileArguments(unittest.TestCase):
+    def test_raw_rate_and_channels_go_together(self):
+        args = main.parse_args(["--source", "file", "--file", "speech.raw", "--raw-rate", "8000", "--raw-channels", "2"])
+        self.assertEqual((args.raw_rate, args.raw_channels), (8000, 2))
+        for argv in (["--raw-rate", "8000"], ["--raw-channels", "2"]):
+            with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                main.parse_args(["--source", "file", "--file", "speech.raw"] + argv)
+
+if __name__ == '__main__':
+    unittest.main()
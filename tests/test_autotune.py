@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+
+# Add the project root to sys.path so we can import pipeline.autotune
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio.preprocess import convert_to_float32, to_mono, resample_audio
+from audio.sources import SyntheticSource
+from pipeline.autotune import autotune, load_profile, save_profile, select_profile, word_error_rate
+import main
+
+REFERENCE = "the quick brown fox jumps over the lazy dog"
+
+class FakeTranscriber:
+    """Bigger models are slower and more accurate; more threads are faster."""
+    SPEED_MS = {"tiny": 2, "base": 8, "small": 80}
+    OUTPUT = {"tiny": "a quick brown box jumps over lazy dog", "base": "the quick brown fox jumps over a lazy dog",
+              "small": REFERENCE}
+
+    def __init__(self, model_name, compute_type, cpu_threads):
+        if compute_type == "float16":
+            raise ValueError("float16 is not supported on this device")
+        self.model_name = model_name
+        self.delay = self.SPEED_MS[model_name] / cpu_threads / 1000
+
+    def transcribe(self, audio_data, language=None, beam_size=1):
+        time.sleep(self.delay)
+        return self.OUTPUT[self.model_name], self.delay * 1000
+
+def clip():
+    pcm = SyntheticSource([("speech", 1.0), ("silence", 0.5)], sample_rate=16000, channels=1, repeat=2).render()
+    return resample_audio(to_mono(convert_to_float32(pcm.reshape(-1)), 1), 16000)
+
+class TestWordErrorRate(unittest.TestCase):
+    def test_counts_substitutions_insertions_and_deletions(self):
+        self.assertEqual(word_error_rate(REFERENCE, REFERENCE.upper() + "."), 0.0)
+        self.assertAlmostEqual(word_error_rate("a b c d", "a x c"), 0.5) # 1 substitution + 1 deletion
+        self.assertAlmostEqual(word_error_rate("a b", "a b c d"), 1.0)   # 2 insertions
+        self.assertEqual(word_error_rate("", ""), 0.0)
+
+class TestAutotune(unittest.TestCase):
+    def run_autotune(self, max_rtf, reference=REFERENCE):
+        return autotune(clip(), reference=reference, models=("tiny", "base", "small"),
+                        compute_types=("int8", "float16"), thread_counts=(1, 2),
+                        window_settings=((1.0, 0.04), (1.5, 0.1)), max_rtf=max_rtf,
+                        transcriber_factory=FakeTranscriber, device="cpu", log=lambda message: None)
+
+    def test_picks_most_accurate_viable_configuration(self):
+        profile, results = self.run_autotune(max_rtf=0.8)
+        # small: 40 ms per window at best -> RTF 1.0 every 0.04 s but 0.4 every 0.1 s, and it is the most accurate
+        self.assertEqual((profile["model_name"], profile["compute_type"]), ("small", "int8"))
+        self.assertEqual(profile["cpu_threads"], 2)
+        self.assertEqual((profile["window_size"], profile["update_rate"]), (1.5, 0.1))
+        self.assertTrue(profile["viable"])
+        self.assertEqual(profile["wer"], 0.0)
+        self.assertFalse(any(r["compute_type"] == "float16" for r in results))
+
+    def test_tight_target_prefers_faster_model_and_lower_latency(self):
+        profile, results = self.run_autotune(max_rtf=0.3)
+        self.assertEqual(profile["model_name"], "base")
+        self.assertEqual(profile["update_rate"], 0.04)
+        # small could not meet the target at all, so nothing larger would have been tried
+        self.assertEqual(results[-1]["model_name"], "small")
+
+    def test_without_reference_largest_model_is_the_reference(self):
+        profile, _ = self.run_autotune(max_rtf=0.8, reference=None)
+        self.assertEqual(profile["reference"], "largest_model")
+        self.assertEqual(profile["model_name"], "small")
+
+    def test_nothing_viable_falls_back_to_fastest(self):
+        results = [{"model_name": "base", "compute_type": "int8", "cpu_threads": 4, "device": "cpu", "wer": 0.1,
+                    "windows": [{"window_size": 1.5, "update_rate": 0.2, "rtf": 2.0, "p95_ms": 400.0},
+                                {"window_size": 3.0, "update_rate": 0.5, "rtf": 1.2, "p95_ms": 600.0}]}]
+        profile = select_profile(results, max_rtf=0.8)
+        self.assertFalse(profile["viable"])
+        self.assertEqual(profile["update_rate"], 0.5)
+
+class TestProfileLoading(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "nested", "profile.json")
+
+    def test_round_trip_and_missing_file(self):
+        self.assertIsNone(load_profile(self.path))
+        save_profile({"model_name": "small", "window_size": 2.5}, self.path)
+        self.assertEqual(load_profile(self.path)["model_name"], "small")
+
+    def test_command_line_overrides_profile(self):
+        save_profile({"model_name": "small", "compute_type": "int8_float32", "cpu_threads": 4,
+                      "window_size": 2.5, "update_rate": 0.3}, self.path)
+        args = main.parse_args(["--profile", self.path, "--model", "tiny", "--update-rate", "0.4"])
+        model_options, window_size, update_rate = main.resolve_settings(args)
+        self.assertEqual(model_options, {"model_name": "tiny", "compute_type": "int8_float32", "cpu_threads": 4})
+        self.assertEqual((window_size, update_rate), (2.5, 0.4))
+
+    def test_defaults_without_profile(self):
+        args = main.parse_args(["--profile", ""])
+        self.assertEqual(main.resolve_settings(args), ({"model_name": "base"}, 1.5, 0.2))
+
+if __name__ == '__main__':
+    unittest.main()
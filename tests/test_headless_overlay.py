@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add the project root to sys.path so we can import overlay.headless
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from overlay.headless import HeadlessOverlay
+
+class TestHeadlessOverlay(unittest.TestCase):
+    def test_pending_texts_coalesce_to_latest(self):
+        applied = []
+        overlay = HeadlessOverlay(on_apply=lambda text, latency_ms: applied.append(text))
+        for i in range(5):
+            overlay.update_text(f"text {i}")
+        overlay.close()
+        overlay.start()
+
+        self.assertEqual(applied, ["text 4"])
+        self.assertEqual(overlay.current_text, "text 4")
+        self.assertEqual((overlay.updates_applied, overlay.updates_coalesced), (1, 4))
+
+    def test_without_coalescing_every_text_is_applied(self):
+        overlay = HeadlessOverlay(coalesce=False)
+        for i in range(3):
+            overlay.update_text(f"text {i}")
+        overlay.close()
+        overlay.start()
+        self.assertEqual((overlay.updates_applied, overlay.updates_coalesced), (3, 0))
+
+    def test_latency_includes_simulated_paint(self):
+        latencies = []
+        overlay = HeadlessOverlay(on_apply=lambda text, latency_ms: latencies.append(latency_ms), paint_ms=30)
+        overlay.update_text("hello")
+        overlay.close()
+        overlay.start()
+        self.assertEqual(len(latencies), 1)
+        self.assertGreaterEqual(latencies[0], 30)
+
+    def test_slow_paint_skips_superseded_texts(self):
+        """Texts arriving during a slow paint are replaced by the newest one, so latency stays bounded."""
+        overlay = HeadlessOverlay(paint_ms=50)
+
+        def producer():
+            for i in range(20):
+                overlay.update_text(f"text {i}")
+                time.sleep(0.01)
+            overlay.close()
+
+        thread = threading.Thread(target=producer)
+        thread.start()
+        overlay.start()
+        thread.join()
+
+        self.assertEqual(overlay.current_text, "text 19")
+        self.assertEqual(overlay.updates_applied + overlay.updates_coalesced, 20)
+        self.assertLess(overlay.updates_applied, 20)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+import queue
+import threading
+import time
+
+# Add the project root to sys.path so we can import pipeline.mailbox
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline.mailbox import CONTROL, VALUE, WHOLE_STRETCH, LatestMailbox
+
+class TestLatestMailbox(unittest.TestCase):
+    def test_keeps_only_latest_value_and_counts_superseded(self):
+        dropped = []
+        mailbox = LatestMailbox(on_drop=lambda reason, value: dropped.append((reason, value)))
+        for value in ("a", "b", "c"):
+            mailbox.post(value)
+        delivery = mailbox.get(timeout=0)
+        self.assertEqual((delivery.kind, delivery.value, delivery.seq), (VALUE, "c", 3))
+        self.assertEqual(dropped, [("superseded", "a"), ("superseded", "b")])
+        self.assertEqual(mailbox.stats()["superseded"], 2)
+        with self.assertRaises(queue.Empty):
+            mailbox.get(timeout=0.01)
+
+    def test_control_lane_is_never_dropped_and_comes_first(self):
+        mailbox = LatestMailbox()
+        mailbox.post("window")
+        mailbox.send("clear")
+        mailbox.send("final")
+        mailbox.post("newer window") # A new window never displaces control messages
+        self.assertEqual([mailbox.get(timeout=0).value for _ in range(3)], ["clear", "final", "newer window"])
+        self.assertEqual(mailbox.stats()["superseded"], 1)
+
+    def test_discard_pending_is_not_a_load_drop(self):
+        dropped = []
+        mailbox = LatestMailbox(on_drop=lambda reason, value: dropped.append(reason))
+        mailbox.post("window")
+        mailbox.send("clear", discard_pending=True)
+        self.assertEqual(mailbox.get(timeout=0).kind, CONTROL)
+        with self.assertRaises(queue.Empty):
+            mailbox.get(timeout=0)
+        stats = mailbox.stats()
+        self.assertEqual((stats["discarded"], stats["dropped"], dropped), (1, 0, []))
+
+    def test_stale_window_is_skipped(self):
+        dropped = []
+        mailbox = LatestMailbox(max_age=0.5, on_drop=lambda reason, value: dropped.append((reason, value)))
+        mailbox.post("old", timestamp=time.time() - 1.0)
+        with self.assertRaises(queue.Empty):
+            mailbox.get(timeout=0.01)
+        mailbox.post("fresh")
+        self.assertEqual(mailbox.get(timeout=0).value, "fresh")
+        self.assertEqual(dropped, [("expired", "old")])
+        self.assertEqual(mailbox.stats()["expired"], 1)
+
+    def test_close_drains_then_returns_none(self):
+        mailbox = LatestMailbox()
+        mailbox.post("last")
+        mailbox.close()
+        self.assertIsNone(mailbox.post("ignored"))
+        self.assertEqual(mailbox.get().value, "last")
+        self.assertIsNone(mailbox.get())
+
+    def test_get_blocks_until_post(self):
+        mailbox = LatestMailbox()
+        threading.Timer(0.05, mailbox.post, args=("late",)).start()
+        self.assertEqual(mailbox.get(timeout=2).value, "late")
+
+class TestUntranscribedAudio(unittest.TestCase):
+    def test_overlapping_windows_lose_nothing(self):
+        mailbox = LatestMailbox()
+        mailbox.post("w1", span=(0.0, 1.5))
+        mailbox.get(timeout=0)
+        mailbox.post("w2", span=(0.2, 1.7)) # Superseded, but covered by w1 and w3
+        mailbox.post("w3", span=(0.4, 1.9))
+        mailbox.get(timeout=0)
+        self.assertEqual(mailbox.stats()["untranscribed_seconds"], 0.0)
+
+    def test_gap_between_delivered_windows_is_counted_once(self):
+        mailbox = LatestMailbox()
+        mailbox.post("w1", span=(0.0, 1.0))
+        mailbox.get(timeout=0)
+        mailbox.post("w2", span=(0.5, 1.5))
+        mailbox.post("w3", span=(1.0, 2.0))
+        mailbox.post("w4", span=(2.5, 3.5))
+        mailbox.get(timeout=0)
+        # 1.0-2.0 was only in dropped windows; 2.0-2.5 was never posted (no audio)
+        self.assertAlmostEqual(mailbox.stats()["untranscribed_seconds"], 1.0)
+
+    def test_clear_counts_dropped_tail_but_final_covers_it(self):
+        cleared = LatestMailbox()
+        cleared.post("w1", span=(0.0, 1.0))
+        cleared.get(timeout=0)
+        cleared.post("w2", span=(0.5, 1.8))
+        cleared.send("clear", discard_pending=True)
+        self.assertAlmostEqual(cleared.stats()["untranscribed_seconds"], 0.8)
+
+        finalized = LatestMailbox()
+        finalized.post("w1", span=(0.0, 1.0))
+        finalized.get(timeout=0)
+        finalized.post("w2", span=(0.5, 1.8))
+        finalized.send("final", discard_pending=True, span=WHOLE_STRETCH)
+        self.assertEqual(finalized.stats()["untranscribed_seconds"], 0.0)
+        # The next stretch starts over at position 0
+        finalized.post("w3", span=(0.0, 1.0))
+        finalized.get(timeout=0)
+        self.assertEqual(finalized.stats()["untranscribed_seconds"], 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
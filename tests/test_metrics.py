@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import urllib.request
+
+# Add the project root to sys.path so we can import pipeline.metrics
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline.metrics import MetricsRegistry, JSONLExporter, MetricsServer
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry(enabled=True)
+
+    def test_disabled_registry_is_noop(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("windows")
+        histogram = registry.histogram("stt_ms", (100, 200))
+        counter.inc()
+        histogram.observe(150)
+        self.assertEqual(counter.value, 0)
+        self.assertEqual(histogram.count, 0)
+
+    def test_instruments_are_shared_by_name(self):
+        self.assertIs(self.registry.counter("drops"), self.registry.counter("drops"))
+
+    def test_histogram_buckets(self):
+        histogram = self.registry.histogram("stt_ms", (100, 200))
+        for value in (50, 100, 150, 500):
+            histogram.observe(value)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["buckets"], {"100": 2, "200": 1, "+inf": 1})
+        self.assertEqual(snapshot["count"], 4)
+        self.assertEqual(snapshot["sum"], 800)
+
+    def test_jsonl_export(self):
+        self.registry.counter("drops").inc(3)
+        self.registry.gauge("queue_depth").set(1)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "metrics.jsonl")
+            exporter = JSONLExporter(self.registry, path, interval=60)
+            exporter.start()
+            exporter.stop()
+            with open(path, encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["counters"]["drops"], 3)
+        self.assertEqual(lines[0]["gauges"]["queue_depth"], 1)
+
+    def test_pull_endpoint(self):
+        self.registry.counter("overlay_updates").inc()
+        server = MetricsServer(self.registry, port=0).start()
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+                data = json.loads(response.read())
+        finally:
+            server.stop()
+        self.assertEqual(data["counters"]["overlay_updates"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
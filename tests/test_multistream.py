@@ -0,0 +1,246 @@
+import unittest
+import sys
+import os
+import threading
+import time
+import contextlib
+import io
+import numpy as np
+
+# Add the project root to sys.path so we can import speech.multistream
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio.sources import SyntheticSource
+from pipeline.benchmark import StubTranslator, StubTranscriber, run_multistream_benchmark
+from speech.multistream import MultiStreamEngine, StreamOverlayLines
+import main
+
+class BatchRecorder:
+    """Returns the mean of each window as text, so results can be matched to their stream."""
+    def __init__(self):
+        self.batch_sizes = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def transcribe_batch(self, audios, language=None, beam_size=1):
+        self.release.wait()
+        self.batch_sizes.append(len(audios))
+        return [f"value {audio.mean():.0f}" for audio in audios], 1.0
+
+class SequentialOnly:
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio_data, language=None, beam_size=1):
+        self.calls += 1
+        return f"value {audio_data.mean():.0f}", 1.0
+
+class FailsOnce(SequentialOnly):
+    def transcribe(self, audio_data, language=None, beam_size=1):
+        if self.calls == 0:
+            self.calls += 1
+            raise RuntimeError("corrupt window")
+        return super().transcribe(audio_data, language, beam_size)
+
+class BatchTranslator:
+    def __init__(self):
+        self.batches = []
+
+    def translate_batch(self, texts):
+        self.batches.append(list(texts))
+        return [text.upper() for text in texts], 1.0
+
+class RecordingOverlay:
+    def __init__(self):
+        self.texts = []
+
+    def update_text(self, text):
+        self.texts.append(text)
+
+class TestMultiStreamEngine(unittest.TestCase):
+    def _engine(self, transcriber, streams=3, **kwargs):
+        results = []
+        engine = MultiStreamEngine(transcriber, StubTranslator(latency_ms=0), max_wait_ms=200,
+                                   on_result=lambda session, text, translation, ms: results.append((session.stream_id, text, translation)),
+                                   **kwargs)
+        overlays = [RecordingOverlay() for _ in range(streams)]
+        for stream_id, overlay in enumerate(overlays):
+            engine.add_stream(stream_id, overlay=overlay)
+        return engine, overlays, results
+
+    def test_pending_windows_of_all_streams_share_one_batch(self):
+        transcriber = BatchRecorder()
+        engine, overlays, results = self._engine(transcriber)
+        engine.start()
+        for stream_id in range(3):
+            engine.submit(stream_id, np.full(100, stream_id + 1, dtype=np.float32))
+        while len(results) < 3:
+            time.sleep(0.01)
+        engine.close()
+
+        self.assertEqual(transcriber.batch_sizes, [3])
+        self.assertEqual(sorted(results), [(0, "value 1", "VALUE 1"), (1, "value 2", "VALUE 2"), (2, "value 3", "VALUE 3")])
+        self.assertEqual([o.texts for o in overlays], [["VALUE 1"], ["VALUE 2"], ["VALUE 3"]])
+
+    def test_latest_window_per_stream_wins_and_deltas_are_per_stream(self):
+        transcriber = BatchRecorder()
+        transcriber.release.clear()
+        engine, overlays, results = self._engine(transcriber, streams=2)
+        engine.start()
+        engine.submit(0, np.full(10, 1, dtype=np.float32))
+        time.sleep(0.3) # The first batch is now blocked inside the transcriber
+        engine.submit(0, np.full(10, 5, dtype=np.float32))
+        engine.submit(0, np.full(10, 7, dtype=np.float32))
+        engine.submit(1, np.full(10, 1, dtype=np.float32))
+        transcriber.release.set()
+        while len(results) < 3:
+            time.sleep(0.01)
+        engine.close()
+
+        self.assertEqual(engine.sessions[0].windows_superseded, 1)
+        self.assertEqual(engine.sessions[0].text, "value 7")
+        # "value" was already translated for stream 0 but not for stream 1
+        self.assertEqual(overlays[0].texts, ["VALUE 1", "7"])
+        self.assertEqual(overlays[1].texts, ["VALUE 1"])
+
+    def test_clear_during_decode_drops_the_stale_window(self):
+        transcriber = BatchRecorder()
+        transcriber.release.clear()
+        engine, overlays, results = self._engine(transcriber, streams=1)
+        engine.start()
+        engine.submit(0, np.full(10, 1, dtype=np.float32))
+        time.sleep(0.3) # The window is now blocked inside the transcriber
+        engine.clear_stream(0)
+        transcriber.release.set()
+        engine.submit(0, np.full(10, 1, dtype=np.float32))
+        while len(results) < 1:
+            time.sleep(0.01)
+        engine.close()
+        # The stale result neither reached the overlay nor primed the delta after the clear
+        self.assertEqual(results, [(0, "value 1", "VALUE 1")])
+        self.assertEqual(overlays[0].texts, ["", "VALUE 1"])
+
+    def test_pending_window_outlives_the_rolling_buffer_view(self):
+        from pipeline.rolling_buffer import RollingAudioBuffer
+        buffer = RollingAudioBuffer(window_size=0.5, update_rate=0.1, sample_rate=1000, max_duration=1.0)
+        transcriber = BatchRecorder()
+        engine, overlays, results = self._engine(transcriber, streams=1)
+        engine.submit(0, buffer.append(np.full(500, 3, dtype=np.float32)))
+        # Writes past capacity - window while the view is pending: the engine must decode the original audio
+        buffer.append(np.full(1000, 9, dtype=np.float32))
+        engine.start()
+        while not results:
+            time.sleep(0.01)
+        engine.close()
+
+        self.assertEqual(results[0][1], "value 3")
+
+    def test_falls_back_to_sequential_transcription(self):
+        transcriber = SequentialOnly()
+        engine, _, results = self._engine(transcriber, streams=2)
+        engine.start()
+        engine.submit(0, np.full(10, 2, dtype=np.float32))
+        engine.submit(1, np.full(10, 4, dtype=np.float32))
+        while len(results) < 2:
+            time.sleep(0.01)
+        engine.close()
+        self.assertEqual(transcriber.calls, 2)
+
+    def test_failing_batch_does_not_stop_the_engine(self):
+        engine, _, results = self._engine(FailsOnce(), streams=1)
+        engine.start()
+        engine.submit(0, np.full(10, 2, dtype=np.float32))
+        while engine.failed_batches < 1:
+            time.sleep(0.01)
+        engine.submit(0, np.full(10, 3, dtype=np.float32))
+        while len(results) < 1:
+            time.sleep(0.01)
+        engine.close()
+        self.assertEqual(results, [(0, "value 3", "VALUE 3")])
+
+    def test_translations_go_through_the_batcher(self):
+        translator = BatchTranslator()
+        results = []
+        engine = MultiStreamEngine(BatchRecorder(), translator, max_wait_ms=200, translation_batch_size=2,
+                                   on_result=lambda session, text, translation, ms: results.append(translation))
+        for stream_id in range(3):
+            engine.add_stream(stream_id)
+        engine.start()
+        for stream_id in range(3):
+            engine.submit(stream_id, np.full(10, stream_id + 1, dtype=np.float32))
+        while len(results) < 3:
+            time.sleep(0.01)
+        engine.close()
+        self.assertEqual(sorted(results), ["VALUE 1", "VALUE 2", "VALUE 3"])
+        self.assertEqual(sorted(len(batch) for batch in translator.batches), [1, 2])
+
+    def test_duplicate_stream_is_rejected(self):
+        engine = MultiStreamEngine(SequentialOnly())
+        engine.add_stream("mic")
+        with self.assertRaises(ValueError):
+            engine.add_stream("mic")
+
+class TestMultiStreamBenchmark(unittest.TestCase):
+    def test_streams_are_batched_end_to_end(self):
+        sources = [SyntheticSource([("speech", 2.0), ("silence", 1.0)], sample_rate=16000, channels=1,
+                                   pacing="realtime", seed=i) for i in range(3)]
+        summary = run_multistream_benchmark(sources, StubTranscriber(latency_ms=20), StubTranslator(latency_ms=1))
+        self.assertEqual(summary["streams"], 3)
+        self.assertGreater(summary["mean_batch_size"], 1.5)
+        for stats in summary["per_stream"].values():
+            self.assertGreater(stats["processed"], 0)
+
+class TestMultiStreamApp(unittest.TestCase):
+    def test_stream_arguments(self):
+        args = main.parse_args(["--stream", "loopback", "--stream", "file:talk.wav"])
+        self.assertEqual(args.stream, [("loopback", None), ("file", "talk.wav")])
+        for argv in (["--stream", "file"], ["--stream", "mic"], ["--stream", "synthetic", "--record", "out"]):
+            with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                main.parse_args(argv)
+
+    def test_one_overlay_line_per_stream(self):
+        overlay = RecordingOverlay()
+        lines = StreamOverlayLines(overlay)
+        first, second = lines.line("1:mic"), lines.line("2:loopback")
+        second.update_text("olá")
+        first.update_text("bom dia")
+        second.update_text("")
+        self.assertEqual(overlay.texts, ["2:loopback: olá", "1:mic: bom dia\n2:loopback: olá", "1:mic: bom dia"])
+
+    def test_sources_are_captioned_by_one_engine(self):
+        overlay = RecordingOverlay()
+        sources = {label: SyntheticSource([("speech", 1.0), ("silence", 0.5)], sample_rate=16000, channels=1,
+                                          pacing="realtime", seed=seed)
+                   for seed, label in enumerate(("1:a", "2:b"))}
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.multistream_processing_loop(overlay, sources, transcriber=StubTranscriber(latency_ms=20),
+                                             translator=StubTranslator(latency_ms=1))
+        shown = " ".join(overlay.texts)
+        self.assertIn("1:a: ", shown)
+        self.assertIn("2:b: ", shown)
+
+def _load_whisper():
+    """Real faster-whisper model for the integration test (WHISPER_TEST_MODEL, default tiny.en), or None."""
+    try:
+        from speech.whisper_engine import WhisperTranscriber
+        return WhisperTranscriber(model_name=os.environ.get("WHISPER_TEST_MODEL", "tiny.en"), device="cpu")
+    except Exception: # faster-whisper not installed, or the model cannot be downloaded here
+        return None
+
+class TestWhisperTranscribeBatch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with contextlib.redirect_stdout(io.StringIO()):
+            cls.transcriber = _load_whisper()
+        if cls.transcriber is None:
+            raise unittest.SkipTest("faster-whisper or the Whisper test model is not available")
+
+    def test_one_text_per_window_in_one_batch(self):
+        windows = [np.zeros(24000, dtype=np.float32), np.zeros(16000, dtype=np.float32), np.zeros(8000, dtype=np.float32)]
+        texts, processing_time_ms = self.transcriber.transcribe_batch(windows, language="en")
+        self.assertEqual(len(texts), 3)
+        self.assertTrue(all(isinstance(text, str) for text in texts))
+        self.assertGreater(processing_time_ms, 0)
+        self.assertEqual(self.transcriber.transcribe_batch([], language="en"), ([], 0.0))
+
+if __name__ == '__main__':
+    unittest.main()
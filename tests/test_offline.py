@@ -0,0 +1,129 @@
+import unittest
+import sys
+import os
+import json
+import wave
+import tempfile
+import numpy as np
+
+# Add the project root to sys.path so we can import pipeline.offline
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio.sources import SyntheticSource
+from pipeline.offline import (caption_file, caption_files, iter_audio_blocks, load_audio, open_audio, plan_chunks,
+                              read_chunk)
+
+class ChunkTranscriber:
+    """Names each chunk after its length; optionally fails after `fail_after` batches."""
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.batches = 0
+        self.chunks = 0
+
+    def transcribe_batch(self, audios, language=None, beam_size=1):
+        if self.fail_after is not None and self.batches >= self.fail_after:
+            raise RuntimeError("interrupted")
+        self.batches += 1
+        self.chunks += len(audios)
+        return [f"chunk of {len(audio) / 16000:.1f} seconds" for audio in audios], 1.0
+
+class UpperTranslator:
+    def translate_batch(self, texts):
+        return [text.upper() for text in texts], 1.0
+
+class TestOfflineCaptioning(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        # 4 x (2 s speech + 1.5 s silence) at 48 kHz stereo
+        source = SyntheticSource([("speech", 2.0), ("silence", 1.5)], sample_rate=48000, channels=2, repeat=4)
+        self.path = os.path.join(self.tmp.name, "talk.wav")
+        with wave.open(self.path, "wb") as wf:
+            wf.setnchannels(2)
+            wf.setsampwidth(2)
+            wf.setframerate(48000)
+            wf.writeframes(source.render().tobytes())
+        self.output_dir = os.path.join(self.tmp.name, "out")
+
+    def test_load_audio_resamples_to_16k_mono(self):
+        audio = load_audio(self.path)
+        self.assertEqual(audio.dtype, np.float32)
+        self.assertEqual(len(audio), 16000 * 14)
+
+    def test_chunk_read_from_file_matches_whole_file(self):
+        audio = load_audio(self.path)
+        source = open_audio(self.path)
+        for start, end in ((0, 16000), (12345, 40001), (16000 * 13, len(audio))):
+            np.testing.assert_allclose(read_chunk(source, start, end), audio[start:end], atol=1e-6)
+
+    def test_chunk_read_without_resampling(self):
+        path = os.path.join(self.tmp.name, "mono16k.wav")
+        samples = (np.arange(32000) % 200 - 100).astype(np.int16)
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(16000)
+            wf.writeframes(samples.tobytes())
+        np.testing.assert_array_equal(read_chunk(open_audio(path), 100, 900), load_audio(path)[100:900])
+
+    def test_streamed_plan_matches_whole_file_plan(self):
+        # Blocks that do not end on VAD frame boundaries
+        streamed = plan_chunks(iter_audio_blocks(open_audio(self.path), block_seconds=1.37), max_chunk_seconds=3.0)
+        self.assertEqual(streamed, plan_chunks(load_audio(self.path), max_chunk_seconds=3.0))
+
+    def test_chunks_are_cut_at_silences(self):
+        chunks = plan_chunks(load_audio(self.path), max_chunk_seconds=3.0)
+        self.assertEqual(len(chunks), 4)
+        for i, (start, end) in enumerate(chunks):
+            # Each chunk covers one 2 s speech burst, which starts every 3.5 s
+            self.assertLessEqual(start / 16000, i * 3.5 + 0.05)
+            self.assertGreaterEqual(end / 16000, i * 3.5 + 1.9)
+            self.assertLessEqual(end - start, 3 * 16000)
+
+    def test_long_speech_is_split_under_the_limit(self):
+        audio = load_audio(self.path)
+        chunks = plan_chunks(audio, max_chunk_seconds=1.0)
+        self.assertTrue(all(end - start <= 16000 for start, end in chunks))
+        self.assertGreater(len(chunks), 4)
+
+    def test_writes_captions_with_file_timestamps(self):
+        report = caption_files([self.path], ChunkTranscriber(), UpperTranslator(), output_dir=self.output_dir,
+                               max_chunk_seconds=3.0, batch_size=2, workers=2)
+        self.assertEqual(report["files"][0]["chunks"], 4)
+        self.assertGreater(report["real_time_multiple"], 1)
+
+        with open(os.path.join(self.output_dir, "talk.jsonl"), encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 4)
+        self.assertEqual([round(r["start"] / 3.5) for r in records], [0, 1, 2, 3])
+        self.assertTrue(records[0]["translation"].startswith("CHUNK OF"))
+        with open(os.path.join(self.output_dir, "talk.srt"), encoding="utf-8") as f:
+            self.assertIn("\n00:00:10,", f.read())
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "talk.partial.jsonl")))
+
+    def test_resumes_interrupted_job(self):
+        failing = ChunkTranscriber(fail_after=1)
+        with self.assertRaises(RuntimeError):
+            caption_file(self.path, failing, output_dir=self.output_dir, max_chunk_seconds=3.0, batch_size=2,
+                         workers=1)
+        self.assertEqual(failing.chunks, 2)
+
+        resumed = ChunkTranscriber()
+        stats = caption_file(self.path, resumed, output_dir=self.output_dir, max_chunk_seconds=3.0, batch_size=2,
+                             workers=1)
+        self.assertEqual((stats["status"], stats["chunks_resumed"], resumed.chunks), ("resumed", 2, 2))
+        with open(os.path.join(self.output_dir, "talk.jsonl"), encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 4)
+
+        again = ChunkTranscriber()
+        stats = caption_file(self.path, again, output_dir=self.output_dir, max_chunk_seconds=3.0, batch_size=2)
+        self.assertEqual((stats["status"], again.chunks), ("skipped", 0))
+
+    def test_changed_config_starts_over(self):
+        caption_file(self.path, ChunkTranscriber(), output_dir=self.output_dir, max_chunk_seconds=3.0)
+        redo = ChunkTranscriber()
+        stats = caption_file(self.path, redo, output_dir=self.output_dir, max_chunk_seconds=2.5)
+        self.assertEqual(stats["status"], "done")
+        self.assertGreater(redo.chunks, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 import sys
 import os
+import threading
 import tkinter as tk
 
 # Adiciona o diretório raiz do projeto ao sys.path para importar os módulos
@@ -40,6 +41,19 @@ class TestSubtitleOverlay(unittest.TestCase):
         item = self.overlay.text_queue.get()
         self.assertEqual(item, "Hello World!")
         
+    def test_worker_update_is_applied_by_poll(self):
+        """update_text de outra thread só marca a flag; o poll da interface aplica o texto mais recente."""
+        worker = threading.Thread(target=lambda: [self.overlay.update_text(t) for t in ("um", "dois")])
+        worker.start()
+        worker.join(timeout=1.0)
+        self.assertFalse(worker.is_alive())
+        self.assertTrue(self.overlay._wake_pending)
+
+        self.overlay._check_queue()
+        self.assertEqual(self.overlay.label.cget("text"), "dois")
+        self.assertFalse(self.overlay._wake_pending)
+        self.assertEqual(self.overlay.updates_coalesced, 1)
+
     def test_close_signals_queue(self):
         """Testa se o método close insere o sinalizador secreto de término (None) na fila."""
         self.overlay.close()
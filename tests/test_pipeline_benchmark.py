@@ -0,0 +1,39 @@
+import unittest
+import sys
+import os
+
+# Add the project root to sys.path so we can import the pipeline modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio.sources import SyntheticSource
+from pipeline.benchmark import run_benchmark, StubTranscriber, StubTranslator
+from pipeline.latency import LatencyTracer
+
+class TestLatencyTracer(unittest.TestCase):
+    def test_summary_percentiles_and_drop_rate(self):
+        tracer = LatencyTracer()
+        for i in range(4):
+            tracer.window_emitted()
+        tracer.window_dropped()
+        for stt_ms in (100, 200, 300):
+            tracer.record_window({"dequeued": 0.0, "transcribed": stt_ms / 1000})
+
+        summary = tracer.summary()
+        self.assertEqual(summary["windows_processed"], 3)
+        self.assertEqual(summary["dropped_window_rate"], 0.25)
+        self.assertAlmostEqual(summary["stages"]["stt"]["p50_ms"], 200.0, places=3)
+        self.assertNotIn("translation", summary["stages"])
+
+class TestPipelineBenchmark(unittest.TestCase):
+    def test_runs_real_loops_with_stubs(self):
+        """Drives main.audio_processing_loop/stt_worker_loop end to end with a headless overlay."""
+        source = SyntheticSource([("speech", 2.0), ("silence", 2.0)], sample_rate=16000, channels=1, pacing="fast")
+        summary = run_benchmark(source, StubTranscriber(latency_ms=1), StubTranslator(latency_ms=1))
+
+        self.assertGreater(summary["windows_emitted"], 0)
+        self.assertEqual(summary["windows_emitted"], summary["windows_processed"] + summary["windows_dropped"])
+        for stage in ("queue_wait", "stt", "translation", "end_to_end", "overlay_apply"):
+            self.assertIn(stage, summary["stages"])
+            self.assertIn("p99_ms", summary["stages"][stage])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add the project root to sys.path so we can import audio.preprocess
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio.preprocess import AudioPreprocessor, convert_to_float32, to_mono, is_speech, resample_audio
+
+class TestAudioPreprocessor(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        # 0.2s of stereo int16 at 48kHz, interleaved
+        self.pcm = rng.integers(-8000, 8000, size=9600 * 2, dtype=np.int16)
+
+    def test_matches_separate_steps(self):
+        """The fused stage gives the same mono signal and RMS as the old step-by-step chain."""
+        preprocessor = AudioPreprocessor(vad_threshold=0.001)
+        mono, speech, rms = preprocessor.analyze(self.pcm.tobytes(), 48000, 2)
+
+        expected_mono = to_mono(convert_to_float32(self.pcm.tobytes()), 2)
+        expected_speech, expected_rms = is_speech(expected_mono, threshold=0.001)
+
+        np.testing.assert_allclose(mono, expected_mono, atol=1e-6)
+        self.assertEqual(speech, expected_speech)
+        self.assertAlmostEqual(rms, float(expected_rms), places=5)
+
+    def test_process_resamples_to_target_rate(self):
+        """process() returns 16kHz audio equivalent to resampling the whole signal."""
+        preprocessor = AudioPreprocessor()
+        pieces = []
+        for chunk in np.split(self.pcm, 4):
+            audio, _, _ = preprocessor.process(chunk.tobytes(), 48000, 2)
+            pieces.append(audio.copy())
+        pieces.append(preprocessor.resampler.flush())
+
+        expected = resample_audio(to_mono(convert_to_float32(self.pcm.tobytes()), 2), 48000)
+        np.testing.assert_allclose(np.concatenate(pieces), expected, atol=1e-5)
+
+    def test_buffers_are_reused(self):
+        """Steady-state calls write into the same pooled buffers."""
+        preprocessor = AudioPreprocessor()
+        first, _, _ = preprocessor.process(self.pcm.tobytes(), 48000, 2)
+        second, _, _ = preprocessor.process(self.pcm.tobytes(), 48000, 2)
+        self.assertTrue(np.shares_memory(first, second))
+
+    def test_silence_is_not_speech(self):
+        preprocessor = AudioPreprocessor(vad_threshold=0.001)
+        _, speech, rms = preprocessor.analyze(bytes(4000), 44100, 2)
+        self.assertFalse(speech)
+        self.assertEqual(rms, 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import sys
+import os
+import wave
+import tempfile
+import numpy as np
+
+# Add the project root to sys.path so we can import audio.recorder
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio.recorder import SegmentedWavRecorder, MappedWavReader
+from audio.sources import FileReplaySource, SyntheticSource
+
+def read_wav(path):
+    with wave.open(path, "rb") as wf:
+        frames = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        return wf.getframerate(), wf.getnchannels(), frames.reshape(-1, wf.getnchannels())
+
+class TestSegmentedWavRecorder(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        # 3 s of stereo ramp at 8 kHz, in 0.2 s chunks
+        self.pcm = (np.arange(8000 * 3 * 2) % 20000).astype(np.int16).reshape(-1, 2)
+        self.chunks = [self.pcm[i:i + 1600] for i in range(0, len(self.pcm), 1600)]
+
+    def record(self, **kwargs):
+        recorder = SegmentedWavRecorder(output_dir=self.tmp.name, prefix="qa", **kwargs).start()
+        for chunk in self.chunks:
+            self.assertTrue(recorder.write(chunk.tobytes(), 8000, 2))
+        recorder.close()
+        return recorder
+
+    def test_segments_by_duration_without_losing_frames(self):
+        recorder = self.record(segment_seconds=1.0)
+        self.assertEqual([os.path.basename(path) for path in recorder.files],
+                         ["qa_0001.wav", "qa_0002.wav", "qa_0003.wav"])
+        parts = [read_wav(path) for path in recorder.files]
+        self.assertTrue(all(rate == 8000 and channels == 2 for rate, channels, _ in parts))
+        self.assertTrue(all(len(frames) == 8000 for _, _, frames in parts))
+        np.testing.assert_array_equal(np.concatenate([frames for _, _, frames in parts]), self.pcm)
+
+    def test_single_file_without_segment_limit(self):
+        recorder = self.record(segment_seconds=None)
+        self.assertEqual(len(recorder.files), 1)
+        np.testing.assert_array_equal(read_wav(recorder.files[0])[2], self.pcm)
+
+    def test_split_on_utterance(self):
+        recorder = SegmentedWavRecorder(output_dir=self.tmp.name, prefix="utt", split_on_utterance=True).start()
+        recorder.write(self.chunks[0].tobytes(), 8000, 2)
+        recorder.utterance_ended()
+        recorder.write(self.chunks[1].tobytes(), 8000, 2)
+        recorder.close()
+        self.assertEqual(len(recorder.files), 2)
+
+    def test_format_change_starts_new_file(self):
+        recorder = SegmentedWavRecorder(output_dir=self.tmp.name, prefix="fmt").start()
+        recorder.write(self.chunks[0].tobytes(), 8000, 2)
+        recorder.write(self.chunks[1][:, 0].copy().tobytes(), 16000, 1)
+        recorder.close()
+        self.assertEqual([read_wav(path)[:2] for path in recorder.files], [(8000, 2), (16000, 1)])
+
+    def test_full_queue_drops_chunks(self):
+        recorder = SegmentedWavRecorder(output_dir=self.tmp.name, max_pending=1) # Writer not started
+        self.assertTrue(recorder.write(b"\0\0", 8000, 1))
+        self.assertFalse(recorder.write(b"\0\0", 8000, 1))
+        self.assertEqual(recorder.chunks_dropped, 1)
+
+    def test_source_feeds_attached_recorder(self):
+        source = SyntheticSource([("tone", 1.0)], sample_rate=8000, channels=1, pacing="fast")
+        source.recorder = SegmentedWavRecorder(output_dir=self.tmp.name, prefix="src").start()
+        source.start_capture(chunk_duration=0.1)
+        while not (source.finished and not source.audio_queue):
+            source.drain_chunks(timeout=0.5)
+        source.recorder.close()
+        np.testing.assert_array_equal(read_wav(source.recorder.files[0])[2], source.render())
+
+class TestMappedWavReader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.pcm = (np.arange(16000 * 2) % 30000).astype(np.int16).reshape(-1, 2)
+        self.path = os.path.join(self.tmp.name, "clip.wav")
+        with wave.open(self.path, "wb") as wf:
+            wf.setnchannels(2)
+            wf.setsampwidth(2)
+            wf.setframerate(16000)
+            wf.writeframes(self.pcm.tobytes())
+
+    def test_maps_frames_and_seeks(self):
+        reader = MappedWavReader(self.path)
+        self.assertEqual((reader.sample_rate, reader.channels, reader.num_frames), (16000, 2, 16000))
+        self.assertAlmostEqual(reader.duration, 1.0)
+        np.testing.assert_array_equal(reader.read(0.5, 0.25), self.pcm[8000:12000])
+        chunks = list(reader.iter_chunks(4000, start_seconds=0.5))
+        self.assertEqual([len(chunk) for chunk in chunks], [4000, 4000])
+
+    def test_reads_file_with_unpatched_header(self):
+        with open(self.path, "r+b") as f:
+            data = f.read()
+            offset = data.index(b"data") + 4
+            f.seek(offset)
+            f.write(b"\0\0\0\0") # Data size never written (recorder killed)
+        np.testing.assert_array_equal(MappedWavReader(self.path).frames, self.pcm)
+
+    def test_rejects_non_16_bit(self):
+        path = os.path.join(self.tmp.name, "u8.wav")
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(1)
+            wf.setframerate(8000)
+            wf.writeframes(bytes(100))
+        with self.assertRaises(ValueError):
+            MappedWavReader(path)
+
+    def test_file_replay_starts_at_offset(self):
+        source = FileReplaySource(self.path, pacing="fast", start_seconds=0.75)
+        source.start_capture(chunk_duration=0.1)
+        received = []
+        while not (source.finished and not source.audio_queue):
+            received.extend(chunk[0] for chunk in source.drain_chunks(timeout=0.5))
+        frames = np.frombuffer(b"".join(received), dtype=np.int16).reshape(-1, 2)
+        np.testing.assert_array_equal(frames, self.pcm[12000:])
+
+if __name__ == '__main__':
+    unittest.main()
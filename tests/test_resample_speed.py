@@ -2,6 +2,11 @@
 import numpy as np
 import scipy.signal
 import time
+import sys
+import os
+
+# Add the project root to sys.path so we can import audio.preprocess
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 def test_speed():
     # Simulate 2.5s of audio at 48kHz (120,000 samples)
@@ -39,5 +44,19 @@ def test_speed():
     end_time = time.time()
     print(f"scipy.signal.resample_poly average time: {(end_time - start_time) * 100:.2f}ms")
 
+    # Method 3: StreamingResampler (stateful polyphase, fed in 0.2s chunks like main.py)
+    from audio.preprocess import StreamingResampler
+    chunk_samples = int(0.2 * original_rate)
+    out = np.empty(chunk_samples, dtype=np.float32)
+    
+    start_time = time.time()
+    for _ in range(10):
+        resampler = StreamingResampler(original_rate, target_rate)
+        for i in range(0, num_samples, chunk_samples):
+            resampler.process(audio_data[i:i + chunk_samples], out=out)
+        resampler.flush()
+    end_time = time.time()
+    print(f"StreamingResampler (0.2s chunks) average time: {(end_time - start_time) * 100:.2f}ms")
+
 if __name__ == "__main__":
     test_speed()
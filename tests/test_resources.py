@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+import threading
+
+# Add the project root to sys.path so we can import pipeline.resources
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio.sources import SyntheticSource
+from pipeline.resources import available_cores, pin_current_thread, plan_resources
+
+class TestPlanResources(unittest.TestCase):
+    def test_partitions_eight_cores(self):
+        plan = plan_resources(cores=range(8))
+        self.assertEqual(plan.cores, {"capture": [0], "stt": [1, 2, 3, 4, 5], "translation": [6, 7]})
+        self.assertEqual(plan.stt_options(), {"cpu_threads": 5})
+        self.assertEqual(plan.translation_options(), {"inter_threads": 1, "intra_threads": 2})
+        # Several target languages translated in parallel share the translation budget
+        self.assertEqual(plan.translation_options(num_engines=3)["intra_threads"], 1)
+
+    def test_explicit_thread_counts_and_budget(self):
+        plan = plan_resources(cores=range(16), total_cores=8, stt_threads=4, translation_threads=1, reserved_cores=2)
+        self.assertEqual(plan.cores, {"capture": [0, 1], "stt": [2, 3, 4, 5], "translation": [6]})
+        self.assertEqual((plan.stt_threads, plan.translation_threads), (4, 1))
+
+    def test_few_cores_are_shared_instead_of_empty(self):
+        single = plan_resources(cores=[3])
+        self.assertEqual(single.cores, {"capture": [3], "stt": [3], "translation": [3]})
+        dual = plan_resources(cores=[0, 1])
+        self.assertEqual(dual.cores, {"capture": [0], "stt": [1], "translation": [1]})
+        self.assertTrue(all(cores for cores in dual.cores.values()))
+
+    def test_pin_is_opt_in(self):
+        self.assertFalse(plan_resources(cores=range(4)).pin("stt"))
+
+@unittest.skipUnless(hasattr(os, "sched_getaffinity"), "per-thread affinity is only inspectable on Linux")
+class TestPinning(unittest.TestCase):
+    def run_in_thread(self, target):
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(target()))
+        thread.start()
+        thread.join()
+        return result
+
+    def test_pins_only_the_calling_thread(self):
+        core = available_cores()[-1]
+        def pinned():
+            ok = pin_current_thread([core])
+            return {"ok": ok, "affinity": os.sched_getaffinity(threading.get_native_id())}
+        result = self.run_in_thread(pinned)
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["affinity"], {core})
+        self.assertEqual(sorted(os.sched_getaffinity(0)), available_cores())
+
+    def test_plan_pins_stage_cores(self):
+        core = available_cores()[0]
+        plan = plan_resources(cores=[core], pin=True)
+        result = self.run_in_thread(lambda: {"ok": plan.pin("capture"),
+                                             "affinity": os.sched_getaffinity(threading.get_native_id())})
+        self.assertEqual((result["ok"], result["affinity"]), (True, {core}))
+
+    def test_capture_thread_uses_source_affinity(self):
+        core = available_cores()[-1]
+        affinity = {}
+        class ProbeSource(SyntheticSource):
+            def _capture_loop(self):
+                affinity["capture"] = os.sched_getaffinity(threading.get_native_id())
+                super()._capture_loop()
+        source = ProbeSource([("silence", 0.2)], sample_rate=8000, channels=1, pacing="fast")
+        source.cpu_affinity = [core]
+        source.start_capture(chunk_duration=0.1)
+        source.thread.join()
+        self.assertEqual(affinity["capture"], {core})
+
+if __name__ == '__main__':
+    unittest.main()
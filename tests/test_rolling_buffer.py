@@ -0,0 +1,100 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add the project root to sys.path so we can import pipeline.rolling_buffer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline.rolling_buffer import RollingAudioBuffer
+
+class TestRollingAudioBuffer(unittest.TestCase):
+    def setUp(self):
+        # 1 kHz keeps the numbers small: window 0.5s = 500, update 0.1s = 100, capacity 2s = 2000
+        self.buffer = RollingAudioBuffer(window_size=0.5, update_rate=0.1, sample_rate=1000, max_duration=2.0)
+
+    def _chunk(self, start, size):
+        return np.arange(start, start + size, dtype=np.float32)
+
+    def test_first_window_and_update_rate(self):
+        """Só emite quando há uma janela completa e depois a cada update_rate."""
+        self.assertIsNone(self.buffer.append(self._chunk(0, 400)))
+        window = self.buffer.append(self._chunk(400, 100))
+        np.testing.assert_array_equal(window, self._chunk(0, 500))
+
+        self.assertIsNone(self.buffer.append(self._chunk(500, 50)))
+        window = self.buffer.append(self._chunk(550, 50))
+        np.testing.assert_array_equal(window, self._chunk(100, 500))
+
+    def test_window_is_contiguous_across_wraparound(self):
+        """Janelas que cruzam o fim do ring buffer continuam contíguas e corretas."""
+        start = 0
+        window = None
+        for _ in range(57):  # 57 * 70 = 3990 amostras, o buffer dá a volta várias vezes
+            result = self.buffer.append(self._chunk(start, 70))
+            start += 70
+            if result is not None:
+                window = result
+                np.testing.assert_array_equal(window, self._chunk(start - 500, 500))
+        self.assertIsNotNone(window)
+        self.assertTrue(window.flags.c_contiguous)
+        self.assertEqual(len(self.buffer), 2000)
+
+    def test_window_is_read_only_view(self):
+        """A janela é uma view somente-leitura, sem cópia do armazenamento interno."""
+        window = self.buffer.append(self._chunk(0, 500))
+        self.assertFalse(window.flags.writeable)
+        self.assertFalse(window.flags.owndata)
+        with self.assertRaises(ValueError):
+            window[0] = 1.0
+
+    def test_window_survives_following_appends(self):
+        """A janela não é sobrescrita enquanto menos de (capacidade - janela) amostras chegarem."""
+        window = self.buffer.append(self._chunk(0, 500))
+        snapshot = window.copy()
+        for i in range(15):  # 1500 amostras = capacidade - janela
+            self.buffer.append(self._chunk(500 + i * 100, 100))
+        np.testing.assert_array_equal(window, snapshot)
+
+    def test_held_window_is_overwritten_past_its_lifetime(self):
+        """Passadas (capacidade - janela) amostras a view é sobrescrita; a cópia entregue não."""
+        window = self.buffer.append(self._chunk(0, 500))
+        handed_off = window.copy()
+        for i in range(16):  # 1600 amostras > capacidade - janela
+            self.buffer.append(self._chunk(500 + i * 100, 100))
+        self.assertFalse(np.array_equal(window, self._chunk(0, 500)))
+        np.testing.assert_array_equal(handed_off, self._chunk(0, 500))
+
+        window = self.buffer.append(self._chunk(0, 500))
+        handed_off = window.copy()
+        self.buffer.append(self._chunk(10000, 2000))  # chunk >= capacidade reescreve desde a posição 0
+        self.assertFalse(np.array_equal(window, self._chunk(0, 500)))
+        np.testing.assert_array_equal(handed_off, self._chunk(0, 500))
+
+    def test_chunk_larger_than_capacity(self):
+        """Um chunk maior que a capacidade mantém apenas as amostras mais recentes."""
+        window = self.buffer.append(self._chunk(0, 5000))
+        np.testing.assert_array_equal(window, self._chunk(4500, 500))
+        np.testing.assert_array_equal(self.buffer.buffer, self._chunk(3000, 2000))
+
+    def test_clear(self):
+        """clear reinicia a lógica da primeira janela sem realocar memória."""
+        self.buffer.append(self._chunk(0, 600))
+        storage = self.buffer._storage
+        self.buffer.clear()
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(self.buffer.total_samples, 0)
+        self.assertIsNone(self.buffer.append(self._chunk(0, 100)))
+        self.assertIs(self.buffer._storage, storage)
+
+    def test_window_survives_clear(self):
+        """Uma janela em decodificação não é sobrescrita pelo append logo após um clear."""
+        window = self.buffer.append(self._chunk(0, 500))
+        snapshot = window.copy()
+        self.buffer.clear()
+        self.assertIsNone(self.buffer.append(np.full(100, -7, dtype=np.float32)))
+        np.testing.assert_array_equal(window, snapshot)
+        window = self.buffer.append(np.full(400, -7, dtype=np.float32))
+        np.testing.assert_array_equal(window, np.full(500, -7, dtype=np.float32))
+
+if __name__ == '__main__':
+    unittest.main()
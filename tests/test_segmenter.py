@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add the project root to sys.path so we can import the pipeline modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio.sources import SyntheticSource
+from pipeline.benchmark import run_benchmark, StubTranscriber, StubTranslator
+from pipeline.segmenter import UtteranceSegmenter
+
+class TestUtteranceSegmenter(unittest.TestCase):
+    def setUp(self):
+        # 1 kHz keeps the numbers small: max 2s = 2000 samples, min 0.3s = 300
+        self.segmenter = UtteranceSegmenter(sample_rate=1000, max_utterance_seconds=2.0, min_utterance_seconds=0.3)
+
+    def test_closes_utterance_at_first_non_speech_chunk(self):
+        self.assertEqual(self.segmenter.push(np.ones(200, dtype=np.float32), True), [])
+        self.assertEqual(self.segmenter.push(np.full(200, 2.0, dtype=np.float32), True), [])
+        self.assertTrue(self.segmenter.in_utterance)
+        [utterance] = self.segmenter.push(np.zeros(200, dtype=np.float32), False)
+        np.testing.assert_array_equal(utterance, np.concatenate([np.ones(200), np.full(200, 2.0)]))
+        self.assertFalse(self.segmenter.in_utterance)
+        self.assertEqual(self.segmenter.push(np.zeros(200, dtype=np.float32), False), [])
+
+    def test_mask_splits_a_mixed_chunk(self):
+        audio = np.arange(1000, dtype=np.float32)
+        mask = np.zeros(1000, dtype=bool)
+        mask[100:500] = True
+        mask[600:] = True
+        [first] = self.segmenter.push(audio, mask)
+        np.testing.assert_array_equal(first, audio[100:500])
+        np.testing.assert_array_equal(self.segmenter.flush(), audio[600:])
+
+    def test_forced_cut_at_max_duration(self):
+        for _ in range(10):
+            self.assertEqual(self.segmenter.push(np.ones(200, dtype=np.float32), True), [])
+        [utterance] = self.segmenter.push(np.full(400, 3.0, dtype=np.float32), True)
+        np.testing.assert_array_equal(utterance, np.ones(2000))
+        # The audio that did not fit opens the next utterance
+        np.testing.assert_array_equal(self.segmenter.flush(), np.full(400, 3.0))
+
+    def test_short_utterances_are_discarded(self):
+        self.segmenter.push(np.ones(100, dtype=np.float32), True)
+        self.assertIsNone(self.segmenter.flush())
+
+    def test_returned_audio_is_a_copy(self):
+        self.segmenter.push(np.ones(400, dtype=np.float32), True)
+        utterance = self.segmenter.flush()
+        self.segmenter.push(np.zeros(400, dtype=np.float32), True)
+        np.testing.assert_array_equal(utterance, np.ones(400))
+
+class RecordingTranscriber(StubTranscriber):
+    def __init__(self):
+        super().__init__(latency_ms=1)
+        self.finals = []
+
+    def transcribe(self, audio_data, language=None, beam_size=1):
+        if beam_size > 1:
+            self.finals.append(len(audio_data) / 16000)
+            return "final text", 1.0
+        return super().transcribe(audio_data, language)
+
+class TestSegmentedPipeline(unittest.TestCase):
+    def test_each_utterance_gets_one_final_decode(self):
+        source = SyntheticSource([("speech", 2.0), ("silence", 1.5), ("speech", 1.5), ("silence", 1.0)],
+                                 sample_rate=16000, channels=1, pacing="fast")
+        transcriber = RecordingTranscriber()
+        summary = run_benchmark(source, transcriber, StubTranslator(latency_ms=1), segment=True)
+
+        self.assertEqual(len(transcriber.finals), 2)
+        # Speech (last syllable ends 0.25s early) plus the VAD hangover, at 0.2s chunk granularity
+        self.assertAlmostEqual(transcriber.finals[0], 2.2, delta=0.4)
+        self.assertAlmostEqual(transcriber.finals[1], 1.7, delta=0.4)
+        self.assertIn("final_stt", summary["stages"])
+        self.assertEqual(summary["windows_emitted"], summary["windows_processed"] + summary["windows_dropped"])
+
+if __name__ == '__main__':
+    unittest.main()
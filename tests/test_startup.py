@@ -0,0 +1,51 @@
+import unittest
+import sys
+import os
+import time
+
+# Add the project root to sys.path so we can import pipeline.startup
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline.startup import StartupTimer, load_models
+
+class SlowModel:
+    def __init__(self, load_seconds=0.3):
+        time.sleep(load_seconds)
+        self.warmed = False
+
+    def warmup(self):
+        self.warmed = True
+
+class TestLoadModels(unittest.TestCase):
+    def test_models_load_concurrently_and_warm_up(self):
+        timer = StartupTimer()
+        start = time.time()
+        models = load_models({"transcriber": SlowModel, "translator": SlowModel, "skipped": None}, timer=timer)
+        elapsed = time.time() - start
+
+        self.assertEqual(set(models), {"transcriber", "translator"})
+        self.assertTrue(all(model.warmed for model in models.values()))
+        self.assertLess(elapsed, 0.55) # Serial loading would take at least 0.6s
+        for stage in ("transcriber_loaded", "transcriber_warm", "translator_loaded", "models_ready"):
+            self.assertIn(stage, timer.marks)
+
+    def test_warmup_can_be_disabled(self):
+        models = load_models({"transcriber": lambda: SlowModel(0)}, warmup=False, timer=StartupTimer())
+        self.assertFalse(models["transcriber"].warmed)
+
+    def test_load_errors_propagate(self):
+        def broken():
+            raise RuntimeError("model not found")
+        with self.assertRaises(RuntimeError):
+            load_models({"transcriber": broken}, timer=StartupTimer())
+
+class TestStartupTimer(unittest.TestCase):
+    def test_first_subtitle_is_recorded_once(self):
+        timer = StartupTimer(start=time.time() - 1.0)
+        timer.first_subtitle()
+        first = timer.marks["first_subtitle"]
+        timer.first_subtitle()
+        self.assertEqual(timer.marks["first_subtitle"], first)
+        self.assertGreaterEqual(first, 1000)
+
+if __name__ == '__main__':
+    unittest.main()
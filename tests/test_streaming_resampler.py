@@ -0,0 +1,66 @@
+import unittest
+import sys
+import os
+import numpy as np
+import scipy.signal
+
+# Add the project root to sys.path so we can import audio.preprocess
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio.preprocess import StreamingResampler, COMMON_RATE_PAIRS
+
+class TestStreamingResampler(unittest.TestCase):
+    def _stream(self, resampler, audio, chunk_sizes):
+        outputs = []
+        start = 0
+        for size in chunk_sizes:
+            outputs.append(resampler.process(audio[start:start + size]).copy())
+            start += size
+        outputs.append(resampler.process(audio[start:]).copy())
+        outputs.append(resampler.flush())
+        return np.concatenate(outputs)
+
+    def test_matches_whole_signal_at_seams(self):
+        """Chunked output must equal resample_poly on the whole signal, including at the seams."""
+        rng = np.random.default_rng(42)
+        for original_rate, target_rate in COMMON_RATE_PAIRS:
+            audio = rng.uniform(-1.0, 1.0, original_rate).astype(np.float32)
+            # Irregular chunk sizes, including tiny ones, to stress the filter history
+            chunk_sizes = [int(0.2 * original_rate), 1, 7, int(0.05 * original_rate), 333]
+
+            resampler = StreamingResampler(original_rate, target_rate)
+            streamed = self._stream(resampler, audio, chunk_sizes)
+            reference = scipy.signal.resample_poly(audio, resampler.up, resampler.down)
+
+            self.assertEqual(len(streamed), len(reference))
+            np.testing.assert_allclose(streamed, reference, atol=1e-5)
+
+    def test_no_length_drift_on_long_runs(self):
+        """10 minutes of 0.2s chunks at 44.1kHz must produce exactly 10 minutes at 16kHz."""
+        resampler = StreamingResampler(44100, 16000)
+        chunk = np.zeros(int(0.2 * 44100), dtype=np.float32)
+        total = 0
+        for _ in range(3000):
+            total += len(resampler.process(chunk))
+        total += len(resampler.flush())
+        self.assertEqual(total, 600 * 16000)
+
+    def test_tone_is_preserved(self):
+        """A 440Hz tone keeps its frequency and amplitude after chunked resampling."""
+        t = np.arange(48000) / 48000
+        tone = (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+        resampler = StreamingResampler(48000, 16000)
+        output = self._stream(resampler, tone, [9600] * 4)
+
+        expected = 0.5 * np.sin(2 * np.pi * 440 * np.arange(16000) / 16000)
+        # Ignore the zero-padded edges of the stream
+        np.testing.assert_allclose(output[100:-100], expected[100:-100], atol=1e-3)
+
+    def test_out_buffer_is_reused(self):
+        """When an output buffer is passed, the result is a view into it."""
+        resampler = StreamingResampler(48000, 16000)
+        out = np.empty(4000, dtype=np.float32)
+        result = resampler.process(np.ones(9600, dtype=np.float32), out=out)
+        self.assertTrue(np.shares_memory(result, out))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add the project root to sys.path so we can import speech.streaming
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from speech.streaming import HypothesisBuffer, StreamingTranscriber
+
+class ScriptedTranscriber:
+    """Fake WhisperTranscriber: words live at fixed stream times; returns those inside the buffer."""
+    def __init__(self, stream_words):
+        self.stream_words = stream_words # (start, end, word) in stream time
+        self.buffer_start = 0.0
+        self.calls = []
+
+    def transcribe_words(self, audio_data, language=None, initial_prompt=None, beam_size=1):
+        self.calls.append((len(audio_data), initial_prompt))
+        end = self.buffer_start + len(audio_data) / 16000
+        words = [(s - self.buffer_start, e - self.buffer_start, w)
+                 for s, e, w in self.stream_words if s >= self.buffer_start - 0.05 and e <= end]
+        return words, 1.0
+
+class TestHypothesisBuffer(unittest.TestCase):
+    def test_commits_only_agreed_prefix(self):
+        buffer = HypothesisBuffer()
+        buffer.insert([(0.0, 0.3, " Hello"), (0.4, 0.7, " word")])
+        self.assertEqual(buffer.flush(), [])
+
+        buffer.insert([(0.0, 0.3, " hello,"), (0.4, 0.7, " world"), (0.8, 1.0, " again")])
+        committed = buffer.flush()
+        self.assertEqual([w[2] for w in committed], [" hello,"])
+        self.assertEqual([w[2] for w in buffer.tentative], [" world", " again"])
+        self.assertEqual(buffer.last_committed_time, 0.3)
+
+    def test_drops_repeated_committed_words(self):
+        buffer = HypothesisBuffer()
+        buffer.insert([(0.0, 0.3, " one"), (0.4, 0.7, " two")])
+        buffer.flush()
+        buffer.insert([(0.0, 0.3, " one"), (0.4, 0.7, " two")])
+        buffer.flush()
+        # Whisper repeats "two" right at the committed boundary
+        buffer.insert([(0.65, 0.7, " two"), (0.8, 1.1, " three")])
+        self.assertEqual([w[2] for w in buffer.new], [" three"])
+
+class TestStreamingTranscriber(unittest.TestCase):
+    def setUp(self):
+        words = [(i * 0.5, i * 0.5 + 0.4, f" w{i}") for i in range(20)]
+        self.fake = ScriptedTranscriber(words)
+        self.streamer = StreamingTranscriber(self.fake, min_trim_seconds=0.5)
+
+    def _feed(self, seconds, update=0.5, window=1.5):
+        """Simulates RollingAudioBuffer windows every `update` seconds."""
+        committed = []
+        audio = np.zeros(int(seconds * 16000), dtype=np.float32)
+        for end in np.arange(window, seconds + 1e-9, update):
+            end_sample = int(round(end * 16000))
+            self.streamer.insert_window(audio[end_sample - int(window * 16000):end_sample], end_sample)
+            self.fake.buffer_start = self.streamer._buffer_start
+            text, tentative, _ = self.streamer.process_iter()
+            if text:
+                committed.append(text)
+        return committed
+
+    def test_commits_each_word_once_and_trims_buffer(self):
+        committed = self._feed(6.0)
+        words = " ".join(committed).split()
+        self.assertEqual(words, sorted(set(words), key=words.index)) # no repeats
+        self.assertEqual(words[:5], ["w0", "w1", "w2", "w3", "w4"])
+        # Committed audio was trimmed: the buffer never grows to the full stream
+        self.assertLess(self.streamer.buffer_seconds, 3.0)
+        max_decoded = max(length for length, _ in self.fake.calls)
+        self.assertLess(max_decoded, 6.0 * 16000)
+
+    def test_committed_text_is_used_as_prompt(self):
+        self._feed(4.0)
+        prompts = [prompt for _, prompt in self.fake.calls if prompt]
+        self.assertTrue(prompts)
+        self.assertTrue(prompts[-1].startswith("w0"))
+
+    def test_reset_after_clear(self):
+        self._feed(3.0)
+        self.streamer.reset()
+        self.assertEqual(self.streamer.buffer_seconds, 0.0)
+        self.assertEqual(self.streamer.hypothesis.tentative, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add the project root to sys.path so the child process can import the test helpers too
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline.stt_process import ProcessSTTWorker
+
+class EchoTranscriber:
+    """Runs inside the child process: reports what it received through shared memory."""
+    def transcribe(self, audio_data, language=None, beam_size=1):
+        if language == "crash":
+            os._exit(3) # Simulates the child dying mid-request (segfault, OOM kill)
+        return f"{len(audio_data)}:{float(audio_data.sum()):.1f}:{language}:{os.getpid()}", 1.0
+
+    def transcribe_words(self, audio_data, language=None, initial_prompt=None, beam_size=1):
+        return [(0.0, 0.5, f" {initial_prompt}")], 1.0
+
+class UpperTranslator:
+    def __init__(self, suffix=""):
+        self.suffix = suffix
+
+    def incremental_translate(self, current_english_text):
+        return current_english_text.upper() + self.suffix, 1.0
+
+    def clear_state(self):
+        pass
+
+class TestProcessSTTWorker(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.worker = ProcessSTTWorker(
+            transcriber_spec=("tests.test_stt_process:EchoTranscriber", {}),
+            translator_spec=("tests.test_stt_process:UpperTranslator", {"suffix": "!"}),
+            num_slots=2,
+            max_window_seconds=1.0,
+            start_timeout=60,
+        ).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.worker.close()
+
+    def test_window_goes_through_shared_memory(self):
+        window = np.full(8000, 0.5, dtype=np.float32)
+        text, _ = self.worker.transcribe(window, language="en")
+        length, total, language, pid = text.split(":")
+        self.assertEqual((length, total, language), ("8000", "4000.0", "en"))
+        self.assertNotEqual(int(pid), os.getpid())
+
+    def test_long_window_keeps_most_recent_audio(self):
+        window = np.concatenate([np.zeros(16000), np.ones(16000)]).astype(np.float32)
+        text, _ = self.worker.transcribe(window)
+        self.assertTrue(text.startswith("16000:16000.0"))
+
+    def test_words_and_translation_run_remotely(self):
+        words, _ = self.worker.transcribe_words(np.zeros(100, dtype=np.float32), initial_prompt="context")
+        self.assertEqual(words, [(0.0, 0.5, " context")])
+        self.assertEqual(self.worker.translator.incremental_translate("hello")[0], "HELLO!")
+
+class TestChildDeath(unittest.TestCase):
+    def test_pending_and_later_calls_fail_with_exit_code(self):
+        worker = ProcessSTTWorker(transcriber_spec=("tests.test_stt_process:EchoTranscriber", {}),
+                                  num_slots=1, max_window_seconds=1.0, start_timeout=60).start()
+        try:
+            with self.assertRaisesRegex(RuntimeError, "exit code 3"):
+                worker.transcribe(np.zeros(100, dtype=np.float32), language="crash")
+            with self.assertRaisesRegex(RuntimeError, "exit code 3"):
+                worker.transcribe(np.zeros(100, dtype=np.float32), language="en")
+        finally:
+            worker.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Add the project root to sys.path so we can import pipeline.transcript
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline.transcript import TranscriptSink, format_timestamp
+
+class TestTranscriptSink(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def read(self, name):
+        with open(os.path.join(self.tmp.name, name), encoding="utf-8") as f:
+            return f.read()
+
+    def test_format_timestamp(self):
+        self.assertEqual(format_timestamp(3723.4567), "01:02:03,457")
+        self.assertEqual(format_timestamp(1.5, "."), "00:00:01.500")
+        self.assertEqual(format_timestamp(-2), "00:00:00,000")
+
+    def test_writes_all_formats_on_close(self):
+        sink = TranscriptSink(self.tmp.name, session_name="s", session_start=100.0, flush_interval=5.0).start()
+        sink.add("Hello there", "Olá", 101.0, 102.5)
+        sink.add("How are you", "Como vai", 103.0, 104.25, language="pt")
+        sink.close()
+
+        records = [json.loads(line) for line in self.read("s.jsonl").splitlines()]
+        self.assertEqual([r["source"] for r in records], ["Hello there", "How are you"])
+        self.assertEqual((records[0]["start"], records[0]["end"]), (1.0, 2.5))
+        self.assertEqual(self.read("s.srt"),
+                         "1\n00:00:01,000 --> 00:00:02,500\nOlá\n\n2\n00:00:03,000 --> 00:00:04,250\nComo vai\n\n")
+        vtt = self.read("s.vtt")
+        self.assertTrue(vtt.startswith("WEBVTT\n\n"))
+        self.assertIn("00:00:03.000 --> 00:00:04.250\nComo vai", vtt)
+        self.assertEqual(sink.segments_written, 2)
+
+    def test_incremental_segments_do_not_overlap(self):
+        sink = TranscriptSink(self.tmp.name, session_name="s", formats=("jsonl",), session_start=0.0).start()
+        sink.add_incremental("one", "um", end=2.0, window_seconds=1.5)
+        sink.add_incremental("two", "dois", end=2.4, window_seconds=1.5)
+        sink.close()
+        records = [json.loads(line) for line in self.read("s.jsonl").splitlines()]
+        self.assertEqual([(r["start"], r["end"]) for r in records], [(0.5, 2.0), (2.0, 2.4)])
+        self.assertFalse(records[0]["final"])
+
+    def test_rotates_by_size_and_restarts_cue_numbers(self):
+        sink = TranscriptSink(self.tmp.name, session_name="s", formats=("srt",), max_bytes=60,
+                              session_start=0.0).start()
+        for i in range(4):
+            sink.add(f"line {i}", f"linha {i}", i, i + 1)
+        sink.close()
+        parts = sorted(name for name in os.listdir(self.tmp.name) if name.endswith(".srt"))
+        self.assertGreater(len(parts), 1)
+        self.assertEqual(parts[0], "s-001.srt")
+        for name in parts:
+            self.assertTrue(self.read(name).startswith("1\n"))
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        sink = TranscriptSink(self.tmp.name, session_name="s", max_pending=2) # Writer not started
+        results = [sink.add("a", "b", 0, 1) for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(sink.segments_dropped, 1)
+
+    def test_rejects_unknown_format(self):
+        with self.assertRaises(ValueError):
+            TranscriptSink(self.tmp.name, formats=("docx",))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import threading
+
+# Add the project root to sys.path so we can import translation.batcher
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from translation.batcher import TranslationBatcher
+
+class FakeEngine:
+    """Records the batches it receives, like TranslationEngine.translate_batch."""
+    def __init__(self):
+        self.batches = []
+
+    def translate_batch(self, texts):
+        self.batches.append(list(texts))
+        return [text.upper() for text in texts], 1.0
+
+class TestTranslationBatcher(unittest.TestCase):
+    def test_concurrent_requests_share_a_batch(self):
+        engine = FakeEngine()
+        batcher = TranslationBatcher(engine, max_batch_size=8, max_latency_ms=200)
+        results = {}
+
+        def worker(i):
+            results[i] = batcher.translate(f"sentence {i}")[0]
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        batcher.close()
+
+        self.assertEqual(results, {i: f"SENTENCE {i}" for i in range(5)})
+        self.assertLess(len(engine.batches), 5)
+
+    def test_batch_size_limit(self):
+        engine = FakeEngine()
+        batcher = TranslationBatcher(engine, max_batch_size=2, max_latency_ms=500)
+        futures = [batcher.submit(f"t{i}") for i in range(5)]
+        self.assertEqual([f.result(timeout=5) for f in futures], [f"T{i}" for i in range(5)])
+        batcher.close()
+        self.assertTrue(all(len(batch) <= 2 for batch in engine.batches))
+
+    def test_errors_are_propagated(self):
+        class FailingEngine:
+            def translate_batch(self, texts):
+                raise ValueError("model missing")
+
+        batcher = TranslationBatcher(FailingEngine(), max_latency_ms=1)
+        with self.assertRaises(ValueError):
+            batcher.submit("hello").result(timeout=5)
+        batcher.close()
+
+    def test_submit_racing_close_always_resolves(self):
+        for _ in range(20):
+            batcher = TranslationBatcher(FakeEngine(), max_latency_ms=1)
+            futures = []
+
+            def producer():
+                while True:
+                    try:
+                        futures.append(batcher.submit("text"))
+                    except RuntimeError:
+                        return
+
+            threads = [threading.Thread(target=producer) for _ in range(3)]
+            for t in threads:
+                t.start()
+            batcher.close()
+            for t in threads:
+                t.join()
+            # Every accepted request is translated before the thread stops
+            self.assertTrue(all(f.result(timeout=5) == "TEXT" for f in futures))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the project root to sys.path so we can import translation.cache
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from translation.cache import TranslationCache
+
+class TestTranslationCache(unittest.TestCase):
+    def test_normalized_key_hits(self):
+        cache = TranslationCache(max_entries=4)
+        cache.put("Hello  world", "en", "pt", "Olá mundo")
+        self.assertEqual(cache.get(" hello world ", "en", "pt"), "Olá mundo")
+        self.assertIsNone(cache.get("hello world", "en", "es")) # Different language pair
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_lru_eviction(self):
+        cache = TranslationCache(max_entries=2)
+        cache.put("one", "en", "pt", "um")
+        cache.put("two", "en", "pt", "dois")
+        cache.get("one", "en", "pt")                 # "one" becomes the most recent
+        cache.put("three", "en", "pt", "três")       # evicts "two"
+        self.assertIsNone(cache.get("two", "en", "pt"))
+        self.assertEqual(cache.get("one", "en", "pt"), "um")
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "cache.json")
+            cache = TranslationCache(path=path)
+            cache.put("Good morning", "en", "pt", "Bom dia")
+            cache.save()
+
+            restored = TranslationCache(path=path)
+            self.assertEqual(len(restored), 1)
+            self.assertEqual(restored.get("good morning", "en", "pt"), "Bom dia")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import sys
+import os
+import time
+import contextlib
+import io
+
+# Add the project root to sys.path so we can import translation.fanout
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from translation.delta import TranscriptDelta, untranslated_suffix
+from translation.fanout import TranslationFanout
+import main
+
+class TaggingEngine:
+    """Prefixes the text with its language code, after an optional simulated decode time."""
+    def __init__(self, code, delay=0.0):
+        self.code = code
+        self.delay = delay
+        self.calls = []
+        self.cleared = 0
+        self.warmed = False
+
+    def translate(self, text):
+        self.calls.append(text)
+        time.sleep(self.delay)
+        return f"{self.code}:{text}", self.delay * 1000
+
+    def translate_batch(self, texts):
+        self.calls.extend(texts)
+        return [f"{self.code}:{text}" for text in texts], 0.0
+
+    def warmup(self):
+        self.warmed = True
+
+    def clear_state(self):
+        self.cleared += 1
+
+class TestTranscriptDelta(unittest.TestCase):
+    def test_only_new_text_is_returned(self):
+        delta = TranscriptDelta()
+        self.assertEqual(delta.update("Hello world"), "Hello world")
+        self.assertEqual(delta.update("Hello world how are you"), "how are you")
+        self.assertEqual(delta.update("Hello world how are you"), "")
+
+    def test_reset_forgets_previous_text(self):
+        delta = TranscriptDelta()
+        delta.update("Hello world")
+        delta.reset()
+        self.assertEqual(delta.update("Hello world"), "Hello world")
+
+    def test_untranslated_suffix_matches_translator_behaviour(self):
+        self.assertEqual(untranslated_suffix("", "Hi there"), "Hi there")
+        self.assertEqual(untranslated_suffix("Hi there", "Hi there friend"), "friend")
+
+    def test_sliding_window_start_is_aligned(self):
+        # Old audio left the window: the overlap is a suffix of the previous transcript
+        self.assertEqual(untranslated_suffix("the quick brown fox", "brown fox jumps over"), "jumps over")
+        self.assertEqual(untranslated_suffix("The quick brown fox jump.", "Brown fox, jumps over the"), "over the")
+        self.assertEqual(untranslated_suffix("and um so we went", "so we uh went home"), "home")
+
+    def test_revised_tail_and_unrelated_text(self):
+        self.assertEqual(untranslated_suffix("value 1", "value 7"), "7")
+        self.assertEqual(untranslated_suffix("one two three four", "five six seven"), "five six seven")
+
+    def test_words_are_sent_once_over_sliding_windows(self):
+        words = "so today we are going to talk about how the pipeline translates live captions".split()
+        delta = TranscriptDelta()
+        sent = []
+        for end in range(3, len(words) + 1):
+            window = words[max(0, end - 5):end] # ~5 words fit in the window
+            new_text = delta.update(" ".join(window).capitalize() + ".")
+            sent.extend(new_text.split())
+        self.assertEqual([w.strip(".").lower() for w in sent], words)
+
+class TestTranslationFanout(unittest.TestCase):
+    def setUp(self):
+        self.engines = {code: TaggingEngine(code) for code in ("pt", "es", "fr")}
+        self.received = []
+        sinks = {code: lambda code, text: self.received.append((code, text)) for code in ("es", "fr")}
+        self.fanout = TranslationFanout(self.engines, sinks=sinks)
+
+    def tearDown(self):
+        self.fanout.close()
+
+    def test_primary_language_is_returned_and_others_go_to_sinks(self):
+        translated, _ = self.fanout.incremental_translate("Good morning")
+        self.assertEqual(translated, "pt:Good morning")
+        self.assertEqual(sorted(self.received), [("es", "es:Good morning"), ("fr", "fr:Good morning")])
+
+    def test_delta_is_computed_once_for_all_languages(self):
+        self.fanout.incremental_translate("Good morning")
+        self.fanout.incremental_translate("Good morning everyone")
+        translated, elapsed = self.fanout.incremental_translate("Good morning everyone")
+        self.assertEqual((translated, elapsed), ("", 0.0))
+        for engine in self.engines.values():
+            self.assertEqual(engine.calls, ["Good morning", "everyone"])
+
+    def test_clear_state_resets_delta_and_engines(self):
+        self.fanout.incremental_translate("Good morning")
+        self.fanout.clear_state()
+        translated, _ = self.fanout.incremental_translate("Good morning")
+        self.assertEqual(translated, "pt:Good morning")
+        self.assertTrue(all(engine.cleared == 1 for engine in self.engines.values()))
+
+    def test_translate_batch_returns_primary_and_feeds_sinks(self):
+        translations, _ = self.fanout.translate_batch(["one", "two"])
+        self.assertEqual(translations, ["pt:one", "pt:two"])
+        self.assertEqual(len(self.received), 4)
+
+    def test_warmup_reaches_every_engine(self):
+        self.fanout.warmup()
+        self.assertTrue(all(engine.warmed for engine in self.engines.values()))
+
+    def test_languages_are_translated_concurrently(self):
+        engines = {code: TaggingEngine(code, delay=0.2) for code in ("pt", "es", "fr", "de")}
+        fanout = TranslationFanout(engines, max_workers=4)
+        try:
+            start = time.time()
+            results, _ = fanout.translate_all("Hello")
+            elapsed = time.time() - start
+        finally:
+            fanout.close()
+        self.assertEqual(set(results), {"pt", "es", "fr", "de"})
+        self.assertLess(elapsed, 0.6) # Sequential would take 0.8 s
+
+    def test_requires_an_engine(self):
+        with self.assertRaises(ValueError):
+            TranslationFanout({})
+
+class TestLanguageArguments(unittest.TestCase):
+    def assert_rejected(self, argv):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main.parse_args(argv)
+
+    def test_several_languages(self):
+        self.assertEqual(main.parse_args(["--languages", "es, fr"]).languages, ("es", "fr"))
+
+    def test_empty_language_list_is_rejected(self):
+        self.assert_rejected(["--languages", ""])
+        self.assert_rejected(["--languages", " , "])
+
+    def test_stt_process_translation_takes_one_language(self):
+        self.assertEqual(main.parse_args(["--stt-process", "--stt-process-translation", "--languages", "es"]).languages,
+                         ("es",))
+        self.assert_rejected(["--stt-process", "--stt-process-translation", "--languages", "pt,es"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add the project root to sys.path so we can import audio.vad
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio.preprocess import AudioPreprocessor
+from audio.sources import SyntheticSource
+from audio.vad import FrameVAD
+
+RATE = 16000
+
+def _render(segments):
+    return SyntheticSource(segments, sample_rate=RATE, channels=1).render()[:, 0].astype(np.float32) / 32768.0
+
+def _run(vad, audio, chunk=3200):
+    speech, events = [], []
+    for start in range(0, len(audio), chunk):
+        result = vad.process(audio[start:start + chunk])
+        speech.extend(result.speech)
+        events.extend(result.events)
+    return np.array(speech), events
+
+class TestFrameVAD(unittest.TestCase):
+    def test_segment_boundaries(self):
+        audio = _render([("silence", 1.0), ("speech", 2.0), ("silence", 1.5)])
+        speech, events = _run(FrameVAD(), audio)
+        self.assertEqual([kind for kind, _ in events], ["start", "end"])
+        self.assertAlmostEqual(events[0][1], 1.0, delta=0.1)
+        # The synthetic speech's last syllable ends 0.25s before the segment does
+        self.assertAlmostEqual(events[1][1], 2.75, delta=0.1)
+        self.assertFalse(speech[:45].any())
+        self.assertFalse(speech[-40:].any())
+
+    def test_hangover_bridges_syllable_pauses(self):
+        # Quiet speech with 0.25s gaps between syllables stays a single segment
+        audio = _render([("silence", 0.5), ("speech", 2.0, {"amplitude": 0.02}), ("silence", 1.0)])
+        _, events = _run(FrameVAD(), audio)
+        self.assertEqual([kind for kind, _ in events], ["start", "end"])
+
+    def test_steady_noise_and_music_are_absorbed(self):
+        rng = np.random.default_rng(0)
+        t = np.arange(RATE * 5) / RATE
+        noise = (0.03 * rng.standard_normal(len(t))).astype(np.float32)
+        chord = (0.1 * sum(np.sin(2 * np.pi * f * t) for f in (220, 277, 330))).astype(np.float32)
+        for audio in (noise, chord):
+            speech, _ = _run(FrameVAD(), audio)
+            self.assertFalse(speech[-150:].any()) # Last 3s
+
+    def test_speech_over_noise(self):
+        rng = np.random.default_rng(1)
+        audio = _render([("silence", 3.0), ("speech", 2.0), ("silence", 1.0)])
+        audio += (0.01 * rng.standard_normal(len(audio))).astype(np.float32)
+        _, events = _run(FrameVAD(), audio)
+        self.assertEqual([kind for kind, _ in events], ["start", "end"])
+        self.assertAlmostEqual(events[0][1], 3.0, delta=0.15)
+
+    def test_frames_carry_across_chunks(self):
+        audio = _render([("speech", 1.0)])
+        vad = FrameVAD()
+        total = sum(len(vad.process(audio[i:i + 100]).probabilities) for i in range(0, len(audio), 100))
+        self.assertEqual(total, len(audio) // vad.frame_length)
+
+    def test_rejects_invalid_frame_length(self):
+        with self.assertRaises(ValueError):
+            FrameVAD(frame_ms=50)
+
+class TestPreprocessorWithFrameVAD(unittest.TestCase):
+    def test_uses_smoothed_decision(self):
+        preprocessor = AudioPreprocessor(vad=FrameVAD(sample_rate=48000))
+        pcm = SyntheticSource([("silence", 1.0), ("speech", 1.0)], sample_rate=48000, channels=2).render()
+        chunks = np.split(pcm, 10)
+        decisions = [preprocessor.analyze(chunk.tobytes(), 48000, 2)[1] for chunk in chunks]
+        self.assertEqual(decisions[:5], [False] * 5)
+        self.assertTrue(all(decisions[6:]))
+        self.assertEqual(len(preprocessor.last_vad.probabilities), 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from pipeline.metrics import METRICS
+
+_batch_size = METRICS.histogram("translation_batch_size", (1, 2, 4, 8, 16, 32, 64))
+
+class TranslationBatcher:
+    """
+    Groups translation requests coming from one or more threads into batched decodes.
+
+    `submit(text)` returns a Future. A background thread waits for the first pending
+    request and then keeps collecting until `max_batch_size` requests are pending or
+    `max_latency_ms` has passed since the first one, and sends them all to
+    `engine.translate_batch` in a single call.
+    """
+    def __init__(self, engine, max_batch_size=16, max_latency_ms=50.0):
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_latency_ms = max_latency_ms
+        self._requests = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock() # The closed check and the put are atomic, so nothing lands after the sentinel
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, text):
+        """Queues a text for translation. Returns a Future with the translated string."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("TranslationBatcher is closed.")
+            self._requests.put((text, future))
+        return future
+
+    def translate(self, text):
+        """Blocking helper with the TranslationEngine.translate signature: (translation, ms)."""
+        start_time = time.time()
+        translation = self.submit(text).result()
+        return translation, (time.time() - start_time) * 1000
+
+    def _collect(self):
+        first = self._requests.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.time() + self.max_latency_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                item = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Close requested: translate what we have, then stop
+                self._requests.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            _batch_size.observe(len(batch))
+            texts = [text for text, _ in batch]
+            try:
+                translations, _ = self.engine.translate_batch(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), translation in zip(batch, translations):
+                future.set_result(translation)
+
+    def close(self):
+        """Finishes the pending requests and stops the background thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._requests.put(None)
+        self.thread.join()
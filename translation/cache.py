@@ -0,0 +1,108 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from pipeline.metrics import METRICS
+
+_cache_hits = METRICS.counter("translation_cache_hits")
+_cache_misses = METRICS.counter("translation_cache_misses")
+
+def normalize_text(text):
+    """Normalizes source text for the cache key: trims, collapses whitespace and ignores case."""
+    return " ".join(text.split()).casefold()
+
+class TranslationCache:
+    """
+    Bounded LRU cache of translations, keyed on (from_code, to_code, normalized source text).
+
+    Overlapping windows and recurring content (jingles, catchphrases) produce the same
+    phrases over and over; a hit skips the Argos call entirely. Thread-safe.
+    If `path` is given, the cache is loaded from it on creation and `save()` writes it back.
+    """
+    def __init__(self, max_entries=1024, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(text, from_code, to_code):
+        return f"{from_code}>{to_code}:{normalize_text(text)}"
+
+    def get(self, text, from_code, to_code):
+        """Returns the cached translation or None (and updates the hit/miss statistics)."""
+        key = self.make_key(text, from_code, to_code)
+        with self._lock:
+            translation = self._entries.get(key)
+            if translation is None:
+                self.misses += 1
+                _cache_misses.inc()
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        _cache_hits.inc()
+        return translation
+
+    def put(self, text, from_code, to_code, translation):
+        key = self.make_key(text, from_code, to_code)
+        with self._lock:
+            self._entries[key] = translation
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss statistics as a dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def load(self, path=None):
+        """Loads entries from a JSON file written by save(), keeping the LRU order."""
+        path = path or self.path
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not load translation cache from {path}: {e}")
+            return
+        with self._lock:
+            for key, translation in data.get("entries", []):
+                self._entries[key] = translation
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self, path=None):
+        """Writes the cache to disk atomically (temporary file + rename)."""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            data = {"version": 1, "entries": list(self._entries.items())}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
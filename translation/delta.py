@@ -0,0 +1,115 @@
+"""
+Source-side delta detection between successive transcripts of a sliding window.
+
+The STT sees the last ~1.5 s of audio, so each transcript drops words at its start as old
+audio leaves the window and adds words at its end. The text already translated is the
+overlap between the end of the previous transcript and the start of the current one.
+`align_overlap` finds it with a semi-global alignment (suffix of the previous words
+against a prefix of the current words). Words are compared without case or punctuation,
+and small ASR edits are tolerated: a substituted, inserted or dropped word, or a word cut
+at the window edge ("jump" / "jumps"). The last words of the previous transcript are the
+least stable, so up to TAIL_REVISION_WORDS of them may be revised without penalty.
+Only the words after the aligned prefix are new.
+"""
+import re
+
+from pipeline.metrics import METRICS
+
+_no_overlap = METRICS.counter("translation_delta_no_overlap",
+                              description="Transcripts with no overlap with the previous one (translated whole)")
+_words_skipped = METRICS.counter("translation_delta_words_skipped",
+                                 description="Words already translated in the previous transcript")
+
+MATCH = 1.0
+PARTIAL_MATCH = 0.5 # Word cut at the window edge or inflected ("jump" / "jumps")
+MISMATCH = -1.0
+GAP = -1.0
+MIN_OVERLAP_SCORE = 1.0
+# Only the last len(current) + LOOKBACK_SLACK previous words can overlap the current transcript
+LOOKBACK_SLACK = 8
+# Trailing previous words the ASR may have rewritten ("value 1" -> "value 7": only "7" is new)
+TAIL_REVISION_WORDS = 2
+
+def normalize_word(word):
+    """Lowercase, without punctuation (apostrophes kept)."""
+    return re.sub(r"[^\w']", "", word.lower())
+
+def _word_score(a, b):
+    if a == b:
+        return MATCH
+    shorter, longer = sorted((a, b), key=len)
+    if len(shorter) >= 4 and longer.startswith(shorter):
+        return PARTIAL_MATCH
+    return MISMATCH
+
+def align_overlap(previous_words, current_words):
+    """
+    Semi-global alignment of a suffix of `previous_words` with a prefix of `current_words`
+    (both already normalized). Unaligned leading previous words (audio that left the window),
+    up to TAIL_REVISION_WORDS trailing previous words (revised by the ASR) and trailing current
+    words (new audio) are free; everything in between pays for substitutions and gaps.
+    Returns (number of current words covered by the overlap, alignment score); (0, 0.0)
+    when there is no credible overlap.
+    O(len(current) * (len(current) + LOOKBACK_SLACK)) time, O(len(current)) memory.
+    """
+    current_count = len(current_words)
+    previous_words = previous_words[-(current_count + LOOKBACK_SLACK):]
+    if not previous_words or not current_count:
+        return 0, 0.0
+
+    # row[j]: best score aligning some suffix of previous[:i] with current[:j]
+    row = [GAP * j for j in range(current_count + 1)]
+    last_rows = [row] # Rows of the last TAIL_REVISION_WORDS + 1 prefixes of previous_words
+    for word in previous_words:
+        new_row = [0.0] # The overlap may start at any previous word
+        for j in range(1, current_count + 1):
+            new_row.append(max(row[j - 1] + _word_score(word, current_words[j - 1]), # match / substitution
+                               row[j] + GAP,                                           # previous word dropped
+                               new_row[j - 1] + GAP))                                  # current word inserted
+        row = new_row
+        last_rows = (last_rows + [row])[-(TAIL_REVISION_WORDS + 1):]
+
+    # The overlap ends at one of the last previous words; the current tail is free.
+    # Ties go to the longer overlap (fewer words sent to translation again).
+    best_score, best_end = max((tail_row[j], j) for tail_row in last_rows for j in range(1, current_count + 1))
+    if best_score < MIN_OVERLAP_SCORE:
+        return 0, 0.0
+    return best_end, best_score
+
+def untranslated_suffix(previous_text, current_text):
+    """
+    Returns the words of `current_text` after its overlap with the end of `previous_text`
+    (see align_overlap), i.e. the part that has not been translated yet.
+    """
+    if not previous_text:
+        return current_text
+    words_curr = current_text.split()
+    covered, _ = align_overlap([normalize_word(w) for w in previous_text.split()],
+                               [normalize_word(w) for w in words_curr])
+    if covered:
+        _words_skipped.inc(covered)
+    else:
+        _no_overlap.inc()
+    return " ".join(words_curr[covered:])
+
+class TranscriptDelta:
+    """
+    Source-side delta detection over successive transcripts of a sliding window.
+    Independent of the target language, so one instance can feed any number of
+    translation engines (see translation.fanout).
+    """
+    def __init__(self):
+        self.previous_text = ""
+
+    def update(self, current_text):
+        """Takes the latest transcript and returns only the text not seen before ("" if none)."""
+        current_text = current_text.strip()
+        if not current_text:
+            return ""
+        new_text = untranslated_suffix(self.previous_text, current_text)
+        self.previous_text = current_text
+        return new_text.strip()
+
+    def reset(self):
+        """Clears the transcript history (e.g. after a long silence or a final utterance)."""
+        self.previous_text = ""
@@ -0,0 +1,111 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline.metrics import METRICS
+from translation.delta import TranscriptDelta
+
+_fanout_ms = METRICS.histogram("translation_fanout_ms", (10, 25, 50, 100, 200, 300, 500, 750, 1000, 2000))
+
+class TranslationFanout:
+    """
+    Translates one transcription into several target languages.
+
+    The source-side state (delta detection over the sliding-window transcripts) is kept
+    once, here; only the new text is handed to the per-language engines, which run
+    concurrently on a bounded thread pool (CTranslate2 releases the GIL while decoding).
+    Each result is delivered to the sink of its language.
+
+    It exposes the TranslationEngine interface (incremental_translate / translate /
+    translate_batch / clear_state / close), returning the translation of the primary
+    (first) language, so stt_worker_loop can use it as its translator unchanged:
+    the primary language goes to the overlay, the others to their sinks.
+    """
+    def __init__(self, engines, sinks=None, max_workers=None):
+        """
+        :param engines: {to_code: engine} in priority order; the first one is the primary language.
+        :param sinks: {to_code: callable(to_code, translated_text)} called for every non-empty result.
+        :param max_workers: Pool size (default: one per language, at most the number of CPUs).
+        """
+        if not engines:
+            raise ValueError("TranslationFanout needs at least one engine.")
+        self.engines = dict(engines)
+        self.primary = next(iter(self.engines))
+        self.sinks = dict(sinks or {})
+        self.delta = TranscriptDelta()
+        max_workers = max_workers or min(len(self.engines), os.cpu_count() or 1)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+
+    @classmethod
+    def from_codes(cls, from_code, to_codes, sinks=None, max_workers=None, **engine_kwargs):
+        """Builds one TranslationEngine per target language, loading them concurrently."""
+        from translation.translator import TranslationEngine
+
+        with ThreadPoolExecutor(max_workers=len(to_codes), thread_name_prefix="translation-load") as pool:
+            futures = {code: pool.submit(TranslationEngine, from_code=from_code, to_code=code, **engine_kwargs)
+                       for code in to_codes}
+            engines = {code: future.result() for code, future in futures.items()}
+        return cls(engines, sinks=sinks, max_workers=max_workers)
+
+    def add_sink(self, to_code, sink):
+        self.sinks[to_code] = sink
+
+    def translate_all(self, text):
+        """
+        Translates `text` (as-is) into every language concurrently and notifies the sinks.
+        Returns ({to_code: translated_text}, wall time in ms).
+        """
+        start_time = time.time()
+        futures = {code: self._pool.submit(engine.translate, text) for code, engine in self.engines.items()}
+        results = {code: future.result()[0] for code, future in futures.items()}
+        for code, translated in results.items():
+            sink = self.sinks.get(code)
+            if sink is not None and translated:
+                sink(code, translated)
+        processing_time_ms = (time.time() - start_time) * 1000
+        _fanout_ms.observe(processing_time_ms)
+        return results, processing_time_ms
+
+    def translate(self, text):
+        """Translates `text` into all languages; returns (primary translation, ms)."""
+        results, processing_time_ms = self.translate_all(text)
+        return results[self.primary], processing_time_ms
+
+    def incremental_translate(self, current_english_text):
+        """Delta detection once for all languages, then a concurrent translate of the new text."""
+        new_text = self.delta.update(current_english_text)
+        if not new_text:
+            return "", 0.0
+        return self.translate(new_text)
+
+    def translate_batch(self, texts):
+        """Batched translation into every language; returns (primary translations, ms)."""
+        start_time = time.time()
+        futures = {code: self._pool.submit(engine.translate_batch, texts) for code, engine in self.engines.items()}
+        results = {code: future.result()[0] for code, future in futures.items()}
+        for code, translations in results.items():
+            sink = self.sinks.get(code)
+            if sink is not None:
+                for translated in translations:
+                    if translated:
+                        sink(code, translated)
+        return results[self.primary], (time.time() - start_time) * 1000
+
+    def warmup(self):
+        """Warms up every engine concurrently (see pipeline.startup)."""
+        start_time = time.time()
+        futures = [self._pool.submit(engine.warmup) for engine in self.engines.values() if hasattr(engine, "warmup")]
+        for future in futures:
+            future.result()
+        return (time.time() - start_time) * 1000
+
+    def clear_state(self):
+        self.delta.reset()
+        for engine in self.engines.values():
+            engine.clear_state()
+
+    def close(self):
+        for engine in self.engines.values():
+            if hasattr(engine, "close"):
+                engine.close()
+        self._pool.shutdown(wait=True)
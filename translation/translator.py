@@ -1,22 +1,60 @@
+import re
 import time
-import argostranslate.package
-import argostranslate.translate
+
+from translation.cache import TranslationCache, normalize_text
+from translation.delta import TranscriptDelta
+
+def _split_sentences(text):
+    """Splits text after sentence-ending punctuation; short ASR fragments stay whole."""
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text.strip())]
+    return [s for s in sentences if s] or [text.strip()]
 
 class TranslationEngine:
-    def __init__(self, from_code="en", to_code="pt"):
+    def __init__(self, from_code="en", to_code="pt", cache_size=1024, cache_path=None, cache=None,
+                 max_batch_size=32, beam_size=4, inter_threads=1, intra_threads=0):
+        """
+        :param cache_size: Max entries of the LRU translation cache (0 disables it).
+        :param cache_path: Optional JSON file to persist the cache across restarts.
+        :param cache: A shared TranslationCache instance (overrides cache_size/cache_path).
+        :param max_batch_size: Max sentences per batched CTranslate2 decode (translate_batch).
+        :param beam_size: Beam size of the batched decode (Argos uses 4).
+        :param inter_threads: Concurrent CTranslate2 decodes (one translation at a time here).
+        :param intra_threads: CTranslate2 threads per decode (0 = library default, about one per core;
+                              see pipeline.resources for the per-stage budget).
+        """
         print(f"Loading Argos Translate for {from_code}->{to_code}...")
         self.from_code = from_code
         self.to_code = to_code
-        self.previous_english_text = ""
+        self.delta = TranscriptDelta()
+        if cache is None and cache_size > 0:
+            cache = TranslationCache(max_entries=cache_size, path=cache_path)
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.beam_size = beam_size
+        self.inter_threads = inter_threads
+        self.intra_threads = intra_threads
+        self._backend_checked = False
+        self._ct2_translator = None
+        self._package = None
         self._ensure_package_installed()
         print("Translation model loaded.")
 
-    def _ensure_package_installed(self):
-        # Check if installed
-        installed_packages = argostranslate.package.get_installed_packages()
-        for pkg in installed_packages:
+    def _find_installed_package(self):
+        # argostranslate is imported lazily: it pulls in ctranslate2/sentencepiece/stanza
+        import argostranslate.package
+        for pkg in argostranslate.package.get_installed_packages():
             if pkg.from_code == self.from_code and pkg.to_code == self.to_code:
-                return
+                return pkg
+        return None
+
+    def _ensure_package_installed(self):
+        # Check if installed (the package found here is reused by _load_backend, so the
+        # installed packages are only scanned once)
+        self._package = self._find_installed_package()
+        if self._package is not None:
+            return
+        
+        import argostranslate.package
         
         print("Language package not found locally. Downloading from Argos Translate index...")
         argostranslate.package.update_package_index()
@@ -31,6 +69,7 @@ class TranslationEngine:
             print(f"Installing {self.from_code}->{self.to_code} package...")
             argostranslate.package.install_from_path(package_to_install.download())
             print("Finished installing package.")
+            self._package = self._find_installed_package()
         else:
             print(f"Error: Could not find language package for {self.from_code}->{self.to_code}.")
         
@@ -39,46 +78,137 @@ class TranslationEngine:
         Translates only the new portion of the text that hasn't been translated yet.
         Returns the translated string and the processing time in ms.
         """
-        current_english_text = current_english_text.strip()
-        if not current_english_text:
-            return "", 0.0
-            
-        new_text = current_english_text
-        
-        if self.previous_english_text:
-            words_prev = self.previous_english_text.split()
-            words_curr = current_english_text.split()
-            
-            overlap_idx = 0
-            limit = min(len(words_prev), len(words_curr))
-            
-            def clean_word(w):
-                # Remove common ending punctuation for comparison
-                return w.lower().strip(".,!?\"'")
-                
-            for i in range(limit):
-                if clean_word(words_prev[i]) == clean_word(words_curr[i]):
-                    overlap_idx = i + 1
-                else:
-                    break
-                    
-            if overlap_idx < len(words_curr):
-                new_text = " ".join(words_curr[overlap_idx:])
-            else:
-                new_text = ""
-                
-        self.previous_english_text = current_english_text
-        
-        if not new_text.strip():
+        new_text = self.delta.update(current_english_text)
+        if not new_text:
             return "", 0.0
             
+        return self.translate(new_text)
+
+    @property
+    def previous_english_text(self):
+        return self.delta.previous_text
+
+    def translate(self, text):
+        """
+        Translates the given text as-is (no delta detection), e.g. text already
+        committed by the streaming transcriber.
+        Returns the translated string and the processing time in ms.
+        """
+        translations, processing_time_ms = self.translate_batch([text])
+        return translations[0], processing_time_ms
+
+    def translate_batch(self, texts):
+        """
+        Translates several texts with batched decodes on the underlying CTranslate2 model.
+        Cached texts are answered from the cache; the rest are split into sentences,
+        deduplicated and decoded in batches of at most `max_batch_size`.
+        Returns (list of translations in input order, processing time in ms).
+        """
         start_time = time.time()
-        # Translate the text using argostranslate
-        translation = argostranslate.translate.translate(new_text, self.from_code, self.to_code)
+        results = [None] * len(texts)
+        pending = {} # normalized text -> indexes; the first raw text is the one decoded
+        unique_texts = []
+        for i, text in enumerate(texts):
+            cached = self.cache.get(text, self.from_code, self.to_code) if self.cache is not None else None
+            if cached is not None:
+                results[i] = cached
+                continue
+            key = normalize_text(text)
+            if key not in pending:
+                pending[key] = []
+                unique_texts.append(text)
+            pending[key].append(i)
+
+        if unique_texts:
+            if self._load_backend():
+                translated = self._ctranslate2_batch(unique_texts)
+            else:
+                # Translate the text using argostranslate (one call per text)
+                import argostranslate.translate
+                translated = [argostranslate.translate.translate(t, self.from_code, self.to_code) for t in unique_texts]
+
+            for text, translation in zip(unique_texts, translated):
+                for i in pending[normalize_text(text)]:
+                    results[i] = translation
+                if self.cache is not None:
+                    self.cache.put(text, self.from_code, self.to_code, translation)
+
         processing_time_ms = (time.time() - start_time) * 1000
-        
-        return translation, processing_time_ms
+        return results, processing_time_ms
+
+    def _load_backend(self):
+        """
+        Opens the CTranslate2 model and tokenizer of the installed Argos package directly,
+        so several texts can share one batched decode. Falls back to per-text
+        argostranslate calls if the package layout is not the expected one.
+        """
+        if self._backend_checked:
+            return self._ct2_translator is not None
+        self._backend_checked = True
+        try:
+            import ctranslate2
+            pkg = self._package
+            if pkg is None:
+                raise RuntimeError(f"no installed package for {self.from_code}->{self.to_code}")
+            self._ct2_translator = ctranslate2.Translator(str(pkg.package_path / "model"), device="cpu",
+                                                          inter_threads=self.inter_threads,
+                                                          intra_threads=self.intra_threads)
+            self._tokenizer = pkg.tokenizer
+            self._target_prefix = getattr(pkg, "target_prefix", "") or ""
+        except Exception as e:
+            print(f"Batched CTranslate2 backend unavailable ({e}); translating one text per call.")
+            self._ct2_translator = None
+        return self._ct2_translator is not None
+
+    def _ctranslate2_batch(self, texts):
+        # Sentences are the decoding unit (as in Argos); remember which text each one came from
+        sentences, owners = [], []
+        for index, text in enumerate(texts):
+            for sentence in _split_sentences(text):
+                sentences.append(sentence)
+                owners.append(index)
+
+        tokenized = [self._tokenizer.encode(sentence) for sentence in sentences]
+        target_prefix = [[self._target_prefix]] * len(tokenized) if self._target_prefix else None
+        outputs = []
+        for start in range(0, len(tokenized), self.max_batch_size):
+            outputs.extend(self._ct2_translator.translate_batch(
+                tokenized[start:start + self.max_batch_size],
+                target_prefix=target_prefix[start:start + self.max_batch_size] if target_prefix else None,
+                replace_unknowns=True,
+                max_batch_size=self.max_batch_size,
+                beam_size=self.beam_size,
+                num_hypotheses=1,
+                length_penalty=0.2,
+            ))
+
+        parts = [[] for _ in texts]
+        for owner, output in zip(owners, outputs):
+            value = self._tokenizer.decode(output.hypotheses[0])
+            if self._target_prefix and value.startswith(self._target_prefix):
+                value = value[len(self._target_prefix):]
+            parts[owner].append(value.strip())
+        return [" ".join(p) for p in parts]
+
+    def warmup(self, text="Hello, this is a test."):
+        """
+        Opens the batched backend and translates a short sentence (bypassing the cache), so
+        the first real subtitle does not pay the cold-inference cost. Returns the time in ms.
+        """
+        start_time = time.time()
+        if self._load_backend():
+            self._ctranslate2_batch([text])
+        else:
+            import argostranslate.translate
+            argostranslate.translate.translate(text, self.from_code, self.to_code)
+        return (time.time() - start_time) * 1000
 
     def clear_state(self):
         """Clears the translation history."""
-        self.previous_english_text = ""
+        self.delta.reset()
+
+    def close(self):
+        """Persists the translation cache (if a cache path was configured)."""
+        if self.cache is not None and self.cache.path:
+            self.cache.save()
+            print(f"Translation cache saved: {self.cache.stats()}")